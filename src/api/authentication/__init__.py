@@ -0,0 +1,6 @@
+from .backends import *
+from .cache import *
+from .expiry import *
+from .filter import *
+from .snapshot import *
+from .token import *
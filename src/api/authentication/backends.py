@@ -0,0 +1,63 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password
+
+from api.hashers import HashingBusy
+
+UserModel = get_user_model()
+
+logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
+
+
+class TokenModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's API token and its expiry in the same
+    query as the user, so a login (authenticate() plus get_or_create_token())
+    is a single SELECT when the token is still valid.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.select_related("auth_token__expiry").get(
+                **{UserModel.USERNAME_FIELD: username}
+            )
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user (#20760).
+            UserModel().set_password(password)
+        else:
+            if self.check_password(user, password) and self.user_can_authenticate(user):
+                return user
+        return None
+
+    def check_password(self, user, password):
+        """
+        user.check_password(), except that rehashing a password stored with
+        outdated parameters is skipped when api.hashers.hashing_executor is
+        full: the password is already verified, and the rehash is retried on
+        the user's next login.
+        """
+
+        def setter(raw_password):
+            try:
+                user.set_password(raw_password)
+            except HashingBusy:
+                logger.info(
+                    {
+                        "action": "TokenModelBackend.check_password",
+                        "user": user.get_username(),
+                        "message": "Password rehash skipped, hashing is busy",
+                    }
+                )
+                return
+            user._password = None
+            user.save(update_fields=["password"])
+
+        return check_password(password, user.password, setter)
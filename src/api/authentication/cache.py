@@ -0,0 +1,95 @@
+"""
+Process-wide cache of API token -> username resolutions.
+
+Shared by the request logging middleware and the token authentication class so
+that putting the requesting user in the request log does not cost its own
+database round trip.
+"""
+
+import hashlib
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+
+from api.authentication.filter import token_filter
+
+ANONYMOUS_USERNAME = "anonymous"
+
+
+class TokenUsernameCache:
+    """
+    Bounded, thread-safe TTL/LRU mapping of token key -> username.
+
+    Unknown keys are cached as "anonymous" so repeated requests carrying a
+    stale or bogus token do not hit the database either, and keys rejected by
+    the token filter (see api.authentication.filter) never do.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, username):
+        with self._lock:
+            self._cache[key] = username
+
+    def invalidate(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def resolve(self, key):
+        """
+        Return the username owning `key`, querying the database (a single
+        Token JOIN User) only on a cache miss.
+        """
+        username = self.get(key)
+        if username is None and not token_filter.might_exist(key):
+            username = ANONYMOUS_USERNAME
+        if username is None:
+            username = (
+                Token.objects.filter(key=key).values_list("user__username", flat=True).first()
+                or ANONYMOUS_USERNAME
+            )
+            self.set(key, username)
+        return username
+
+    async def aresolve(self, key):
+        """
+        Async variant of resolve() for the ASGI request path.
+        """
+        username = self.get(key)
+        if username is None and not token_filter.might_exist(key):
+            username = ANONYMOUS_USERNAME
+        if username is None:
+            username = (
+                await Token.objects.filter(key=key)
+                .values_list("user__username", flat=True)
+                .afirst()
+                or ANONYMOUS_USERNAME
+            )
+            self.set(key, username)
+        return username
+
+
+def token_fingerprint(key):
+    """
+    Return a short, non-reversible identifier for a token key that can be
+    logged without touching the database.
+    """
+    return "token:" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+token_username_cache = TokenUsernameCache(
+    maxsize=settings.REQUEST_LOGGING["TOKEN_CACHE_SIZE"],
+    ttl=settings.REQUEST_LOGGING["TOKEN_CACHE_TTL"],
+)
@@ -0,0 +1,75 @@
+"""
+Sliding expiry of API tokens (see api.models.TokenExpiry and
+settings.TOKEN_EXPIRY).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.authentication.cache import token_username_cache
+from api.authentication.snapshot import token_auth_cache
+from api.models import TokenExpiry
+
+
+def is_expired(expires_at, now=None):
+    # tokens without an expiry are treated as expired
+    return expires_at is None or expires_at <= (now or timezone.now())
+
+
+def needs_refresh(expires_at, now=None):
+    """
+    True once the expiry was last extended more than REFRESH_INTERVAL ago.
+    """
+    config = settings.TOKEN_EXPIRY
+    remaining = expires_at - (now or timezone.now())
+    return remaining < timedelta(seconds=config["TTL"] - config["REFRESH_INTERVAL"])
+
+
+def refresh_expiry(key, now=None):
+    """
+    Extend the token's expiry to a full TTL from now (one UPDATE by primary
+    key) and return the new expiry.
+    """
+    expires_at = TokenExpiry.get_expires_at(now)
+    TokenExpiry.objects.filter(token_id=key).update(expires_at=expires_at)
+    return expires_at
+
+
+def create_token(user):
+    """
+    Create `user`'s API token and its expiry in one transaction. If another
+    login created it first, return that one.
+    """
+    try:
+        with transaction.atomic():
+            return Token.objects.create(user=user)
+    except IntegrityError:
+        return Token.objects.select_related("expiry").get(user=user)
+
+
+def get_or_create_token(user):
+    """
+    Return `user`'s API token for a login. An expired token is replaced by
+    a new one, otherwise the expiry is extended.
+
+    No query is needed to read the token when `user` came from
+    TokenModelBackend, which loads it (and its expiry) with the user.
+    """
+    try:
+        token = user.auth_token
+    except Token.DoesNotExist:
+        return create_token(user)
+    now = timezone.now()
+    expiry = getattr(token, "expiry", None)
+    if is_expired(expiry and expiry.expires_at, now):
+        token_auth_cache.invalidate(token.key)
+        token_username_cache.invalidate(token.key)
+        token.delete()
+        return create_token(user)
+    if needs_refresh(expiry.expires_at, now):
+        refresh_expiry(token.key, now)
+    return token
@@ -0,0 +1,203 @@
+"""
+In-process probabilistic filter over valid API token keys, so requests with
+a bogus or stale "Authorization: Token ..." header are rejected (and logged
+as anonymous) without a cache or database lookup.
+
+A Bloom filter answers "definitely not a token" or "maybe a token". Keys it
+rejects were never added, so nothing valid is lost; a false positive just
+falls through to the normal lookup. A counting Bloom filter is used so that
+deleted tokens can be removed as well as added.
+
+Each worker keeps its own filter:
+
+- It is built from the Token table on first use, in a background thread
+  (until it is ready every key passes), and fully rebuilt every
+  TOKEN_FILTER["REBUILD_INTERVAL"] seconds, which also resizes it and drops
+  tokens deleted by other workers.
+- Token create and delete signals update this worker's filter in place.
+- Tokens created by other workers are not in this worker's filter until its
+  next rebuild. Creating a token therefore also records a marker in the
+  Django cache, which a filter miss checks before rejecting the key. This
+  needs a cache shared by all workers, so the filter is only enabled by
+  default when CACHES["default"] is not a per-process backend.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
+
+# cache backends that are not shared between worker processes
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+MAX_COUNT = 255
+
+
+class CountingBloomFilter:
+    """
+    Bloom filter with 8-bit counters instead of bits, so keys can be removed.
+    Saturated counters are never decremented, which keeps removal safe.
+    """
+
+    def __init__(self, capacity, false_positive_rate):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self._counters = bytearray(self.size)
+        self._lock = threading.Lock()
+
+    def _indexes(self, key):
+        # double hashing: k indexes from the two halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        with self._lock:
+            for index in self._indexes(key):
+                if self._counters[index] < MAX_COUNT:
+                    self._counters[index] += 1
+
+    def remove(self, key):
+        indexes = self._indexes(key)
+        with self._lock:
+            # removing a key that was never added would corrupt other keys
+            if not all(self._counters[index] for index in indexes):
+                return
+            for index in indexes:
+                if self._counters[index] < MAX_COUNT:
+                    self._counters[index] -= 1
+
+    def __contains__(self, key):
+        counters = self._counters
+        return all(counters[index] for index in self._indexes(key))
+
+
+class TokenFilter:
+    """
+    Per-process filter of valid token keys with scheduled background rebuilds.
+    """
+
+    def __init__(self, false_positive_rate, rebuild_interval, chunk_size=5000):
+        self.false_positive_rate = false_positive_rate
+        self.rebuild_interval = rebuild_interval
+        self.chunk_size = chunk_size
+        self._filter = None
+        self._built_at = None
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled():
+        enabled = settings.TOKEN_FILTER["ENABLED"]
+        if enabled is None:
+            return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+        return enabled
+
+    @staticmethod
+    def get_marker_key(key):
+        # don't put live credentials in the shared cache's key space
+        return "token-filter:recent:" + hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def might_exist(self, key):
+        """
+        Return False only if `key` is definitely not a valid token key.
+        """
+        if not self.is_enabled():
+            return True
+        self.schedule_rebuild()
+        bloom = self._filter
+        if bloom is None or key in bloom:
+            return True
+        return cache.get(self.get_marker_key(key)) is not None
+
+    def add(self, key):
+        """
+        Record a new token, here and (until every worker has rebuilt) in the
+        shared cache.
+        """
+        if not self.is_enabled():
+            return
+        # two intervals: a worker may have started its last rebuild just before
+        # the key was created
+        cache.set(self.get_marker_key(key), True, 2 * self.rebuild_interval)
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add(key)
+
+    def remove(self, key):
+        bloom = self._filter
+        if bloom is not None:
+            bloom.remove(key)
+
+    def rebuild(self):
+        """
+        Build a new filter from the Token table, sized for the current number
+        of tokens, and swap it in. Requests keep using the old filter meanwhile.
+        """
+        start = time.monotonic()
+        capacity = max(2 * Token.objects.count(), 1000)
+        bloom = CountingBloomFilter(capacity, self.false_positive_rate)
+        for key in Token.objects.values_list("key", flat=True).iterator(chunk_size=self.chunk_size):
+            bloom.add(key)
+        with self._lock:
+            self._filter = bloom
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+        logger.info(
+            {
+                "action": "TokenFilter.rebuild",
+                "capacity": capacity,
+                "size": bloom.size,
+                "duration": round(time.monotonic() - start, 3),
+            }
+        )
+
+    def schedule_rebuild(self):
+        """
+        Start a background rebuild if the filter is missing or stale and none
+        is running.
+        """
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < self.rebuild_interval:
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error({"action": "TokenFilter.rebuild", "error": str(e)})
+            with self._lock:
+                self._rebuilding = False
+                # back off for a full interval before retrying
+                self._built_at = time.monotonic()
+        finally:
+            # the thread's own database connection
+            connection.close()
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._built_at = None
+
+
+token_filter = TokenFilter(
+    false_positive_rate=settings.TOKEN_FILTER["FALSE_POSITIVE_RATE"],
+    rebuild_interval=settings.TOKEN_FILTER["REBUILD_INTERVAL"],
+)
@@ -0,0 +1,131 @@
+"""
+Two-level cache of token -> (token, user, profile) snapshots used by
+CachingTokenAuthentication, so authenticated requests (including reading
+request.user.profile) cost no queries on a warm cache.
+
+- L1 is an in-process TTL/LRU cache with a short TTL.
+- L2 is the Django cache (CACHES["default"]), shared by all workers when it
+  is a shared backend such as Redis or Memcached.
+
+Invalidation deletes the entry from L2 and from the local L1; api.signals
+invalidates on every saved or deleted User, Profile or Token. Other workers
+drop their L1 copy within TOKEN_AUTH_CACHE["LOCAL_TTL"] seconds, which
+bounds how stale any worker can be.
+
+Snapshots hold field values, not model instances, so every request gets
+fresh instances. The password hash is not cached: it is a deferred field
+and is loaded on access, e.g. by check_password().
+"""
+
+import hashlib
+import threading
+from collections import namedtuple
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+
+from api.models import Profile, TokenExpiry
+
+TOKEN_FIELDS = [field.attname for field in Token._meta.concrete_fields]
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields if field.attname != "password"]
+PROFILE_FIELDS = [field.attname for field in Profile._meta.concrete_fields]
+Snapshot = namedtuple("Snapshot", ["token", "user", "profile", "expires_at"])
+# snapshots cached before a schema change are never read back
+SNAPSHOT_VERSION = hashlib.sha1(
+    repr((Snapshot._fields, TOKEN_FIELDS, USER_FIELDS, PROFILE_FIELDS)).encode()
+).hexdigest()[:8]
+
+
+def make_snapshot(token):
+    """
+    Snapshot a token loaded with select_related("user__profile", "expiry").
+    """
+    user = token.user
+    profile = getattr(user, "profile", None)
+    expiry = getattr(token, "expiry", None)
+    return Snapshot(
+        token=[getattr(token, name) for name in TOKEN_FIELDS],
+        user=[getattr(user, name) for name in USER_FIELDS],
+        profile=None if profile is None else [getattr(profile, name) for name in PROFILE_FIELDS],
+        expires_at=None if expiry is None else expiry.expires_at,
+    )
+
+
+def load_snapshot(snapshot, using="default"):
+    """
+    Rebuild (user, token) from a snapshot, with user.profile, user.auth_token,
+    token.user and token.expiry already cached on the instances.
+    """
+    user = User.from_db(using, USER_FIELDS, snapshot.user)
+    token = Token.from_db(using, TOKEN_FIELDS, snapshot.token)
+    user.auth_token = token
+    if snapshot.profile is not None:
+        user.profile = Profile.from_db(using, PROFILE_FIELDS, snapshot.profile)
+    if snapshot.expires_at is not None:
+        token.expiry = TokenExpiry.from_db(
+            using, ["token_id", "expires_at"], [token.key, snapshot.expires_at]
+        )
+    return user, token
+
+
+class TokenAuthCache:
+    def __init__(self, local_size, local_ttl, shared_ttl):
+        self.shared_ttl = shared_ttl
+        self._local = TTLCache(maxsize=local_size, ttl=local_ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_cache_key(key):
+        # don't put live credentials in the shared cache's key space
+        return f"token-auth:{SNAPSHOT_VERSION}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+    def get(self, key):
+        snapshot = self.get_local(key)
+        if snapshot is None:
+            snapshot = self.get_shared(key)
+        return snapshot
+
+    def get_local(self, key):
+        with self._lock:
+            return self._local.get(key)
+
+    def get_shared(self, key):
+        snapshot = cache.get(self.get_cache_key(key))
+        if snapshot is not None:
+            with self._lock:
+                self._local[key] = snapshot
+        return snapshot
+
+    def set(self, key, snapshot):
+        with self._lock:
+            self._local[key] = snapshot
+        cache.set(self.get_cache_key(key), snapshot, self.shared_ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+        cache.delete(self.get_cache_key(key))
+
+    def invalidate_user(self, user):
+        """
+        Drop the cached snapshot of `user`'s token, e.g. after a password or
+        profile change. Only queries for the token when it isn't loaded.
+        """
+        try:
+            self.invalidate(user.auth_token.key)
+        except Token.DoesNotExist:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+token_auth_cache = TokenAuthCache(
+    local_size=settings.TOKEN_AUTH_CACHE["LOCAL_SIZE"],
+    local_ttl=settings.TOKEN_AUTH_CACHE["LOCAL_TTL"],
+    shared_ttl=settings.TOKEN_AUTH_CACHE["SHARED_TTL"],
+)
@@ -0,0 +1,57 @@
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from api.authentication.cache import token_username_cache
+from api.authentication.expiry import is_expired, needs_refresh, refresh_expiry
+from api.authentication.filter import token_filter
+from api.authentication.snapshot import load_snapshot, make_snapshot, token_auth_cache
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    DRF TokenAuthentication backed by a two-level cache of token -> user and
+    profile snapshots (see api.authentication.snapshot), so a warm request
+    authenticates and reads request.user.profile without any query.
+
+    Tokens expire (see api.authentication.expiry). The expiry is part of the
+    snapshot, so checking it is free, and it is extended with a single
+    UPDATE at most once per TOKEN_EXPIRY["REFRESH_INTERVAL"].
+
+    Keys that the token filter (see api.authentication.filter) knows are not
+    tokens are rejected before the shared cache or the database is consulted.
+
+    Every successfully authenticated token is also recorded in the shared
+    token -> username cache, so the request logging middleware can name the
+    user without repeating the lookup.
+    """
+
+    def authenticate_credentials(self, key):
+        snapshot = token_auth_cache.get_local(key)
+        if snapshot is None:
+            if not token_filter.might_exist(key):
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            snapshot = token_auth_cache.get_shared(key)
+        if snapshot is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related("user__profile", "expiry").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            snapshot = make_snapshot(token)
+            token_auth_cache.set(key, snapshot)
+
+        now = timezone.now()
+        if is_expired(snapshot.expires_at, now):
+            raise exceptions.AuthenticationFailed(_("Token has expired."))
+        if needs_refresh(snapshot.expires_at, now):
+            snapshot = snapshot._replace(expires_at=refresh_expiry(key, now))
+            token_auth_cache.set(key, snapshot)
+        user, token = load_snapshot(snapshot)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        token_username_cache.set(key, user.username)
+        return (user, token)
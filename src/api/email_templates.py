@@ -0,0 +1,181 @@
+"""
+Email template pipeline.
+
+- Templates are compiled once per process (auto_reload is off outside DEBUG,
+  so cached templates are not even stat'ed), and the compiled bytecode is
+  kept on disk so new workers skip Jinja's parse/compile step too.
+- Each email template extends master.html, so the layout and the email body
+  are composed in a single render.
+- The text/plain alternative is derived from the rendered HTML, instead of
+  repeating the HTML in the plain part.
+- Messages are serialized from MIME header blocks built once at import,
+  rather than assembling and flattening an email.message tree per email.
+"""
+
+import base64
+import functools
+import os
+import re
+from email.header import Header
+from email.utils import formataddr
+from html.parser import HTMLParser
+
+from django.conf import settings
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+email_template_dir = os.path.join(os.path.dirname(__file__), "templates", "email")
+if settings.EMAIL_TEMPLATE_BYTECODE_CACHE_DIR:
+    os.makedirs(settings.EMAIL_TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+jinja_env = Environment(
+    loader=FileSystemLoader(email_template_dir),
+    autoescape=select_autoescape(["html", "xml"]),
+    # None means a per-user directory under the system temp dir
+    bytecode_cache=FileSystemBytecodeCache(settings.EMAIL_TEMPLATE_BYTECODE_CACHE_DIR),
+    auto_reload=settings.DEBUG,
+)
+# for text templates, e.g. plain text renderings of campaign content
+text_jinja_env = jinja_env.overlay(autoescape=False)
+
+# both parts are base64-encoded, and "_" is not in the base64 alphabet, so the
+# boundary can never occur in a part
+MIME_BOUNDARY = "=_alternative_part_="
+MESSAGE_HEADERS = (
+    f'Content-Type: multipart/alternative; boundary="{MIME_BOUNDARY}"\nMIME-Version: 1.0\n'
+)
+PART_HEADERS = (
+    f"--{MIME_BOUNDARY}\n"
+    'Content-Type: text/{subtype}; charset="utf-8"\n'
+    "MIME-Version: 1.0\n"
+    "Content-Transfer-Encoding: base64\n\n"
+)
+TEXT_PART_HEADERS = PART_HEADERS.format(subtype="plain")
+HTML_PART_HEADERS = PART_HEADERS.format(subtype="html")
+MESSAGE_END = f"--{MIME_BOUNDARY}--\n"
+
+
+def get_layout_context():
+    """Variables used by master.html."""
+    return {
+        "frontend_url": settings.FRONTEND_URL,
+        "frontend_brand_logo_image_url": settings.FRONTEND_BRAND_LOGO_IMAGE_URL,
+        "app_name": settings.APP_NAME,
+        "contact_email": settings.CONTACT_EMAIL,
+    }
+
+
+def render_master_template(subject, content):
+    """
+    Renders master.html around `content`, which may be HTML.
+    """
+    return jinja_env.get_template("master.html").render(
+        title=subject, header=subject, content=content, **get_layout_context()
+    )
+
+
+def render_email(template_name, subject, **context):
+    """
+    Renders an email template (which extends master.html) in one pass.
+
+    Returns:
+        tuple: (html, text) bodies of the email.
+    """
+    html = jinja_env.get_template(template_name).render(
+        title=subject, header=subject, **get_layout_context(), **context
+    )
+    return html, html_to_text(html)
+
+
+class _TextExtractor(HTMLParser):
+    BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "table", "tr", "ul", "ol"}
+    SKIP_TAGS = {"head", "style", "script", "title"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n")
+        elif tag == "br":
+            self.parts.append("\n")
+        elif tag == "hr":
+            self.parts.append("\n\n----------\n\n")
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag == "a":
+            self.links.append((dict(attrs).get("href") or "", len(self.parts)))
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip = max(self.skip - 1, 0)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n")
+        elif tag == "a" and self.links:
+            href, start = self.links.pop()
+            # keep the link on one line, followed by its target
+            text = re.sub(r"\s+", " ", "".join(self.parts[start:])).strip()
+            del self.parts[start:]
+            if href and href.removeprefix("mailto:") != text:
+                text = f"{text} ({href})" if text else href
+            self.parts.append(text)
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(re.sub(r"\s+", " ", data))
+
+    def get_text(self):
+        lines = (line.strip() for line in "".join(self.parts).splitlines())
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+
+def html_to_text(html):
+    """Plain text version of an HTML email: block structure kept, links spelled out."""
+    extractor = _TextExtractor()
+    # skip the <head> (master.html's stylesheet) without parsing it
+    body_start = html.find("<body")
+    extractor.feed(html[body_start:] if body_start != -1 else html)
+    extractor.close()
+    return extractor.get_text()
+
+
+@functools.lru_cache(maxsize=None)
+def get_from_header(app_name, from_email):
+    # RFC 2047 encodes app_name if it is not ASCII
+    return formataddr((app_name, from_email))
+
+
+def encode_header(value):
+    if "\n" in value or "\r" in value:
+        raise ValueError(f"Header value {value!r} contains a line break")
+    return value if value.isascii() else Header(value, "utf-8").encode()
+
+
+def encode_body(body):
+    return base64.encodebytes(body.encode()).decode()
+
+
+def build_raw_message(recipient, subject, text_body, html_body):
+    """
+    Builds a multipart/alternative message and returns it base64url-encoded,
+    as the Gmail API expects.
+    """
+    message = "".join(
+        [
+            MESSAGE_HEADERS,
+            f"to: {encode_header(recipient)}\n",
+            f"subject: {encode_header(subject)}\n",
+            f"from: {get_from_header(settings.APP_NAME, settings.SEND_FROM_EMAIL)}\n\n",
+            # the plain part will display if HTML disabled on recipient client
+            TEXT_PART_HEADERS,
+            encode_body(text_body),
+            # the html part will display if HTML enabled on recipient client
+            HTML_PART_HEADERS,
+            encode_body(html_body),
+            MESSAGE_END,
+        ]
+    )
+    return base64.urlsafe_b64encode(message.encode()).decode()
@@ -0,0 +1,152 @@
+"""
+Process-wide Gmail API client used by api.util.send_email.
+
+Creating service-account credentials mints a new access token on first use,
+and building a service object parses the Gmail discovery document, so both
+are done once instead of per email:
+
+- Delegated credentials are created once per process. google-auth refreshes
+  their access token only when it has expired.
+- The static discovery document bundled with google-api-python-client is
+  parsed once. No discovery request is ever made.
+- httplib2 is not thread-safe, so each thread gets its own (cheap) service
+  object built from the shared document and credentials.
+
+Calls go through the "gmail" circuit breaker (see api.outbound). Its
+timeout, shortened to what is left of the request's deadline, is applied to
+the HTTP connections before each call.
+"""
+
+import json
+import threading
+
+import httplib2
+from django.conf import settings
+from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from api.outbound import get_breaker
+
+GMAIL_SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
+
+
+class GmailClient:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._credentials = None
+        self._discovery_document = None
+
+    def get_credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                credentials = service_account.Credentials.from_service_account_info(
+                    {
+                        "type": "service_account",
+                        "project_id": settings.GMAIL_API_PROJECT_ID,
+                        "private_key_id": settings.GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY_ID,
+                        "private_key": settings.GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY,
+                        "client_email": settings.GMAIL_API_SERVICE_ACCOUNT_CLIENT_EMAIL,
+                        "client_id": settings.GMAIL_API_SERVICE_ACCOUNT_CLIENT_ID,
+                        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                        "token_uri": "https://oauth2.googleapis.com/token",
+                        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+                        "client_x509_cert_url": (
+                            settings.GMAIL_API_SERVICE_ACCOUNT_CLIENT_X509_CERT_URL
+                        ),
+                        "universe_domain": "googleapis.com",
+                    },
+                    scopes=GMAIL_SCOPES,
+                )
+                self._credentials = credentials.with_subject(settings.SEND_FROM_EMAIL)
+            return self._credentials
+
+    def get_discovery_document(self):
+        with self._lock:
+            if self._discovery_document is None:
+                self._discovery_document = json.loads(get_static_doc("gmail", "v1"))
+            return self._discovery_document
+
+    def get_service(self):
+        """
+        Return this thread's Gmail service object, building it on first use.
+        """
+        service = getattr(self._local, "service", None)
+        if service is None:
+            http = AuthorizedHttp(
+                self.get_credentials(), http=httplib2.Http(timeout=get_breaker("gmail").timeout)
+            )
+            service = build_from_document(self.get_discovery_document(), http=http)
+            self._local.service = service
+            self._local.http = http
+        return service
+
+    def set_timeout(self, timeout):
+        """
+        Apply `timeout` to this thread's HTTP connections, including those
+        httplib2 keeps open from earlier calls (it only applies Http.timeout
+        to new connections).
+        """
+        http = self._local.http
+        http.timeout = timeout
+        for connection in http.connections.values():
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+
+    def send(self, raw):
+        """
+        Send a base64url-encoded RFC 2822 message as the delegated user.
+        """
+        request = self.get_service().users().messages().send(userId="me", body={"raw": raw})
+        with get_breaker("gmail").guard() as timeout:
+            self.set_timeout(timeout)
+            return request.execute()
+
+    def send_batch(self, raws):
+        """
+        Send several messages in one Gmail batch HTTP request (Gmail accepts up
+        to 100, but recommends at most 50 to stay under its rate limits).
+
+        Args:
+            raws (dict): base64url-encoded messages keyed by request id.
+        Returns:
+            tuple: (responses, errors), dicts keyed by request id; errors hold the
+            HttpError raised for that message.
+        """
+        service = self.get_service()
+        responses, errors = {}, {}
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                responses[request_id] = response
+            else:
+                errors[request_id] = exception
+
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, raw in raws.items():
+            batch.add(
+                service.users().messages().send(userId="me", body={"raw": raw}),
+                request_id=request_id,
+            )
+        # errors for individual messages are reported, not raised, so only
+        # failures of the batch request itself count against the breaker
+        with get_breaker("gmail").guard() as timeout:
+            self.set_timeout(timeout)
+            batch.execute()
+        return responses, errors
+
+    def reset(self):
+        """
+        Drop the cached credentials and services, e.g. after rotating the key.
+        Threads build a fresh service on their next send.
+        """
+        with self._lock:
+            self._credentials = None
+            self._discovery_document = None
+            self._local = threading.local()
+
+
+gmail_client = GmailClient()
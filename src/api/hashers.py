@@ -0,0 +1,152 @@
+"""
+Password hashing on a bounded pool, so a burst of logins or sign ups cannot
+take all of a worker's CPU and threads away from the rest of the API.
+
+PBKDF2 costs hundreds of milliseconds of CPU per hash. Django hashes in the
+request thread, so every concurrent login hashes at once. Here each process
+hashes in at most PASSWORD_HASHING["MAX_WORKERS"] threads (hashlib releases
+the GIL, so they run in parallel), and at most PASSWORD_HASHING["MAX_QUEUE"]
+more hashes may wait for a thread. Beyond that, hashing fails fast with
+HashingBusy, which views turn into a 503 with a Retry-After header.
+
+The Bounded* hashers replace Django's PBKDF2, Argon2 and scrypt hashers in
+settings.PASSWORD_HASHERS under the same algorithm names, so stored hashes
+are unaffected. Their cost parameters come from the per-host configuration
+written by `manage.py calibrate_password_hashers` (PASSWORD_HASHER_CONFIG),
+falling back to Django's defaults. Django rehashes a password whose stored
+parameters differ from these when it is next checked successfully, i.e. on
+login, so a recalibrated host converges on its new parameters.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+class HashingBusy(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Too many password hashes in progress")
+        self.retry_after = retry_after
+
+
+class HashingExecutor:
+    """
+    Thread pool with admission control: submitting fails with HashingBusy
+    instead of queueing when max_workers + max_queue hashes are pending.
+    """
+
+    def __init__(self, max_workers, max_queue, retry_after):
+        self.max_workers = max_workers
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = None
+        self.completed = 0
+        self.rejected = 0
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hashing",
+                    initializer=self.mark_worker,
+                )
+            return self._executor
+
+    def mark_worker(self):
+        """
+        Run hashes requested from the calling thread directly: used for the
+        pool's own threads, and by processes that hash in bulk (see
+        api.provisioning), where a pool inherited through fork has no threads.
+        """
+        self._local.is_worker = True
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs) on the pool and return its result. Calls made
+        from a pool thread (a hasher's verify() calling its encode()) run
+        directly.
+        """
+        if getattr(self._local, "is_worker", False):
+            return fn(*args, **kwargs)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy(self.retry_after)
+        try:
+            future = self.get_executor().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+        return future.result()
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self.completed += 1
+
+    def get_stats(self):
+        with self._lock:
+            return {"completed": self.completed, "rejected": self.rejected}
+
+
+hashing_executor = HashingExecutor(
+    max_workers=settings.PASSWORD_HASHING["MAX_WORKERS"],
+    max_queue=settings.PASSWORD_HASHING["MAX_QUEUE"],
+    retry_after=settings.PASSWORD_HASHING["RETRY_AFTER"],
+)
+
+
+class HasherParameter:
+    """
+    Hasher cost parameter read from the calibrated PASSWORD_HASHER_CONFIG,
+    with Django's value as the default.
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        parameters = settings.PASSWORD_HASHER_CONFIG.get("hashers", {}).get(owner.algorithm, {})
+        return parameters.get(self.name, self.default)
+
+
+class BoundedHasherMixin:
+    """
+    Run the hasher's encode() and verify() on hashing_executor.
+    """
+
+    def encode(self, *args, **kwargs):
+        return hashing_executor.run(super().encode, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        return hashing_executor.run(super().verify, password, encoded)
+
+
+class BoundedPBKDF2PasswordHasher(BoundedHasherMixin, PBKDF2PasswordHasher):
+    iterations = HasherParameter(PBKDF2PasswordHasher.iterations)
+
+
+class BoundedArgon2PasswordHasher(BoundedHasherMixin, Argon2PasswordHasher):
+    time_cost = HasherParameter(Argon2PasswordHasher.time_cost)
+    memory_cost = HasherParameter(Argon2PasswordHasher.memory_cost)
+    parallelism = HasherParameter(Argon2PasswordHasher.parallelism)
+
+
+class BoundedScryptPasswordHasher(BoundedHasherMixin, ScryptPasswordHasher):
+    work_factor = HasherParameter(ScryptPasswordHasher.work_factor)
+    block_size = HasherParameter(ScryptPasswordHasher.block_size)
+    parallelism = HasherParameter(ScryptPasswordHasher.parallelism)
+    maxmem = HasherParameter(ScryptPasswordHasher.maxmem)
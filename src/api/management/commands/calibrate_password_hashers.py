@@ -0,0 +1,139 @@
+import json
+import math
+import platform
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+PASSWORD = "calibration password"
+
+# never calibrate below these, however slow the host (OWASP minimums)
+MIN_PBKDF2_ITERATIONS = 600_000
+MIN_ARGON2_TIME_COST = 2
+MIN_SCRYPT_WORK_FACTOR = 2**14
+# scrypt needs 128 * block_size * work_factor bytes of memory per hash
+MAX_SCRYPT_WORK_FACTOR = 2**17
+
+
+def time_hash(hasher, samples):
+    """
+    Fastest of `samples` hashes, in seconds.
+    """
+    salt = hasher.salt()
+    best = math.inf
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.encode(PASSWORD, salt)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate_pbkdf2(target, samples):
+    hasher = PBKDF2PasswordHasher()
+    hasher.iterations = 100_000
+    iterations = 100_000 * target / time_hash(hasher, samples)
+    hasher.iterations = max(MIN_PBKDF2_ITERATIONS, int(round(iterations, -3)))
+    return {"iterations": hasher.iterations}, time_hash(hasher, samples)
+
+
+def calibrate_argon2(target, samples):
+    # memory and lanes stay at Django's defaults; time_cost scales linearly
+    hasher = Argon2PasswordHasher()
+    hasher.time_cost = 1
+    hasher.time_cost = max(MIN_ARGON2_TIME_COST, round(target / time_hash(hasher, samples)))
+    parameters = {
+        "time_cost": hasher.time_cost,
+        "memory_cost": hasher.memory_cost,
+        "parallelism": hasher.parallelism,
+    }
+    return parameters, time_hash(hasher, samples)
+
+
+def calibrate_scrypt(target, samples):
+    # work_factor must be a power of two; it also sets the memory used
+    hasher = ScryptPasswordHasher()
+    hasher.work_factor = MIN_SCRYPT_WORK_FACTOR
+    elapsed = time_hash(hasher, samples)
+    while hasher.work_factor < MAX_SCRYPT_WORK_FACTOR and elapsed * 2 <= target:
+        hasher.work_factor *= 2
+        elapsed *= 2
+    # OpenSSL refuses more than 32 MiB unless maxmem allows it
+    hasher.maxmem = 2 * 128 * hasher.work_factor * hasher.block_size * hasher.parallelism
+    parameters = {
+        "work_factor": hasher.work_factor,
+        "block_size": hasher.block_size,
+        "parallelism": hasher.parallelism,
+        "maxmem": hasher.maxmem,
+    }
+    return parameters, time_hash(hasher, samples)
+
+
+CALIBRATORS = {
+    "pbkdf2_sha256": calibrate_pbkdf2,
+    "argon2": calibrate_argon2,
+    "scrypt": calibrate_scrypt,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the PBKDF2, Argon2 and scrypt password hashers on this host and write "
+        "the cost parameters that take about --target-ms per hash to "
+        "PASSWORD_HASHER_CONFIG_FILE. Restart the app to use them; existing passwords are "
+        "rehashed with them on the next successful login."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms", type=float, default=250, help="target time per hash, in milliseconds"
+        )
+        parser.add_argument(
+            "--algorithm",
+            choices=list(CALIBRATORS),
+            default="pbkdf2_sha256",
+            help="hasher used for new passwords",
+        )
+        parser.add_argument("--samples", type=int, default=3, help="hashes timed per measurement")
+        parser.add_argument(
+            "--output",
+            default=settings.PASSWORD_HASHER_CONFIG_FILE,
+            help="configuration file to write",
+        )
+
+    def handle(self, *args, **options):
+        target = options["target_ms"] / 1000
+        hashers = {}
+        for algorithm, calibrate in CALIBRATORS.items():
+            try:
+                parameters, elapsed = calibrate(target, options["samples"])
+            except ValueError as e:
+                # e.g. argon2-cffi is not installed
+                self.stdout.write(self.style.WARNING(f"{algorithm:<14} skipped: {e}"))
+                continue
+            hashers[algorithm] = parameters
+            line = f"{algorithm:<14} {elapsed * 1000:>7.1f} ms  {parameters}"
+            if elapsed > target * 1.5:
+                self.stdout.write(self.style.WARNING(f"{line} (above target: minimum cost)"))
+            else:
+                self.stdout.write(line)
+
+        if options["algorithm"] not in hashers:
+            raise CommandError(f"{options['algorithm']} is not available on this host")
+
+        config = {
+            "algorithm": options["algorithm"],
+            "target_ms": options["target_ms"],
+            "host": platform.node(),
+            "calibrated_at": timezone.now().isoformat(),
+            "hashers": hashers,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(config, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,202 @@
+import hashlib
+import random
+import string
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.models import Profile, TokenExpiry
+from api.provisioning import bulk_create_users, bulk_insert, copy_users
+
+FIRST_NAMES = (
+    "James Mary Robert Patricia John Jennifer Michael Linda David Elizabeth William Barbara "
+    "Richard Susan Joseph Jessica Thomas Sarah Carlos Maria Wei Mei Aarav Priya Mohammed Fatima "
+    "Hiroshi Yuki Olga Ivan Kwame Amara Lucas Sofia Noah Emma Liam Olivia Mateo Chloe"
+).split()
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez Hernandez Lopez "
+    "Wilson Anderson Thomas Taylor Moore Jackson Martin Lee Nguyen Chen Wang Kim Patel Singh "
+    "Khan Ali Sato Suzuki Ivanov Novak Mensah Okafor Silva Rossi Muller Dubois Hunt Walker"
+).split()
+DOMAINS = ("example.com", "example.org", "example.net")
+BIO_WORDS = (
+    "reader writer runner cook traveler developer teacher student designer parent gardener "
+    "photographer musician gamer volunteer coffee books hiking music travel"
+).split()
+# share of premium users' cards by brand
+CARD_TYPES = [
+    (Profile.CardType.VISA, 50),
+    (Profile.CardType.MASTERCARD, 30),
+    (Profile.CardType.AMEX, 12),
+    (Profile.CardType.DISCOVER, 6),
+    (Profile.CardType.JCB, 2),
+]
+ALPHANUMERIC = string.ascii_letters + string.digits
+
+
+class SyntheticUsers:
+    """
+    Deterministic user, profile and API token rows: the same seed, offset and
+    end date give the same rows, whatever the chunk size.
+
+    Signups grow linearly over `days`, so recent days see more of them. Most
+    users are active and have logged in, more often recently than long ago.
+    Active users who logged in within twice the token TTL hold an API token
+    expiring a TTL after that login, so some tokens are expired and waiting
+    for purge_expired_tokens.
+    """
+
+    def __init__(self, seed, end, days, password_hash, offset=0):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.end = end
+        self.days = days
+        self.password_hash = password_hash
+        self.index = offset
+        self.ttl = timedelta(seconds=settings.TOKEN_EXPIRY["TTL"])
+        self.card_types, self.card_weights = zip(*CARD_TYPES)
+
+    def random_string(self, length):
+        return "".join(self.rng.choices(ALPHANUMERIC, k=length))
+
+    def make_chunk(self, size):
+        """
+        Return the next `size` (user, profile, token or None) triples.
+        """
+        rng = self.rng
+        span = timedelta(days=self.days).total_seconds()
+        rows = []
+        for _ in range(size):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f"{first_name}.{last_name}.{self.index}@{rng.choice(DOMAINS)}".lower()
+            # linear growth: the density of signups rises towards `end`
+            date_joined = self.end - timedelta(seconds=span * (1 - rng.random() ** 0.5))
+            last_login = None
+            if rng.random() < 0.8:
+                # skewed towards recent logins
+                last_login = self.end - (self.end - date_joined) * rng.random() ** 3
+            user = User(
+                username=email,
+                email=email,
+                first_name=first_name,
+                last_name=last_name,
+                password=self.password_hash,
+                is_active=rng.random() < 0.92,
+                date_joined=date_joined,
+                last_login=last_login,
+            )
+
+            profile = Profile(
+                bio=(
+                    " ".join(rng.sample(BIO_WORDS, rng.randint(2, 6))) if rng.random() < 0.3 else ""
+                ),
+                preferred_name=first_name if rng.random() < 0.2 else "",
+                card_type=None,
+            )
+            if rng.random() < 0.12:
+                profile.plan_type = Profile.PlanType.PREMIUM
+                profile.stripe_customer_id = "cus_" + self.random_string(14)
+                profile.stripe_subscription_id = "sub_" + self.random_string(24)
+                profile.card_type = rng.choices(self.card_types, self.card_weights)[0]
+                profile.card_last4 = f"{rng.randrange(10000):04d}"
+                profile.card_exp_month = rng.randint(1, 12)
+                profile.card_exp_year = self.end.year + rng.randint(0, 5)
+
+            token = None
+            if user.is_active and last_login is not None and self.end - last_login < 2 * self.ttl:
+                # unique across runs with other offsets or seeds (and guessable,
+                # hence the refusal to run in production)
+                key = hashlib.sha1(f"{self.seed}:{self.index}".encode()).hexdigest()
+                token = Token(key=key)
+                token.expires_at = last_login + self.ttl
+            rows.append((user, profile, token))
+            self.index += 1
+        return rows
+
+
+def insert_chunk(rows):
+    users = [user for user, _, _ in rows]
+    profiles = [profile for _, profile, _ in rows]
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            copy_users(users, profiles)
+        else:
+            bulk_create_users(users, profiles)
+        tokens = []
+        for user, _, token in rows:
+            if token is not None:
+                token.user = user
+                tokens.append(token)
+        if tokens:
+            bulk_insert(Token, tokens)
+            bulk_insert(
+                TokenExpiry,
+                [TokenExpiry(token=token, expires_at=token.expires_at) for token in tokens],
+            )
+    return len(tokens)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users with profiles and API tokens for performance testing, with "
+        "bulk inserts (COPY on Postgres). The same --seed, --offset and --end give the same "
+        "rows. Every user's password is --password. Running servers pick up the new tokens "
+        "when their token filter is next rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="number of users to create")
+        parser.add_argument("--seed", type=int, default=0, help="random seed")
+        parser.add_argument(
+            "--offset",
+            type=int,
+            default=0,
+            help="number of the first user, to add users to an earlier run's",
+        )
+        parser.add_argument(
+            "--end",
+            type=datetime.fromisoformat,
+            help="date (YYYY-MM-DD) of the latest signups and logins, today by default",
+        )
+        parser.add_argument(
+            "--days", type=int, default=730, help="period over which users signed up"
+        )
+        parser.add_argument(
+            "--password", default="synthetic password", help="password of every user"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=5000, help="users inserted per transaction"
+        )
+
+    def handle(self, *args, **options):
+        if settings.DJANGO_ENV == "production":
+            raise CommandError("refusing to generate synthetic users in production")
+        end = options["end"] or datetime.combine(timezone.localdate(), time())
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+
+        seed = options["seed"]
+        salt = random.Random(seed).choices(ALPHANUMERIC, k=22)
+        # hashed once: hashing millions of passwords would take days
+        password_hash = make_password(options["password"], "".join(salt))
+        generator = SyntheticUsers(
+            seed, end, options["days"], password_hash, offset=options["offset"]
+        )
+
+        created = tokens = 0
+        while created < options["count"]:
+            rows = generator.make_chunk(min(options["chunk_size"], options["count"] - created))
+            if created == 0 and User.objects.filter(username=rows[0][0].username).exists():
+                raise CommandError("these users exist already, pass a different --offset")
+            tokens += insert_chunk(rows)
+            created += len(rows)
+            self.stdout.write(f"{created} users, {tokens} tokens")
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} users with profiles and {tokens} tokens")
+        )
@@ -0,0 +1,52 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.provisioning import FORMATS, UserImporter, get_format, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users and their profiles from a CSV or NDJSON file with the fields email, "
+        "first_name, last_name, password, is_active, bio, preferred_name and plan_type. "
+        "Rows that cannot be imported are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="file to import")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="file format, guessed from the extension by default"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="rows inserted per transaction"
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="processes hashing passwords; 0 hashes on this process's hashing threads",
+        )
+
+    def handle(self, *args, **options):
+        format = options["format"] or get_format(options["path"])
+        if format is None:
+            raise CommandError("cannot tell the file format from its name, pass --format")
+
+        def on_error(line, email, error):
+            self.stderr.write(f"line {line}: {email or '-'}: {error}")
+
+        importer = UserImporter(
+            chunk_size=options["chunk_size"],
+            processes=options["processes"],
+            on_error=on_error,
+        )
+        with open(options["path"], newline="", encoding="utf-8-sig") as f:
+            for result in importer.iter_run(read_rows(f, format)):
+                self.stdout.write(
+                    f"{result.processed} processed, {result.created} created, "
+                    f"{result.failed} failed"
+                )
+        result = importer.get_result()
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {result.created} of {result.processed} users")
+        )
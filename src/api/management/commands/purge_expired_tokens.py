@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.models import TokenExpiry
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired API tokens in small batches. Each batch is its own short transaction, "
+        "found through the index on TokenExpiry.expires_at, so no long locks are held."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="tokens deleted per batch")
+        parser.add_argument(
+            "--sleep", type=float, default=0.1, help="seconds to pause between batches"
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                TokenExpiry.objects.filter(expires_at__lte=now)
+                .order_by("expires_at")
+                .values_list("token_id", flat=True)[: options["batch_size"]]
+            )
+            if not keys:
+                break
+            # TokenExpiry rows go with their tokens (on_delete=CASCADE)
+            Token.objects.filter(key__in=keys).delete()
+            deleted += len(keys)
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired token(s)"))
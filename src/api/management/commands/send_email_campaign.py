@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.campaigns import CampaignSender
+from api.models import EmailCampaign, Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Send an email campaign to all active users, creating it first if --subject and "
+        "--content-file are given. Rerunning an interrupted campaign resumes it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", help="campaign name")
+        parser.add_argument("--subject", help="subject of a new campaign")
+        parser.add_argument(
+            "--content-file",
+            help="Jinja template for a new campaign's body, rendered inside master.html with "
+            "first_name available",
+        )
+        parser.add_argument(
+            "--plan-type",
+            default="",
+            choices=Profile.PlanType.values,
+            help="only email users on this plan",
+        )
+        parser.add_argument("--batch-size", type=int, default=50, help="messages per Gmail batch")
+        parser.add_argument("--concurrency", type=int, default=4, help="batches sent in parallel")
+        parser.add_argument(
+            "--rate", type=float, default=10.0, help="maximum messages per second, all threads"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="users fetched per database round trip"
+        )
+        parser.add_argument("--restart", action="store_true", help="send to every user again")
+
+    def handle(self, *args, **options):
+        campaign = EmailCampaign.objects.filter(name=options["name"]).first()
+        if campaign is None:
+            if not (options["subject"] and options["content_file"]):
+                raise CommandError("a new campaign needs --subject and --content-file")
+            with open(options["content_file"]) as f:
+                content = f.read()
+            campaign = EmailCampaign.objects.create(
+                name=options["name"],
+                subject=options["subject"],
+                content=content,
+                plan_type=options["plan_type"],
+            )
+        elif campaign.status == EmailCampaign.Status.DONE and not options["restart"]:
+            raise CommandError(f"campaign {campaign.name} is done, pass --restart to send it again")
+
+        if options["restart"]:
+            campaign.last_user_id = campaign.sent_count = campaign.failed_count = 0
+            campaign.save(update_fields=["last_user_id", "sent_count", "failed_count"])
+
+        campaign = CampaignSender(
+            campaign,
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            chunk_size=options["chunk_size"],
+        ).run()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Campaign {campaign.name}: {campaign.sent_count} sent, "
+                f"{campaign.failed_count} failed"
+            )
+        )
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.outbox import claim_queued_emails, deliver_queued_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver emails queued in the OutboundEmail outbox. Runs until interrupted; start as "
+        "many workers as needed, each claims its own batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20, help="emails claimed per batch")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="seconds to sleep when the outbox is empty",
+        )
+        parser.add_argument(
+            "--max-attempts", type=int, default=5, help="attempts before an email is marked failed"
+        )
+        parser.add_argument(
+            "--retry-delay",
+            type=int,
+            default=60,
+            help="seconds before the first retry, doubling after",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="exit once no emails are due instead of polling"
+        )
+
+    def handle(self, *args, **options):
+        sent = failed = 0
+        while True:
+            emails = claim_queued_emails(options["batch_size"])
+            if not emails:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+            for email in emails:
+                if deliver_queued_email(
+                    email,
+                    max_attempts=options["max_attempts"],
+                    retry_delay=options["retry_delay"],
+                ):
+                    sent += 1
+                else:
+                    failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s), {failed} failed attempt(s)"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.middleware.sampling import DEFAULT_VIEW, request_log_sampler
+
+
+class Command(BaseCommand):
+    help = (
+        "Set the request-log sample rate for a view at runtime. Running workers pick up the "
+        "change within REQUEST_LOGGING['SAMPLE_RATE_REFRESH_INTERVAL'] seconds, provided "
+        "CACHES['default'] is shared between them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "view_name", help=f'view_name to sample, e.g. "api:get-profile", or "{DEFAULT_VIEW}"'
+        )
+        parser.add_argument("rate", nargs="?", type=float, help="sample rate between 0 and 1")
+        parser.add_argument(
+            "--clear", action="store_true", help="remove the runtime override for view_name"
+        )
+
+    def handle(self, *args, **options):
+        rate = options["rate"]
+        if options["clear"]:
+            rate = None
+        elif rate is None or not 0 <= rate <= 1:
+            raise CommandError("rate must be between 0 and 1 (or pass --clear)")
+        overrides = request_log_sampler.set_rate(options["view_name"], rate)
+        self.stdout.write(self.style.SUCCESS(f"Request-log sample rate overrides: {overrides}"))
@@ -0,0 +1,34 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from api.outbound import request_deadline
+
+
+class OutboundDeadlineMiddleware:
+    """
+    Give each request OUTBOUND_REQUEST_DEADLINE seconds, counted from when
+    the request arrives, for all of its calls to third-party services. See
+    api.outbound.
+    """
+
+    # first in MIDDLEWARE, so under ASGI a sync-only version would put every
+    # request through a sync_to_async thread hop before anything else runs
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_deadline(settings.OUTBOUND_REQUEST_DEADLINE):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # the deadline is a contextvar, so it follows the request into
+        # sync_to_async threads further down the chain
+        with request_deadline(settings.OUTBOUND_REQUEST_DEADLINE):
+            return await self.get_response(request)
@@ -3,90 +3,233 @@ Middleware to log `*/api/*` requests and responses.
 CREDIT: https://zeroes.dev/p/django-middleware-to-log-requests/
 """
 
-import json
 import logging
 import socket
 import time
 
-from rest_framework.authtoken.models import Token
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import RawPostDataException
+
+from api.authentication.cache import ANONYMOUS_USERNAME, token_fingerprint, token_username_cache
+from api.middleware.sampling import request_log_sampler
+from api.parsers import get_json_body
 
 request_logger = logging.getLogger("api")
 
+REDACTED = "********"
+
+
+def redact(data):
+    """
+    Return `data` with the values of keys containing any of
+    REQUEST_LOGGING["REDACTED_FIELDS"] (case-insensitively) masked, at any
+    depth. `data` itself is never modified: it is returned as is when there is
+    nothing to mask, else a copy is.
+    """
+    if isinstance(data, dict):
+        fields = [field.lower() for field in settings.REQUEST_LOGGING["REDACTED_FIELDS"]]
+        redacted = {
+            key: (REDACTED if any(field in str(key).lower() for field in fields) else redact(value))
+            for key, value in data.items()
+        }
+    elif isinstance(data, list):
+        redacted = [redact(value) for value in data]
+    else:
+        return data
+    values = redacted.values() if isinstance(data, dict) else redacted
+    originals = data.values() if isinstance(data, dict) else data
+    if all(value is original for value, original in zip(values, originals)):
+        return data
+    return redacted
+
 
 class RequestLogMiddleware:
     """
     Request Logging Middleware.
 
-    Note: user is always "anonymous" at this level, because this middleware
-    runs before DRF's TokenAuthentication class, which doesn't run until
-    a view is processed. TokenAuthentication processes the Token in the Authorization
-    header. We could either accept this, and log the user as "anonymous" for all
-    requests here in the middleware, or we could parse the Authorization header
-    here in the middleware, pull the token if present, and log the user. That will cause
-    duplicate extraction of the token, once here and once in the TokenAuthentication class.
-    Alternatively, we could simply log the token in the header without querying the database.
+    Note: DRF's TokenAuthentication doesn't run until a view is processed, so the
+    user is resolved from the Authorization header only after the response comes
+    back. By then api.authentication.CachingTokenAuthentication has recorded the
+    token -> username mapping in the shared token cache, so logging the user costs
+    no extra query. Unauthenticated views (or tokens DRF never saw) fall back to a
+    single cached lookup. With REQUEST_LOGGING["TOKEN_FINGERPRINT"] enabled, a
+    fingerprint of the token is logged instead and the database is never touched.
 
     """
 
+    sync_capable = True
+    # Django's own middleware (MiddlewareMixin) hops to a thread for every
+    # process_request/process_response when run async, and our DRF views are
+    # sync, so a fully async chain is slower than a single hop at this layer
+    # until the views themselves are async (see benchmarks/asgi_request_log.py).
+    async_capable = settings.REQUEST_LOGGING["ASYNC"]
+
     def __init__(self, get_response):
         self.get_response = get_response
+        # Under ASGI the handler chain is async; mark ourselves as a coroutine
+        # function so Django calls __acall__ directly instead of wrapping every
+        # request in a sync_to_async thread hop.
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         start_time = time.monotonic()
-        log_data = {
-            "remote_address": request.META["REMOTE_ADDR"],
-            "server_hostname": socket.gethostname(),
-            "request_method": request.method,
-            "request_path": request.get_full_path(),
-        }
-
-        # log Token from Authorization header
-        if "HTTP_AUTHORIZATION" in request.META:
-            auth_header_val = request.META["HTTP_AUTHORIZATION"]
-            token = auth_header_val.replace("Token ", "")
-            try:
-                user = Token.objects.get(key=token).user
-                log_data["user"] = user.username
-            except Token.DoesNotExist:
-                log_data["user"] = "anonymous"
-        else:
-            log_data["user"] = "anonymous"
-
-        # add the JSON payload of request to log_data if present
-        if request.POST:
-            log_data["request_body"] = request.POST.dict()
-
-        # handle patch
-        elif request.method == "PATCH":
-            log_data["request_body"] = json.loads(request.body.decode("utf-8"))
-        # if query params
-        elif request.GET:
-            log_data["request_body"] = request.GET.dict()
 
         # request passes on to controller
         response = self.get_response(request)
 
+        log_data = self.get_log_data(request, response, start_time)
+        if log_data is not None:
+            # log user from Token in Authorization header
+            log_data["user"] = self.get_username(request)
+            request_logger.info(msg=log_data)
+        return response
+
+    async def __acall__(self, request):
+        start_time = time.monotonic()
+
+        # request passes on to controller
+        response = await self.get_response(request)
+
+        log_data = self.get_log_data(request, response, start_time)
+        if log_data is not None:
+            # log user from Token in Authorization header
+            log_data["user"] = await self.aget_username(request)
+            request_logger.info(msg=log_data)
+        return response
+
+    def get_log_data(self, request, response, start_time):
+        """
+        Build the log entry for a finished request, or return None when the
+        sampling policy drops it. Errors and slow requests are always logged,
+        but request/response bodies are only captured for sampled requests.
+        """
+        run_time = time.monotonic() - start_time
+
         # get the view name from request.resolver_match
         view_name = ""
         if request.resolver_match:
             view_name = request.resolver_match.view_name
-        log_data["view_name"] = view_name
 
+        sample_rate = request_log_sampler.get_rate(view_name)
+        sampled = request_log_sampler.is_sampled(sample_rate)
+        if not sampled and not request_log_sampler.must_log(response.status_code, run_time):
+            return None
+
+        log_data = {
+            "remote_address": request.META["REMOTE_ADDR"],
+            "server_hostname": socket.gethostname(),
+            "request_method": request.method,
+            "request_path": request.get_full_path(),
+            "view_name": view_name,
+            "status_code": response.status_code,
+            "sample_rate": sample_rate,
+        }
+
+        if sampled:
+            # add the payload of request to log_data if present
+            request_body = self.get_request_body(request)
+            if request_body is not None:
+                log_data["request_body"] = request_body
+
+            response_body = self.get_response_body(response, view_name)
+            if response_body is not None:
+                log_data["response_body"] = response_body
+
+        log_data["run_time"] = run_time
+        return log_data
+
+    def get_request_body(self, request):
+        """
+        Return what to log for the request body, or None to log nothing.
+
+        Runs after the view, so JSON bodies come from the parse DRF's
+        CachedJSONParser already did (or are parsed here, once, if the view never
+        read them), and form bodies from the QueryDict DRF/Django already built.
+        Passwords, tokens and secrets are masked (see redact()).
+        """
+        if request.method in ("POST", "PUT", "PATCH"):
+            if request.content_type == "application/json":
+                try:
+                    # a copy: the parse is shared with DRF's request.data
+                    return redact(get_json_body(request))
+                except (ValueError, RawPostDataException):
+                    return None
+            if request.POST:
+                return redact(request.POST.dict())
+        # if query params
+        if request.GET:
+            return redact(request.GET.dict())
+        return None
+
+    def get_response_body(self, response, view_name):
+        """
+        Return what to log for the response body, or None to log nothing.
+
+        DRF responses are logged from the pre-render `response.data`, so the
+        rendered JSON is never parsed again. Streaming, non-JSON and skip-listed
+        responses are not buffered at all, and bodies larger than the (per-view)
+        size cap are logged as a truncated prefix.
+        """
         # handle 204 no content
         if response.status_code == 204:
-            log_data["response_body"] = "No Content"
-
-        # add runtime to our log_data
-        elif (
-            response
-            and "content-type" in response
-            and response["content-type"] == "application/json"
-        ):
-            response_body = json.loads(response.content.decode("utf-8"))
-            log_data["response_body"] = response_body
-        log_data["run_time"] = time.time() - start_time
-        request_logger.info(msg=log_data)
-        return response
+            return "No Content"
+
+        config = settings.REQUEST_LOGGING
+        if response.streaming or view_name in config["SKIP_RESPONSE_BODY_VIEWS"]:
+            return None
+        if not response.get("Content-Type", "").startswith("application/json"):
+            return None
+
+        max_size = config["VIEW_MAX_RESPONSE_BODY_SIZE"].get(
+            view_name, config["MAX_RESPONSE_BODY_SIZE"]
+        )
+        content = response.content
+        if len(content) > max_size:
+            return {
+                "truncated": True,
+                "size": len(content),
+                "prefix": content[:max_size].decode("utf-8", errors="replace"),
+            }
+        if hasattr(response, "data"):
+            # e.g. the token returned by login
+            return redact(response.data)
+        return content.decode("utf-8")
+
+    def get_username(self, request):
+        """
+        Return the username (or token fingerprint) to log for the request.
+        """
+        token = self.get_token_key(request)
+        if token is None:
+            return ANONYMOUS_USERNAME
+        if settings.REQUEST_LOGGING["TOKEN_FINGERPRINT"]:
+            return token_fingerprint(token)
+        return token_username_cache.resolve(token)
+
+    async def aget_username(self, request):
+        """
+        Async variant of get_username; a cache miss uses the async ORM.
+        """
+        token = self.get_token_key(request)
+        if token is None:
+            return ANONYMOUS_USERNAME
+        if settings.REQUEST_LOGGING["TOKEN_FINGERPRINT"]:
+            return token_fingerprint(token)
+        return await token_username_cache.aresolve(token)
+
+    @staticmethod
+    def get_token_key(request):
+        """
+        Pull the token key out of an "Authorization: Token <key>" header.
+        """
+        auth = request.META.get("HTTP_AUTHORIZATION", "").split()
+        if len(auth) != 2 or auth[0].lower() != "token":
+            return None
+        return auth[1]
 
     # Log unhandled exceptions as well
     def process_exception(self, request, exception):
@@ -0,0 +1,85 @@
+"""
+Sampling policy for the request log written by RequestLogMiddleware.
+"""
+
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Django cache key holding runtime sample-rate overrides ({view_name: rate})
+SAMPLE_RATES_CACHE_KEY = "request-log:sample-rates"
+
+# override key applying to every view without a rate of its own
+DEFAULT_VIEW = "*"
+
+
+class RequestLogSampler:
+    """
+    Decides which requests are written to the request log.
+
+    The rate for a view is resolved from, in order: a runtime override for the
+    view, REQUEST_LOGGING["VIEW_SAMPLE_RATES"], a runtime "*" override and
+    finally REQUEST_LOGGING["SAMPLE_RATE"]. Runtime overrides live in the
+    Django cache (see `manage.py set_log_sample_rate`) and are re-read at most
+    every REQUEST_LOGGING["SAMPLE_RATE_REFRESH_INTERVAL"] seconds per process,
+    so they take effect without a redeploy.
+    """
+
+    def __init__(self):
+        self._overrides = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def get_overrides(self):
+        interval = settings.REQUEST_LOGGING["SAMPLE_RATE_REFRESH_INTERVAL"]
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= interval:
+            with self._lock:
+                if self._loaded_at is None or now - self._loaded_at >= interval:
+                    self._overrides = cache.get(SAMPLE_RATES_CACHE_KEY) or {}
+                    self._loaded_at = now
+        return self._overrides
+
+    def get_rate(self, view_name):
+        overrides = self.get_overrides()
+        config = settings.REQUEST_LOGGING
+        if view_name in overrides:
+            return overrides[view_name]
+        if view_name in config["VIEW_SAMPLE_RATES"]:
+            return config["VIEW_SAMPLE_RATES"][view_name]
+        return overrides.get(DEFAULT_VIEW, config["SAMPLE_RATE"])
+
+    def is_sampled(self, rate):
+        return rate >= 1 or random.random() < rate
+
+    def must_log(self, status_code, run_time):
+        """
+        Errors and slow requests are logged regardless of the sample rate.
+        """
+        config = settings.REQUEST_LOGGING
+        return (
+            status_code >= config["ALWAYS_LOG_STATUS"]
+            or run_time >= config["SLOW_REQUEST_THRESHOLD"]
+        )
+
+    def set_rate(self, view_name, rate):
+        overrides = dict(cache.get(SAMPLE_RATES_CACHE_KEY) or {})
+        if rate is None:
+            overrides.pop(view_name, None)
+        else:
+            overrides[view_name] = rate
+        cache.set(SAMPLE_RATES_CACHE_KEY, overrides, timeout=None)
+        self.reload()
+        return overrides
+
+    def reload(self):
+        """
+        Force the next get_rate() to re-read the runtime overrides.
+        """
+        self._loaded_at = None
+
+
+request_log_sampler = RequestLogSampler()
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_profile_bio"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboundEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("activate_account", "Activate account"),
+                            ("password_reset", "Password reset"),
+                            ("contact_us_received", "Contact us received"),
+                            ("payment_complete", "Payment complete"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("recipient", models.EmailField(max_length=254)),
+                ("kwargs", models.JSONField(default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PEN", "Pending"),
+                            ("SND", "Sending"),
+                            ("SNT", "Sent"),
+                            ("FAI", "Failed"),
+                        ],
+                        default="PEN",
+                        max_length=3,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("next_attempt_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("last_error", models.TextField(blank=True)),
+                ("provider_message_id", models.CharField(blank=True, max_length=100)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"], name="api_outboun_status_d67332_idx"
+                    )
+                ],
+            },
+        ),
+    ]
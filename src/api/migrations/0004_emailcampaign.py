@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_outboundemail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailCampaign",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("subject", models.CharField(max_length=200)),
+                ("content", models.TextField()),
+                (
+                    "plan_type",
+                    models.CharField(
+                        blank=True, choices=[("FRE", "Free"), ("PRE", "Premium")], max_length=3
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PEN", "Pending"), ("RUN", "Running"), ("DON", "Done")],
+                        default="PEN",
+                        max_length=3,
+                    ),
+                ),
+                ("last_user_id", models.PositiveBigIntegerField(default=0)),
+                ("sent_count", models.PositiveIntegerField(default=0)),
+                ("failed_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
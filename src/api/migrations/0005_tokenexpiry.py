@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:39
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def add_expiry_to_existing_tokens(apps, schema_editor):
+    # existing tokens get a full TTL from now rather than being expired at once
+    Token = apps.get_model("authtoken", "Token")
+    TokenExpiry = apps.get_model("api", "TokenExpiry")
+    expires_at = timezone.now() + timedelta(seconds=settings.TOKEN_EXPIRY["TTL"])
+    keys = Token.objects.values_list("key", flat=True).iterator(chunk_size=1000)
+    TokenExpiry.objects.bulk_create(
+        (TokenExpiry(token_id=key, expires_at=expires_at) for key in keys), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_emailcampaign"),
+        ("authtoken", "0004_alter_tokenproxy_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenExpiry",
+            fields=[
+                (
+                    "token",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="expiry",
+                        serialize=False,
+                        to="authtoken.token",
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(add_expiry_to_existing_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+INDEX_NAME = "auth_user_email_lower_uniq"
+
+
+def create_email_index(apps, schema_editor):
+    # auth.User belongs to another app, so the index is created with SQL. It
+    # skips blank emails (e.g. superusers), and its WHERE clause matches the
+    # one api.util.get_users_by_email() adds, so lookups can use the index.
+    User = apps.get_model("auth", "User")
+    duplicates = list(
+        User.objects.exclude(email="")
+        .values(email_lower=Lower("email"))
+        .alias(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"Resolve users sharing an email (ignoring case) first: {', '.join(duplicates)}"
+        )
+    # Postgres builds the index without locking auth_user against writes
+    concurrently = "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS {INDEX_NAME} "
+        "ON auth_user (LOWER(email)) WHERE NOT (email = '')"
+    )
+
+
+def drop_email_index(apps, schema_editor):
+    concurrently = "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("api", "0005_tokenexpiry"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
@@ -1,5 +1,10 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 from django.utils.translation import gettext_lazy as _
 
 class Profile(models.Model):
@@ -55,6 +60,10 @@ class Profile(models.Model):
         choices=PlanType.choices,
         default=PlanType.FREE,
     )
+    # last change to format_json()'s fields, for GetProfile's Last-Modified;
+    # save(update_fields=...) must list it to bump it, and api.signals bumps
+    # it when the user's name or email changes
+    updated_at = models.DateTimeField(auto_now=True)
 
     def format_json(self):
         return {
@@ -66,4 +75,91 @@ class Profile(models.Model):
             "card_last4": self.card_last4,
             "card_type": self.card_type,
             "plan_type": self.plan_type,
-        }
\ No newline at end of file
+        }
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email outbox.
+
+    Views queue emails here (see api.outbox.queue_email) instead of calling
+    the Gmail API inside the request, and `manage.py send_queued_emails`
+    delivers them with retries, so request latency does not depend on the
+    mail provider. `kwargs` holds the arguments for the api.util send_*
+    helper matching `kind`.
+    """
+
+    class Kind(models.TextChoices):
+        ACTIVATE_ACCOUNT = "activate_account", _("Activate account")
+        PASSWORD_RESET = "password_reset", _("Password reset")
+        CONTACT_US_RECEIVED = "contact_us_received", _("Contact us received")
+        PAYMENT_COMPLETE = "payment_complete", _("Payment complete")
+
+    class Status(models.TextChoices):
+        PENDING = "PEN", _("Pending")
+        SENDING = "SND", _("Sending")
+        SENT = "SNT", _("Sent")
+        FAILED = "FAI", _("Failed")
+
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    recipient = models.EmailField()
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=3, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # when the email may next be claimed; doubles as the lease on SENDING rows,
+    # so emails claimed by a worker that died are picked up again
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    provider_message_id = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+
+class EmailCampaign(models.Model):
+    """
+    A bulk email to every active user (optionally only those on `plan_type`),
+    sent by `manage.py send_email_campaign`.
+
+    `content` is a Jinja template placed inside master.html; it may use
+    {{ first_name }}. `last_user_id` is the resume cursor: every user with a
+    lower or equal id has been processed, so an interrupted campaign carries
+    on from there instead of starting over.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PEN", _("Pending")
+        RUNNING = "RUN", _("Running")
+        DONE = "DON", _("Done")
+
+    name = models.CharField(max_length=100, unique=True)
+    subject = models.CharField(max_length=200)
+    content = models.TextField()
+    plan_type = models.CharField(max_length=3, choices=Profile.PlanType.choices, blank=True)
+    status = models.CharField(max_length=3, choices=Status.choices, default=Status.PENDING)
+    last_user_id = models.PositiveBigIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+
+class TokenExpiry(models.Model):
+    """
+    Expiry of an API token (rest_framework.authtoken Token).
+
+    Created with the token (see api.signals), slid forward while the token
+    is in use (see CachingTokenAuthentication) and deleted together with the
+    token by `manage.py purge_expired_tokens`, which relies on the index on
+    expires_at.
+    """
+
+    token = models.OneToOneField(
+        Token, on_delete=models.CASCADE, primary_key=True, related_name="expiry"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    @staticmethod
+    def get_expires_at(now=None):
+        return (now or timezone.now()) + timedelta(seconds=settings.TOKEN_EXPIRY["TTL"])
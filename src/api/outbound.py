@@ -0,0 +1,187 @@
+"""
+Shared layer for calls to third-party services (reCAPTCHA, Slack, Gmail,
+Stripe), so that one degraded upstream cannot tie up every worker:
+
+- Every integration has its own timeout (settings.OUTBOUND_INTEGRATIONS).
+- Every integration has a circuit breaker. After FAILURE_THRESHOLD
+  consecutive failures it opens, and calls fail fast with CircuitOpenError
+  for RESET_TIMEOUT seconds. Then a single trial call is let through
+  (half-open): success closes the breaker, failure opens it again.
+- Requests get a deadline (see api.middleware.deadline). Calls made while
+  handling a request use the smaller of the integration timeout and the time
+  left, and fail with DeadlineExceeded once the budget is spent.
+
+Usage:
+
+    with get_breaker("recaptcha").guard() as timeout:
+        response = requests.post(url, timeout=timeout)
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
+
+_deadline = ContextVar("outbound_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+@contextmanager
+def request_deadline(seconds):
+    """
+    Give outbound calls made inside the block `seconds` in total. Nested
+    deadlines can only shrink the budget.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def get_remaining_time():
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, timeout=5.0, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.counters = dict.fromkeys(
+            ["calls", "successes", "failures", "rejected", "deadline_exceeded", "opened"], 0
+        )
+        self._lock = threading.Lock()
+
+    def get_timeout(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        remaining = get_remaining_time()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            with self._lock:
+                self.counters["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"No time left in the request deadline to call {self.name}")
+        return min(timeout, remaining)
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(f"{self.name} circuit breaker is open")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self.trial_in_flight:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(f"{self.name} circuit breaker is half open")
+                self.trial_in_flight = True
+            self.counters["calls"] += 1
+
+    def record_success(self):
+        with self._lock:
+            self.counters["successes"] += 1
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                logger.warning({"action": "CircuitBreaker", "name": self.name, "state": self.state})
+
+    def record_failure(self):
+        with self._lock:
+            self.counters["failures"] += 1
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.counters["opened"] += 1
+                # warning, not error: errors go to Slack, which has a breaker too
+                logger.warning({"action": "CircuitBreaker", "name": self.name, "state": self.state})
+
+    @contextmanager
+    def guard(self, timeout=None, ignore=()):
+        """
+        Guard one outbound call and yield the timeout it must use.
+
+        Exceptions raised in the block count as failures, except those in
+        `ignore` (client errors such as a declined card, which say nothing
+        about the upstream's health).
+        """
+        timeout = self.get_timeout(timeout)
+        self.before_call()
+        try:
+            yield timeout
+        except ignore:
+            self.record_success()
+            raise
+        except BaseException:
+            self.record_failure()
+            raise
+        self.record_success()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "timeout": self.timeout,
+                **self.counters,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """The process-wide breaker for an integration in settings.OUTBOUND_INTEGRATIONS."""
+    with _breakers_lock:
+        if name not in _breakers:
+            config = settings.OUTBOUND_INTEGRATIONS.get(name, {})
+            _breakers[name] = CircuitBreaker(
+                name,
+                timeout=config.get("TIMEOUT", 5.0),
+                failure_threshold=config.get("FAILURE_THRESHOLD", 5),
+                reset_timeout=config.get("RESET_TIMEOUT", 30.0),
+            )
+        return _breakers[name]
+
+
+def get_breaker_stats():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.get_stats() for breaker in breakers}
+
+
+def reset_breakers():
+    """Forget all breakers, e.g. after changing OUTBOUND_INTEGRATIONS in tests."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,132 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import OutboundEmail
+from api.util import (
+    is_test_recipient,
+    send_activate_account_email,
+    send_contact_us_received_acknowledgement_email,
+    send_password_reset_email,
+    send_payment_complete_confirmation_email,
+)
+
+logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
+
+EMAIL_SENDERS = {
+    OutboundEmail.Kind.ACTIVATE_ACCOUNT: send_activate_account_email,
+    OutboundEmail.Kind.PASSWORD_RESET: send_password_reset_email,
+    OutboundEmail.Kind.CONTACT_US_RECEIVED: send_contact_us_received_acknowledgement_email,
+    OutboundEmail.Kind.PAYMENT_COMPLETE: send_payment_complete_confirmation_email,
+}
+
+
+def queue_email(kind, recipient, **kwargs):
+    """
+    Queues an email for delivery by `manage.py send_queued_emails`.
+
+    The outbox row is written when the current transaction commits (right away
+    in autocommit mode), so rolled back work never sends an email.
+
+    Args:
+        kind (str): An OutboundEmail.Kind value.
+        recipient (str): The email address of the recipient.
+        **kwargs: JSON serializable arguments for the send_* helper of `kind`.
+    Returns:
+        bool: True if the email was queued, False for test recipients.
+    """
+    if is_test_recipient(recipient):
+        logger.info(
+            {
+                "action": "queue_email",
+                "kind": kind,
+                "recipient": recipient,
+                "message": "Not queueing email to test recipient",
+            }
+        )
+        return False
+
+    def create():
+        email = OutboundEmail.objects.create(kind=kind, recipient=recipient, kwargs=kwargs)
+        logger.info({"action": "queue_email", "id": email.id, "kind": kind, "recipient": recipient})
+
+    transaction.on_commit(create)
+    return True
+
+
+def claim_queued_emails(batch_size, lease=timedelta(minutes=10)):
+    """
+    Claims up to `batch_size` due emails for this worker.
+
+    Rows are locked with SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers
+    claim disjoint batches, then marked SENDING with `next_attempt_at` pushed out
+    by `lease`; if the worker dies mid-batch the emails become due again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[OutboundEmail.Status.PENDING, OutboundEmail.Status.SENDING],
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=[email.id for email in emails]).update(
+            status=OutboundEmail.Status.SENDING,
+            attempts=F("attempts") + 1,
+            next_attempt_at=now + lease,
+        )
+    for email in emails:
+        email.status = OutboundEmail.Status.SENDING
+        email.attempts += 1
+    return emails
+
+
+def deliver_queued_email(email, max_attempts=5, retry_delay=60):
+    """
+    Sends a claimed email and records the outcome.
+
+    Failed attempts are retried with exponential backoff starting at
+    `retry_delay` seconds; after `max_attempts` the email is marked FAILED.
+    Returns True if the email was sent.
+    """
+    try:
+        message = EMAIL_SENDERS[email.kind](recipient=email.recipient, **email.kwargs)
+        error = "" if message else "Email provider did not accept the message"
+    except Exception as e:
+        message, error = None, str(e)
+
+    now = timezone.now()
+    if message:
+        email.status = OutboundEmail.Status.SENT
+        email.sent_at = now
+        email.provider_message_id = message.get("id", "")
+        email.last_error = ""
+    elif email.attempts >= max_attempts:
+        email.status = OutboundEmail.Status.FAILED
+        email.last_error = error
+    else:
+        email.status = OutboundEmail.Status.PENDING
+        email.next_attempt_at = now + timedelta(seconds=retry_delay * 2 ** (email.attempts - 1))
+        email.last_error = error
+    email.save(
+        update_fields=["status", "sent_at", "provider_message_id", "last_error", "next_attempt_at"]
+    )
+
+    log = logger.info if message else logger.error
+    log(
+        {
+            "action": "deliver_queued_email",
+            "id": email.id,
+            "kind": email.kind,
+            "status": email.status,
+            "attempts": email.attempts,
+            "error": error,
+        }
+    )
+    return bool(message)
@@ -0,0 +1 @@
+from .body import *
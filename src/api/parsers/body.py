@@ -0,0 +1,68 @@
+"""
+Request-scoped cache of the parsed JSON request body.
+
+Both the request logging middleware and DRF's parser need the decoded JSON
+body. Whichever asks first decodes it and stores the result on the underlying
+Django HttpRequest, so each body is decoded exactly once per request.
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import json
+
+# attribute on the Django HttpRequest holding (data, error) once parsed
+PARSED_JSON_BODY_ATTR = "_parsed_json_body"
+
+
+def _decode_json(raw, encoding, strict=True):
+    try:
+        parse_constant = json.strict_constant if strict else None
+        return (json.loads(raw.decode(encoding), parse_constant=parse_constant), None)
+    except ValueError as e:
+        return (None, e)
+
+
+def get_json_body(request):
+    """
+    Return the decoded JSON body of a Django HttpRequest, decoding it on first
+    use and caching the result on the request.
+
+    Raises ValueError if the body is not valid JSON, and
+    django.http.RawPostDataException if the body stream was consumed by
+    something other than CachedJSONParser.
+    """
+    parsed = getattr(request, PARSED_JSON_BODY_ATTR, None)
+    if parsed is None:
+        parsed = _decode_json(request.body, request.encoding or settings.DEFAULT_CHARSET)
+        setattr(request, PARSED_JSON_BODY_ATTR, parsed)
+    data, error = parsed
+    if error is not None:
+        raise error
+    return data
+
+
+class CachedJSONParser(JSONParser):
+    """
+    JSONParser that shares its result with get_json_body(), so the request
+    logging middleware never parses a body DRF has already parsed (and vice
+    versa).
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        http_request = getattr(parser_context.get("request"), "_request", None)
+        if http_request is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parsed = getattr(http_request, PARSED_JSON_BODY_ATTR, None)
+        if parsed is None:
+            encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+            raw = stream.read() if stream is not None else b""
+            parsed = _decode_json(raw, encoding, strict=self.strict)
+            setattr(http_request, PARSED_JSON_BODY_ATTR, parsed)
+
+        data, error = parsed
+        if error is not None:
+            raise ParseError("JSON parse error - %s" % str(error))
+        return data
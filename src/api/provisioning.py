@@ -0,0 +1,397 @@
+"""
+Bulk user provisioning from CSV or NDJSON, for onboarding a whole
+organization at once (see the import_users command and the ImportUsers view).
+
+Creating users one at a time with api.util.create_user costs a password hash
+and two INSERTs each. UserImporter instead:
+
+- streams the file, holding only one chunk of rows in memory;
+- validates rows, reporting invalid ones (and emails already taken) per line
+  instead of stopping;
+- hashes a chunk's passwords in parallel: on a process pool when given one,
+  else on threads going through api.hashers.hashing_executor, waiting
+  whenever it is busy so logins keep priority;
+- inserts the chunk's users and profiles with COPY on Postgres and
+  bulk_create elsewhere, one transaction per chunk. If a chunk hits a unique
+  constraint (e.g. a user signed up meanwhile), it is retried row by row to
+  find the offending rows.
+
+Rows have the columns (CSV) or keys (NDJSON) email, first_name, last_name,
+password, is_active, bio, preferred_name and plan_type; only email is
+required. The email is also the username. Rows without a password get an
+unusable one, and their users set one through the password reset flow.
+"""
+
+import codecs
+import csv
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from api.hashers import HashingBusy, hashing_executor
+from api.models import Profile
+
+FIELDS = (
+    "email",
+    "first_name",
+    "last_name",
+    "password",
+    "is_active",
+    "bio",
+    "preferred_name",
+    "plan_type",
+)
+FORMATS = ("csv", "ndjson")
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+# plan_type may be given as the stored value ("PRE") or the name ("premium")
+PLAN_TYPES = {
+    **{value.lower(): value for value in Profile.PlanType.values},
+    **{name.lower(): value for name, value in Profile.PlanType.__members__.items()},
+}
+
+Row = namedtuple("Row", ["line", "data", "error"])
+ImportResult = namedtuple("ImportResult", ["processed", "created", "failed"])
+
+
+def get_format(filename):
+    """
+    Guess the import format from a file name, or None.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    return None
+
+
+def read_rows(stream, format):
+    """
+    Yield a Row per record of a text stream. Records that cannot be parsed
+    are yielded with an error, so the import can carry on. Reading stops at
+    text that cannot be decoded, with an error for the line it is on.
+    """
+    rows = read_csv_rows(stream) if format == "csv" else read_ndjson_rows(stream)
+    line = 0
+    try:
+        for row in rows:
+            line = row.line
+            yield row
+    except UnicodeDecodeError as e:
+        yield Row(line + 1, None, f"The file is not valid UTF-8 ({e.reason}), import stopped")
+
+
+def read_csv_rows(stream):
+    reader = csv.DictReader(stream)
+    for data in reader:
+        yield Row(reader.line_num, data, None)
+
+
+def read_ndjson_rows(stream):
+    for line, text in enumerate(stream, 1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            yield Row(line, None, f"Invalid JSON: {e}")
+            continue
+        if isinstance(data, dict):
+            yield Row(line, data, None)
+        else:
+            yield Row(line, None, "Expected a JSON object")
+
+
+def is_utf8(file):
+    """
+    Check that an uploaded file decodes as UTF-8, reading it in chunks, and
+    rewind it.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in file.chunks():
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        file.seek(0)
+    return True
+
+
+def clean_row(data):
+    """
+    Return the row's fields normalized for a User and Profile, or raise
+    ValueError describing what is wrong with it.
+    """
+    values = {field: data.get(field) for field in FIELDS}
+    for field, value in values.items():
+        if value is not None and field != "is_active":
+            values[field] = str(value).strip()
+
+    email = User.objects.normalize_email(values["email"] or "")
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError("Invalid email")
+    if len(email) > User._meta.get_field("username").max_length:
+        raise ValueError("Email is too long")
+    values["email"] = email
+
+    for field, model in (
+        ("first_name", User),
+        ("last_name", User),
+        ("preferred_name", Profile),
+    ):
+        values[field] = values[field] or ""
+        if len(values[field]) > model._meta.get_field(field).max_length:
+            raise ValueError(f"{field} is too long")
+    values["bio"] = values["bio"] or ""
+
+    plan_type = values["plan_type"] or Profile.PlanType.FREE
+    if plan_type.lower() not in PLAN_TYPES:
+        raise ValueError(f"Invalid plan_type {plan_type!r}")
+    values["plan_type"] = PLAN_TYPES[plan_type.lower()]
+
+    is_active = values["is_active"]
+    values["is_active"] = (
+        is_active if isinstance(is_active, bool) else str(is_active or "").lower() in TRUE_VALUES
+    )
+    values["password"] = values["password"] or None
+    return values
+
+
+def init_hashing_process():
+    django.setup()
+    hashing_executor.mark_worker()
+
+
+def hash_password(password):
+    # None gives an unusable password, without hashing
+    while True:
+        try:
+            return make_password(password)
+        except HashingBusy as e:
+            time.sleep(e.retry_after)
+
+
+def hash_passwords(passwords):
+    return [hash_password(password) for password in passwords]
+
+
+class UserImporter:
+    """
+    Args:
+        chunk_size (int): rows validated, hashed and inserted together.
+        processes (int): hash passwords on a pool of this many processes.
+            Without it, hashing goes through api.hashers.hashing_executor.
+        on_error (callable): called with (line, email, error) for each row
+            that was not imported.
+    """
+
+    def __init__(self, chunk_size=1000, processes=None, on_error=None):
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.on_error = on_error
+        self.processed = self.created = self.failed = 0
+
+    def get_result(self):
+        return ImportResult(self.processed, self.created, self.failed)
+
+    def run(self, rows):
+        """
+        Import an iterable of Rows (see read_rows) and return an ImportResult.
+        """
+        for _ in self.iter_run(rows):
+            pass
+        return self.get_result()
+
+    def iter_run(self, rows):
+        """
+        Like run(), yielding the ImportResult so far after each chunk.
+        """
+        if self.processes:
+            workers = self.processes
+            pool = ProcessPoolExecutor(workers, initializer=init_hashing_process)
+        else:
+            workers = hashing_executor.max_workers
+            pool = ThreadPoolExecutor(workers, thread_name_prefix="provisioning")
+        with pool:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) == self.chunk_size:
+                    self.import_chunk(chunk, pool, workers)
+                    yield self.get_result()
+                    chunk = []
+            if chunk:
+                self.import_chunk(chunk, pool, workers)
+                yield self.get_result()
+
+    def reject(self, line, email, error):
+        self.failed += 1
+        if self.on_error is not None:
+            self.on_error(line, email, error)
+
+    def import_chunk(self, rows, pool, workers):
+        self.processed += len(rows)
+        valid = {}
+        for row in rows:
+            if row.error is not None:
+                self.reject(row.line, None, row.error)
+                continue
+            try:
+                values = clean_row(row.data)
+            except ValueError as e:
+                self.reject(row.line, row.data.get("email"), str(e))
+                continue
+            email_lower = values["email"].lower()
+            if email_lower in valid:
+                self.reject(row.line, values["email"], "Duplicate email in this file")
+                continue
+            valid[email_lower] = (row.line, values)
+
+        # a single lookup on the unique LOWER(email) index for the whole chunk
+        taken = set(
+            User.objects.exclude(email="")
+            .annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=list(valid))
+            .values_list("email_lower", flat=True)
+        )
+        for email_lower in taken:
+            line, values = valid.pop(email_lower)
+            self.reject(line, values["email"], "A user with this email already exists")
+
+        entries = list(valid.values())
+        passwords = hash_chunk([values["password"] for _, values in entries], pool, workers)
+        now = timezone.now()
+        users, profiles = [], []
+        for (_, values), password in zip(entries, passwords):
+            users.append(
+                User(
+                    username=values["email"],
+                    email=values["email"],
+                    first_name=values["first_name"],
+                    last_name=values["last_name"],
+                    password=password,
+                    is_active=values["is_active"],
+                    date_joined=now,
+                )
+            )
+            profiles.append(
+                Profile(
+                    bio=values["bio"],
+                    preferred_name=values["preferred_name"],
+                    plan_type=values["plan_type"],
+                )
+            )
+        if users:
+            self.insert(entries, users, profiles)
+
+    def insert(self, entries, users, profiles):
+        try:
+            with transaction.atomic():
+                if connection.vendor == "postgresql":
+                    copy_users(users, profiles)
+                else:
+                    bulk_create_users(users, profiles)
+            self.created += len(users)
+            return
+        except IntegrityError:
+            pass
+        # retry row by row to single out the rows that conflict
+        for (line, values), user, profile in zip(entries, users, profiles):
+            user.pk = profile.pk = None
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                    profile.user = user
+                    profile.save(force_insert=True)
+            except IntegrityError:
+                self.reject(line, values["email"], "A user with this email already exists")
+            else:
+                self.created += 1
+
+
+def hash_chunk(passwords, pool, workers):
+    # one task per worker, so a process pool costs a single round of IPC per chunk
+    size = -(-len(passwords) // workers) or 1
+    batches = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+    return [password for batch in pool.map(hash_passwords, batches) for password in batch]
+
+
+def bulk_create_users(users, profiles):
+    User.objects.bulk_create(users)
+    if users[0].pk is None:
+        # backends that can't return ids from a bulk insert
+        ids = dict(
+            User.objects.filter(username__in=[user.username for user in users]).values_list(
+                "username", "id"
+            )
+        )
+        for user in users:
+            user.pk = ids[user.username]
+    for user, profile in zip(users, profiles):
+        profile.user = user
+    Profile.objects.bulk_create(profiles)
+
+
+def copy_users(users, profiles):
+    """
+    Insert users and their profiles with COPY. User ids are reserved from the
+    sequence first, as COPY cannot return them.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [User._meta.db_table, len(users)],
+        )
+        for user, (user_id,) in zip(users, cursor.fetchall()):
+            user.pk = user_id
+        for user, profile in zip(users, profiles):
+            profile.user = user
+        copy_objects(cursor, User, users)
+        copy_objects(cursor, Profile, profiles)
+
+
+def bulk_insert(model, objs):
+    """
+    bulk_create `objs`, or COPY them on Postgres, which leaves primary keys
+    the database generates unset on the objects.
+    """
+    if connection.vendor != "postgresql":
+        model.objects.bulk_create(objs)
+        return
+    with connection.cursor() as cursor:
+        copy_objects(cursor, model, objs)
+
+
+def copy_objects(cursor, model, objs):
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if not (field.primary_key and getattr(objs[0], field.attname) is None)
+    ]
+    quote_name = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN".format(
+        quote_name(model._meta.db_table), ", ".join(quote_name(field.column) for field in fields)
+    )
+    # psycopg 3
+    with cursor.copy(sql) as copy:
+        for obj in objs:
+            copy.write_row(
+                [
+                    field.get_db_prep_save(field.pre_save(obj, add=True), connection)
+                    for field in fields
+                ]
+            )
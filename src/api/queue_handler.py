@@ -0,0 +1,152 @@
+"""
+Non-blocking log shipping.
+
+QueueListenerHandler puts records on a bounded in-memory queue and returns
+immediately. A QueueListener thread drains the queue into the real handlers
+(CloudWatch/stream, Slack), so a slow endpoint never adds to request latency.
+"""
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import weakref
+
+OVERFLOW_DROP = "drop"
+OVERFLOW_BLOCK = "block"
+
+# every live QueueListenerHandler, for get_queue_handler_stats()
+_queue_handlers = weakref.WeakSet()
+
+
+def _get_handler_by_name(name):
+    if hasattr(logging, "getHandlerByName"):  # python 3.12+
+        return logging.getHandlerByName(name)
+    return logging._handlers.get(name)
+
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # block rather than raise queue.Full, so stop() always drains the queue
+        self.queue.put(self._sentinel)
+
+
+class QueueListenerHandler(logging.Handler):
+    """
+    Logging handler that hands records to other, named handlers from a
+    background thread.
+
+    Configured from settings.LOGGING, e.g.:
+
+        "api-queue": {
+            "class": "api.queue_handler.QueueListenerHandler",
+            "targets": ["info-handler", "slack"],
+            "queue_size": 10000,
+            "overflow": "drop",
+        }
+
+    When the queue is full a record is either dropped immediately
+    (overflow="drop") or the caller blocks for up to `block_timeout` seconds
+    before dropping it (overflow="block"). Dropped records are counted in
+    `dropped`. The queue is flushed into the targets when the handler is closed,
+    including at interpreter (worker) shutdown.
+    """
+
+    def __init__(self, targets, queue_size=10000, overflow=OVERFLOW_DROP, block_timeout=0.05):
+        super().__init__()
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError(f"overflow must be '{OVERFLOW_DROP}' or '{OVERFLOW_BLOCK}'")
+        self.targets = targets
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._listener = None
+        self._start_lock = threading.Lock()
+        _queue_handlers.add(self)
+
+    def start(self):
+        """
+        Start the listener thread. Target handlers are resolved by name here,
+        not in __init__, because dictConfig may not have created them yet.
+        """
+        with self._start_lock:
+            if self._listener is not None:
+                return
+            handlers = []
+            for name in self.targets:
+                handler = _get_handler_by_name(name)
+                if handler is None:
+                    raise ValueError(f"QueueListenerHandler: no handler named '{name}'")
+                handlers.append(handler)
+            self._listener = _FlushingQueueListener(
+                self.queue, *handlers, respect_handler_level=True
+            )
+            self._listener.start()
+            # atexit runs handlers last-registered-first, so this flushes the queue
+            # before logging.shutdown() closes the target handlers
+            atexit.register(self.close)
+
+    def prepare(self, record):
+        """
+        Unlike QueueHandler.prepare, keep structured (dict) messages intact so
+        the targets can still format them; records never leave this process.
+        %-style args are merged and exception info is rendered to text, so the
+        record doesn't keep the request's traceback alive in the queue.
+        """
+        record = copy.copy(record)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = (self.formatter or logging.Formatter()).formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._listener is None:
+            self.start()
+        try:
+            record = self.prepare(record)
+            if self.overflow == OVERFLOW_BLOCK:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._start_lock:
+                self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def get_stats(self):
+        return {
+            "targets": self.targets,
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "dropped": self.dropped,
+        }
+
+    def close(self):
+        with self._start_lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            atexit.unregister(self.close)
+            listener.stop()
+            if self.dropped:
+                sys.stderr.write(
+                    f"QueueListenerHandler{self.targets}: dropped {self.dropped} log records\n"
+                )
+        super().close()
+
+
+def get_queue_handler_stats():
+    """
+    Return queue depth and dropped-record counters for every live
+    QueueListenerHandler, keyed by handler name.
+    """
+    return {handler.get_name(): handler.get_stats() for handler in list(_queue_handlers)}
@@ -1,13 +1,15 @@
 from api.serializers.base import BaseSerializer
 from rest_framework import serializers
-from django.contrib.auth.models import User
+from api.util import get_users_by_email
 
 class SendPasswordResetEmailRequestSerializer(BaseSerializer):
     email = serializers.EmailField()
     host = serializers.CharField()
 
     def validate_email(self, email):
-        if not User.objects.filter(username=email).exists():
+        # kept for the view, so the user is looked up once
+        self.user = get_users_by_email(email).first()
+        if self.user is None:
             raise serializers.ValidationError("A user with this email does not exist.")
         return email
 
@@ -20,11 +22,6 @@ class VerifyPasswordResetTokenRequestSerializer(BaseSerializer):
     user_id = serializers.IntegerField()
     token = serializers.CharField()
 
-    def validate_user_id(self, user_id):
-        if not User.objects.filter(id=user_id).exists():
-            raise serializers.ValidationError(f"User with this id does not exist.")
-        return user_id
-
 
 class SetNewPasswordAnonymousRequestSerializer(BaseSerializer):
     user_id = serializers.IntegerField()
@@ -37,11 +34,6 @@ class SetNewPasswordAnonymousRequestSerializer(BaseSerializer):
             raise serializers.ValidationError("New password does not match confirmation password.")
         return data
 
-    def validate_user_id(self, user_id):
-        if not User.objects.filter(id=user_id).exists():
-            raise serializers.ValidationError(f"User with this id does not exist.")
-        return user_id
-
 class SetNewPasswordAuthenticatedRequestSerializer(BaseSerializer):
     current_password = serializers.CharField()
     new_password = serializers.CharField()
@@ -0,0 +1,75 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.authentication.cache import token_username_cache
+from api.authentication.filter import token_filter
+from api.authentication.snapshot import token_auth_cache
+from api.models import Profile, TokenExpiry
+
+
+@receiver(post_save, sender=Token)
+def create_token_expiry(sender, instance, created, raw=False, **kwargs):
+    """Every new API token starts with a full TOKEN_EXPIRY["TTL"]."""
+    if created and not raw:
+        TokenExpiry.objects.create(token=instance, expires_at=TokenExpiry.get_expires_at())
+
+
+@receiver(post_save, sender=Token)
+def add_token_to_filter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        token_filter.add(instance.key)
+
+
+@receiver(post_delete, sender=Token)
+def remove_token_from_filter(sender, instance, **kwargs):
+    token_filter.remove(instance.key)
+    token_auth_cache.invalidate(instance.key)
+    token_username_cache.invalidate(instance.key)
+
+
+# Cached auth snapshots (api.authentication.snapshot) hold the user and profile
+# fields, so any change to them, e.g. through the admin, must drop the snapshot
+# or a deactivated user or revoked staff member keeps authenticating.
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_snapshot(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # a new user has no token yet, and last_login (updated on every login)
+    # doesn't affect authentication
+    if created or raw or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    token_auth_cache.invalidate_user(instance)
+
+
+# fields of the user in Profile.format_json()
+PROFILE_USER_FIELDS = {"first_name", "last_name", "email"}
+
+
+@receiver(post_save, sender=User)
+def touch_profile(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Keep Profile.updated_at (GetProfile's Last-Modified) in step with the user."""
+    if created or raw or (update_fields and not PROFILE_USER_FIELDS & set(update_fields)):
+        return
+    Profile.objects.filter(user_id=instance.pk).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_snapshot(sender, instance, **kwargs):
+    token_auth_cache.invalidate_user(instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_snapshot(sender, instance, created=False, raw=False, **kwargs):
+    # profiles are created with their user (see api.util.create_user)
+    if created or raw:
+        return
+    try:
+        token_auth_cache.invalidate_user(instance.user)
+    except ObjectDoesNotExist:
+        # the user is being deleted too
+        pass
@@ -1,21 +1,326 @@
-import logging
-import requests
+import hashlib
 import json
+import logging
 import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from api.outbound import CircuitOpenError, get_breaker
+
+# Slack rejects message text longer than this
+MAX_MESSAGE_LENGTH = 39000
+
+_STOP = object()
+
+# volatile parts of error messages, replaced before fingerprinting
+_NORMALIZE_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (
+        re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I),
+        "<uuid>",
+    ),
+    (re.compile(r"\b(?:0x)?[0-9a-f]{8,}\b", re.I), "<hex>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+]
+
+
+def normalize_error_message(message):
+    for pattern, placeholder in _NORMALIZE_PATTERNS:
+        message = pattern.sub(placeholder, message)
+    return message.strip()[:200]
+
+
+def fingerprint_record(record):
+    """
+    Fingerprint a record by action, error class and normalized message, so
+    that the same failure repeated across requests maps to one alert.
+    """
+    if isinstance(record.msg, dict):
+        action = str(record.msg.get("action", ""))
+        message = str(record.msg.get("error", record.msg.get("message", "")))
+    else:
+        action = f"{record.name}:{record.funcName}"
+        message = record.getMessage()
+
+    error_class = ""
+    if record.exc_info and record.exc_info[0]:
+        error_class = record.exc_info[0].__name__
+    elif record.exc_text:
+        # last traceback line reads "ErrorClass: message"
+        error_class = record.exc_text.rstrip().rsplit("\n", 1)[-1].split(":", 1)[0]
+
+    key = "|".join([action, error_class, normalize_error_message(message)])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+class AlertSuppressor:
+    """
+    Coalesces repeated alerts with the same fingerprint.
+
+    The first alert for a fingerprint is passed through and opens a `window`
+    second suppression window; repeats inside the window are only counted,
+    and a single "repeated N times" summary is released when it closes. In
+    digest mode (`digest_interval` set) nothing is passed through directly:
+    every `digest_interval` seconds one digest lists each fingerprint with its
+    count. State is an LRU bounded to `max_fingerprints` entries.
+
+    Not thread-safe: only SlackErrorHandler's worker thread uses it.
+    """
+
+    def __init__(self, window=60.0, digest_interval=None, max_fingerprints=1000):
+        self.window = window
+        self.digest_interval = digest_interval
+        self.max_fingerprints = max_fingerprints
+        # fingerprint -> [window_start, suppressed_count, sample_message]
+        self.entries = OrderedDict()
+        self.digest_started_at = None
+
+    def add(self, fingerprint, message, now):
+        """
+        Record an alert; return the messages to send right away.
+        """
+        out = []
+        entry = self.entries.get(fingerprint)
+        if self.digest_interval:
+            if self.digest_started_at is None:
+                self.digest_started_at = now
+            if entry is None:
+                entry = self.entries[fingerprint] = [now, 0, message]
+            entry[1] += 1
+        elif entry is None or now - entry[0] >= self.window:
+            if entry is not None:
+                out.extend(self.summarize(fingerprint, entry))
+            self.entries[fingerprint] = [now, 0, message]
+            out.append(message)
+        else:
+            entry[1] += 1
+            entry[2] = message
+        self.entries.move_to_end(fingerprint)
+        while len(self.entries) > self.max_fingerprints:
+            evicted, evicted_entry = self.entries.popitem(last=False)
+            out.extend(self.summarize(evicted, evicted_entry))
+        return out
+
+    def flush(self, now, force=False):
+        """
+        Return summaries for closed windows (or the digest, when due).
+        """
+        if self.digest_interval:
+            if not self.entries or (
+                not force and now - self.digest_started_at < self.digest_interval
+            ):
+                return []
+            out = [self.digest(now)]
+            self.entries.clear()
+            self.digest_started_at = None
+            return out
+
+        out = []
+        for fingerprint, entry in list(self.entries.items()):
+            if force or now - entry[0] >= self.window:
+                out.extend(self.summarize(fingerprint, entry))
+                del self.entries[fingerprint]
+        return out
+
+    def next_flush_at(self):
+        if self.digest_interval:
+            if self.digest_started_at is None:
+                return None
+            return self.digest_started_at + self.digest_interval
+        if not self.entries:
+            return None
+        return min(entry[0] for entry in self.entries.values()) + self.window
+
+    def summarize(self, fingerprint, entry):
+        window_start, suppressed, sample = entry
+        if not suppressed:
+            return []
+        return [
+            f"*Repeated {suppressed} more time(s) within {int(self.window)}s* "
+            f"(fingerprint `{fingerprint}`); latest:\n{sample}"
+        ]
+
+    def digest(self, now):
+        total = sum(entry[1] for entry in self.entries.values())
+        lines = [
+            f"*Error digest: {total} record(s), {len(self.entries)} distinct error(s) "
+            f"in the last {int(now - self.digest_started_at)}s*"
+        ]
+        for fingerprint, (_, count, sample) in sorted(
+            self.entries.items(), key=lambda item: -item[1][1]
+        ):
+            lines.append(f"{count}x `{fingerprint}`\n{sample}")
+        return "\n".join(lines)
 
 
 class SlackErrorHandler(logging.Handler):
-    def __init__(self, webhook_url):
+    """
+    Posts log records to a Slack incoming webhook (production only).
+
+    emit() only formats the record and puts it on a bounded queue. A
+    background worker collects the records that arrive within `batch_window`
+    seconds (up to `max_batch_size`) into a single webhook post, sent over a
+    persistent requests.Session with a timeout. When Slack rate limits
+    (HTTP 429) the worker waits for Retry-After; other failures are retried
+    with exponential backoff, then dropped. While the "slack" circuit
+    breaker (see api.outbound) is open, batches are dropped without trying.
+    An error storm therefore costs one post per window instead of stalling
+    every worker thread.
+
+    Records are fingerprinted (see fingerprint_record) and passed through an
+    AlertSuppressor, so the same failure repeated within `suppress_window`
+    seconds produces one alert plus one "repeated N times" summary. Set
+    `digest_interval` to replace immediate alerts with a periodic digest.
+    """
+
+    def __init__(
+        self,
+        webhook_url,
+        batch_window=2.0,
+        max_batch_size=20,
+        timeout=5.0,
+        max_retries=3,
+        queue_size=1000,
+        suppress_window=60.0,
+        digest_interval=None,
+        max_fingerprints=1000,
+    ):
         super().__init__()
         self.webhook_url = webhook_url
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.suppressor = AlertSuppressor(
+            window=suppress_window,
+            digest_interval=digest_interval,
+            max_fingerprints=max_fingerprints,
+        )
+        self._worker = None
+        self._lock = threading.Lock()
 
     def emit(self, record):
-        if os.getenv("DJANGO_ENV") == "production":
+        if os.getenv("DJANGO_ENV") != "production" or not self.webhook_url:
+            return
+        try:
+            self.start()
+            self.queue.put_nowait((fingerprint_record(record), self.format_message(record)))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def format_message(self, record):
+        if isinstance(record.msg, dict):
+            log_entry = json.dumps(record.msg, indent=4, default=str)
+            if record.exc_info and not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+            if record.exc_text:
+                log_entry = f"{log_entry}\n{record.exc_text}"
+        else:
             log_entry = self.format(record)
+        return f"```\n{log_entry}\n```"
+
+    def formatException(self, exc_info):
+        return (self.formatter or logging.Formatter()).formatException(exc_info)
+
+    def start(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="SlackErrorHandler", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        session = requests.Session()
+        batch = []
+        batch_deadline = None
+        while True:
+            now = time.monotonic()
+            wake_at = [t for t in (batch_deadline, self.suppressor.next_flush_at()) if t]
+            timeout = max(min(wake_at) - now, 0) if wake_at else None
             try:
-                log_entry = log_entry.replace("'", '"')
-                log_entry = f"```\n{json.dumps(json.loads(log_entry), indent=4)}\n```"
-            except Exception as e:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            now = time.monotonic()
+
+            if item is _STOP:
+                batch.extend(self.suppressor.flush(now, force=True))
+                if batch:
+                    self.send(session, batch)
+                break
+            if item is not None:
+                fingerprint, message = item
+                batch.extend(self.suppressor.add(fingerprint, message, now))
+            batch.extend(self.suppressor.flush(now))
+
+            if batch and batch_deadline is None:
+                batch_deadline = now + self.batch_window
+            if batch and (now >= batch_deadline or len(batch) >= self.max_batch_size):
+                self.send(session, batch)
+                batch = []
+                batch_deadline = None
+        session.close()
+
+    def send(self, session, batch):
+        """
+        Post a batch of formatted messages as one webhook call, honouring
+        Slack's rate limits.
+        """
+        text = "\n".join(batch)[:MAX_MESSAGE_LENGTH]
+        breaker = get_breaker("slack")
+        backoff = 1
+        for attempt in range(self.max_retries + 1):
+            try:
+                with breaker.guard(timeout=self.timeout) as timeout:
+                    response = session.post(self.webhook_url, json={"text": text}, timeout=timeout)
+                    if response.status_code >= 500:
+                        raise requests.HTTPError(
+                            f"Slack returned {response.status_code}", response=response
+                        )
+                if response.status_code == 429:
+                    time.sleep(float(response.headers.get("Retry-After", backoff)))
+                    continue
+                return True
+            except CircuitOpenError:
+                # Slack is down; don't spend retries (and the worker's time) on it
+                break
+            except requests.RequestException:
                 pass
-            payload = {"text": log_entry}
-            requests.post(self.webhook_url, data=json.dumps(payload, indent=4))
+            if attempt < self.max_retries:
+                time.sleep(backoff)
+                backoff *= 2
+        # can't log this through logging without risking a feedback loop
+        sys.stderr.write(f"SlackErrorHandler: dropped a batch of {len(batch)} records\n")
+        return False
+
+    def close(self):
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            # flush what's queued, but don't hang shutdown on a dead webhook: a
+            # full queue (an error storm, or Slack rate limiting) drops its
+            # oldest records to make room for the stop signal
+            while True:
+                try:
+                    self.queue.put_nowait(_STOP)
+                    break
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+            worker.join(timeout=self.batch_window + self.timeout * (self.max_retries + 1))
+        super().close()
@@ -7,6 +7,7 @@
 ########### USER CREATION ##########
 ####################################
 from api.util import create_user
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 
 # Define constants that can be used for expected values in tests
@@ -20,6 +21,11 @@ TEST_USER_BIO = "Test bio content for the test user profile"
 
 class BaseTestCase(APITestCase):
 
+    def setUp(self):
+        super().setUp()
+        # login throttle counters and other cached state must not leak between tests
+        cache.clear()
+
     def create_basic_test_user(self):
         """
         Create a basic test user with default values
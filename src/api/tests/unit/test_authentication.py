@@ -0,0 +1,247 @@
+# Path: project/api/tests/unit/test_authentication.py
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.authentication import CountingBloomFilter, token_auth_cache, token_filter
+from api.models import Profile, TokenExpiry
+from api.tests.base import BaseTestCase, TEST_USER_PASSWORD, TEST_USER_USERNAME
+from api.util import create_user
+
+
+class TestCachingTokenAuthentication(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        token_auth_cache.clear()
+        self.user = self.create_basic_test_user()
+        self.user.is_active = True
+        self.user.save()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_profile(self):
+        response = self.client.get(reverse("api:get-profile"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_warm_get_profile_has_no_queries(self):
+        self.get_profile()
+        with self.assertNumQueries(0):
+            data = self.get_profile()
+        self.assertEqual(data["email"], self.user.email)
+        self.assertEqual(data["bio"], self.user.profile.bio)
+
+    def test_warm_not_modified_has_no_queries(self):
+        etag = self.client.get(reverse("api:get-profile"))["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("api:get-profile"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_shared_cache_used_by_other_workers(self):
+        self.get_profile()
+        token_auth_cache.clear()  # as seen from a worker with a cold local cache
+        with self.assertNumQueries(0):
+            self.get_profile()
+
+    def test_edit_profile_invalidates(self):
+        self.get_profile()
+        response = self.client.patch(
+            reverse("api:edit-profile"), {"bio": "Updated bio"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_profile()["bio"], "Updated bio")
+
+    def test_password_change_invalidates(self):
+        self.get_profile()
+        response = self.client.patch(
+            reverse("api:set-new-password-authenticated"),
+            {
+                "current_password": TEST_USER_PASSWORD,
+                "new_password": "n3w-Passw0rd!",
+                "confirm_new_password": "n3w-Passw0rd!",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(token_auth_cache.get_cache_key(self.token.key)))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("n3w-Passw0rd!"))
+
+    def test_logout_invalidates(self):
+        self.get_profile()
+        response = self.client.post(reverse("api:logout"))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(reverse("api:get-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_orm_deactivation_invalidates(self):
+        self.get_profile()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse("api:get-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_orm_token_deletion_invalidates(self):
+        self.get_profile()
+        Token.objects.filter(key=self.token.key).delete()
+        response = self.client.get(reverse("api:get-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_orm_user_deletion_invalidates(self):
+        self.get_profile()
+        User.objects.filter(pk=self.user.pk).delete()
+        response = self.client.get(reverse("api:get-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_revocation_invalidates(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse("api:auth-metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_staff = False
+        user.save()
+        response = self.client.get(reverse("api:auth-metrics"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_orm_profile_change_invalidates(self):
+        self.get_profile()
+        profile = Profile.objects.get(user=self.user)
+        profile.bio = "Changed in the admin"
+        profile.save()
+        self.assertEqual(self.get_profile()["bio"], "Changed in the admin")
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse("api:get-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestTokenExpiry(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        token_auth_cache.clear()
+        self.user = self.create_basic_test_user()
+        self.user.is_active = True
+        self.user.save()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def set_expires_at(self, expires_at):
+        TokenExpiry.objects.filter(token=self.token).update(expires_at=expires_at)
+
+    def get_expires_at(self):
+        return TokenExpiry.objects.get(token=self.token).expires_at
+
+    def test_created_with_token(self):
+        self.assertGreater(self.get_expires_at(), timezone.now() + timedelta(days=13))
+
+    def test_expired_token_rejected(self):
+        self.set_expires_at(timezone.now() - timedelta(seconds=1))
+        response = self.client.get(reverse("api:get-profile"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data["detail"], "Token has expired.")
+
+    def test_sliding_refresh(self):
+        # recently extended: no write
+        expires_at = self.get_expires_at()
+        self.client.get(reverse("api:get-profile"))
+        self.assertEqual(self.get_expires_at(), expires_at)
+
+        self.set_expires_at(timezone.now() + timedelta(days=1))
+        token_auth_cache.clear()
+        cache.clear()
+        self.client.get(reverse("api:get-profile"))
+        self.assertGreater(self.get_expires_at(), timezone.now() + timedelta(days=13))
+
+    def test_login_replaces_expired_token(self):
+        self.set_expires_at(timezone.now() - timedelta(seconds=1))
+        response = self.client.post(
+            reverse("api:login"), {"username": TEST_USER_USERNAME, "password": TEST_USER_PASSWORD}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["token"], self.token.key)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    def test_purge_expired_tokens(self):
+        self.set_expires_at(timezone.now() - timedelta(seconds=1))
+        other = create_user("other@domain.com", "other@domain.com", "Other", "User", "password")
+        Token.objects.create(user=other)
+        call_command("purge_expired_tokens", batch_size=1, sleep=0, stdout=mock.Mock())
+        self.assertEqual(list(Token.objects.values_list("user", flat=True)), [other.id])
+        self.assertEqual(TokenExpiry.objects.count(), 1)
+
+
+class TestCountingBloomFilter(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = CountingBloomFilter(1000, 0.01)
+        keys = [f"key-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_remove(self):
+        bloom = CountingBloomFilter(1000, 0.01)
+        bloom.add("a")
+        bloom.add("b")
+        bloom.remove("a")
+        bloom.remove("never-added")
+        self.assertNotIn("a", bloom)
+        self.assertIn("b", bloom)
+
+
+@override_settings(
+    TOKEN_FILTER={"ENABLED": True, "FALSE_POSITIVE_RATE": 0.01, "REBUILD_INTERVAL": 600}
+)
+class TestTokenFilter(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        token_auth_cache.clear()
+        self.user = self.create_basic_test_user()
+        self.user.is_active = True
+        self.user.save()
+        self.token = Token.objects.create(user=self.user)
+        token_filter.rebuild()
+        self.addCleanup(token_filter.clear)
+
+    def get_auth_check(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+        return self.client.get(reverse("api:auth-check"))
+
+    def test_bogus_token_rejected_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.get_auth_check("0" * 40)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_valid_token_accepted(self):
+        self.assertEqual(self.get_auth_check(self.token.key).status_code, status.HTTP_200_OK)
+
+    def test_token_created_by_other_worker_accepted(self):
+        self.token.delete()
+        token = Token.objects.create(user=self.user)
+        # this worker's filter has not seen the token; the shared marker has
+        token_filter.remove(token.key)
+        self.assertNotIn(token.key, token_filter._filter)
+        self.assertEqual(self.get_auth_check(token.key).status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_removed(self):
+        key = self.token.key
+        self.token.delete()
+        self.assertNotIn(key, token_filter._filter)
+
+    @override_settings(TOKEN_FILTER={"ENABLED": None})
+    def test_disabled_with_local_cache(self):
+        self.assertFalse(token_filter.is_enabled())
+        self.assertTrue(token_filter.might_exist("0" * 40))
@@ -0,0 +1,115 @@
+# Path: project/api/tests/unit/test_campaigns.py
+
+import base64
+import email
+from unittest import mock
+
+import httplib2
+from django.core.management import call_command
+from googleapiclient.errors import HttpError
+
+from api.campaigns import CampaignSender, RateLimiter
+from api.models import EmailCampaign
+from api.tests.base import BaseTestCase
+from api.util import create_user
+
+
+def decode(raw):
+    message = email.message_from_bytes(base64.urlsafe_b64decode(raw))
+    return message["to"], message.get_payload(1).get_payload(decode=True).decode()
+
+
+class FakeGmail:
+    """Stands in for gmail_client.send_batch, failing the queued request ids once."""
+
+    def __init__(self, errors=None):
+        self.batches = []
+        self.errors = dict(errors or {})
+
+    def send_batch(self, raws):
+        self.batches.append(raws)
+        responses, errors = {}, {}
+        for request_id in raws:
+            if request_id in self.errors:
+                errors[request_id] = self.errors.pop(request_id)
+            else:
+                responses[request_id] = {"id": f"msg-{request_id}"}
+        return responses, errors
+
+
+class TestCampaignSender(BaseTestCase):
+    def setUp(self):
+        self.users = [
+            create_user(
+                username=f"user{i}@domain.com",
+                email=f"user{i}@domain.com",
+                first_name=f"First{i}",
+                last_name="Last",
+                password="password",
+                is_active=True,
+            )
+            for i in range(5)
+        ]
+        self.create_basic_test_user()  # inactive test recipient
+        self.campaign = EmailCampaign.objects.create(
+            name="plans", subject="New plans", content="<p>Hi {{ first_name }}</p>"
+        )
+
+    def run_campaign(self, gmail, **kwargs):
+        sender = CampaignSender(self.campaign, sleep=mock.Mock(), **kwargs)
+        with mock.patch("api.campaigns.gmail_client", gmail):
+            return sender.run()
+
+    def test_sends_personalised_batches(self):
+        gmail = FakeGmail()
+        campaign = self.run_campaign(gmail, batch_size=2, concurrency=2)
+        self.assertEqual([len(batch) for batch in gmail.batches], [2, 2, 1])
+        to, html = decode(gmail.batches[0][str(self.users[0].id)])
+        self.assertEqual(to, "user0@domain.com")
+        self.assertIn("<p>Hi First0</p>", html)
+        self.assertIn("<title>New plans</title>", html)
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, EmailCampaign.Status.DONE)
+        self.assertEqual(campaign.sent_count, 5)
+        self.assertEqual(campaign.last_user_id, self.users[-1].id)
+
+    def test_resumes_from_cursor(self):
+        self.campaign.last_user_id = self.users[2].id
+        self.campaign.sent_count = 3
+        self.campaign.save()
+        gmail = FakeGmail()
+        campaign = self.run_campaign(gmail)
+        self.assertEqual(sorted(gmail.batches[0]), sorted(str(user.id) for user in self.users[3:]))
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.sent_count, 5)
+
+    def test_rate_limited_messages_retried(self):
+        user_id = str(self.users[1].id)
+        rate_limited = HttpError(
+            httplib2.Response({"status": 429}), b'{"error": {"message": "Rate Limit Exceeded"}}'
+        )
+        bad_request = HttpError(
+            httplib2.Response({"status": 400}), b'{"error": {"message": "Invalid To header"}}'
+        )
+        gmail = FakeGmail({user_id: rate_limited, str(self.users[2].id): bad_request})
+        campaign = self.run_campaign(gmail)
+        self.assertEqual(list(gmail.batches[1]), [user_id])
+        self.assertEqual(campaign.sent_count, 4)
+        self.assertEqual(campaign.failed_count, 1)
+
+    def test_command_refuses_finished_campaign(self):
+        self.campaign.status = EmailCampaign.Status.DONE
+        self.campaign.save()
+        with self.assertRaisesMessage(Exception, "pass --restart"):
+            call_command("send_email_campaign", "plans")
+
+
+class TestRateLimiter(BaseTestCase):
+    def test_paces_callers(self):
+        sleep = mock.Mock()
+        limiter = RateLimiter(rate=10, burst=10, sleep=sleep)
+        limiter.acquire(10)
+        sleep.assert_not_called()
+        limiter.acquire(5)
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.5, places=1)
@@ -0,0 +1,68 @@
+# Path: project/api/tests/unit/test_email_templates.py
+
+import base64
+import email
+from email.header import decode_header, make_header
+
+from django.test import SimpleTestCase, override_settings
+
+from api.email_templates import build_raw_message, html_to_text, render_email
+
+
+class TestRenderEmail(SimpleTestCase):
+    def test_single_render_with_layout(self):
+        html, text = render_email(
+            "password_reset.html",
+            "Password Reset",
+            first_name="Jane",
+            reset_link="https://example.com/reset/1/abc",
+        )
+        self.assertIn("<title>Password Reset</title>", html)
+        self.assertIn('href="https://example.com/reset/1/abc"', html)
+        self.assertIn("Hi Jane,", text)
+        self.assertIn("Password (https://example.com/reset/1/abc)", text)
+        self.assertNotIn("<", text)
+        self.assertNotIn("font-family", text)
+
+    def test_context_escaped(self):
+        html, text = render_email(
+            "contact_us_received_acknowledgement.html",
+            "Thanks",
+            first_name="Jane",
+            message="<script>alert(1)</script>",
+            submitted_at="today",
+        )
+        self.assertNotIn("<script>", html)
+        self.assertIn("<script>alert(1)</script>", text)
+
+
+class TestHtmlToText(SimpleTestCase):
+    def test_blocks_and_links(self):
+        text = html_to_text(
+            "<p>Hi &amp; there,<br>welcome</p><ul><li>one</li></ul>"
+            '<p>Mail <a href="mailto:a@b.com">a@b.com</a> or <a href="https://x.io">visit</a></p>'
+        )
+        self.assertEqual(
+            text, "Hi & there,\nwelcome\n\n- one\n\nMail a@b.com or visit (https://x.io)\n"
+        )
+
+
+@override_settings(APP_NAME="Prüfung", SEND_FROM_EMAIL="noreply@domain.com")
+class TestBuildRawMessage(SimpleTestCase):
+    def test_round_trip(self):
+        raw = build_raw_message("jane@domain.com", "Grüße", "Hallo ✓", "<p>Hallo ✓</p>")
+        message = email.message_from_bytes(base64.urlsafe_b64decode(raw))
+        self.assertEqual(message["to"], "jane@domain.com")
+        self.assertEqual(str(make_header(decode_header(message["subject"]))), "Grüße")
+        self.assertEqual(
+            str(make_header(decode_header(message["from"]))), "Prüfung <noreply@domain.com>"
+        )
+        self.assertEqual(message.get_content_type(), "multipart/alternative")
+        text, html = message.get_payload()
+        self.assertEqual(text.get_content_type(), "text/plain")
+        self.assertEqual(text.get_payload(decode=True).decode(), "Hallo ✓")
+        self.assertEqual(html.get_payload(decode=True).decode(), "<p>Hallo ✓</p>")
+
+    def test_rejects_header_injection(self):
+        with self.assertRaises(ValueError):
+            build_raw_message("jane@domain.com", "Hi\nBcc: x@y.com", "", "")
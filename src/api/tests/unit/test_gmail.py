@@ -0,0 +1,57 @@
+# Path: project/api/tests/unit/test_gmail.py
+
+import threading
+from unittest import mock
+
+import rsa
+from django.test import SimpleTestCase, override_settings
+
+from api.gmail import GmailClient
+from api.outbound import request_deadline, reset_breakers
+
+_, PRIVATE_KEY = rsa.newkeys(1024)
+
+
+@override_settings(
+    GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY=PRIVATE_KEY.save_pkcs1().decode(),
+    GMAIL_API_SERVICE_ACCOUNT_CLIENT_EMAIL="test@project.iam.gserviceaccount.com",
+    SEND_FROM_EMAIL="test@example.com",
+)
+class TestGmailClient(SimpleTestCase):
+    def test_service_and_credentials_reused(self):
+        client = GmailClient()
+        service = client.get_service()
+        self.assertIs(client.get_service(), service)
+        self.assertIs(client.get_credentials(), client.get_credentials())
+
+    def test_service_per_thread_shares_credentials(self):
+        client = GmailClient()
+        services = []
+        thread = threading.Thread(target=lambda: services.append(client.get_service()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(services[0], client.get_service())
+        self.assertIs(services[0]._http.credentials, client.get_service()._http.credentials)
+
+    def test_reset(self):
+        client = GmailClient()
+        service = client.get_service()
+        client.reset()
+        self.assertIsNot(client.get_service(), service)
+
+    def test_timeout_limited_by_request_deadline(self):
+        reset_breakers()
+        self.addCleanup(reset_breakers)
+        client = GmailClient()
+        http = client.get_service()._http
+        # a connection left open by an earlier call
+        connection = mock.Mock()
+        http.connections["https:gmail.googleapis.com"] = connection
+        timeouts = []
+        with mock.patch("googleapiclient.http.HttpRequest.execute") as execute:
+            execute.side_effect = lambda *args, **kwargs: timeouts.append(http.timeout)
+            with request_deadline(2):
+                client.send("raw")
+        self.assertLessEqual(timeouts[0], 2)
+        self.assertEqual(connection.timeout, timeouts[0])
+        connection.sock.settimeout.assert_called_once_with(timeouts[0])
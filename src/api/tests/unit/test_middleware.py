@@ -0,0 +1,219 @@
+# Path: project/api/tests/unit/test_middleware.py
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from django.urls import reverse
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.authentication import token_fingerprint, token_username_cache
+from api.middleware.logging import REDACTED, RequestLogMiddleware, redact
+from api.middleware.sampling import SAMPLE_RATES_CACHE_KEY, request_log_sampler
+from api.parsers import body as body_parser
+from api.tests.base import BaseTestCase, TEST_USER_USERNAME
+
+
+class TestRequestLogMiddlewareUser(BaseTestCase):
+    """
+    Test resolution of the logged user from the Authorization header
+    """
+
+    def setUp(self):
+        super().setUp()
+        token_username_cache.clear()
+        self.user = self.create_basic_test_user()
+        self.token = Token.objects.create(user=self.user)
+        self.middleware = RequestLogMiddleware(lambda request: JsonResponse({}))
+        self.factory = RequestFactory()
+
+    def get_logged_user(self, token_key):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Token {token_key}")
+        with self.assertLogs("api", level="INFO") as logs:
+            self.middleware(request)
+        return logs.records[-1].msg["user"]
+
+    def test_username_lookup_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_logged_user(self.token.key), TEST_USER_USERNAME)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_logged_user(self.token.key), TEST_USER_USERNAME)
+
+    def test_unknown_token_logged_as_anonymous(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_logged_user("bogus"), "anonymous")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_logged_user("bogus"), "anonymous")
+
+    def test_token_fingerprint_makes_no_queries(self):
+        request_logging = {**settings.REQUEST_LOGGING, "TOKEN_FINGERPRINT": True}
+        with override_settings(REQUEST_LOGGING=request_logging), self.assertNumQueries(0):
+            self.assertEqual(
+                self.get_logged_user(self.token.key), token_fingerprint(self.token.key)
+            )
+
+
+class TestRequestLogMiddlewareAsync(BaseTestCase):
+    """
+    Test the native async path used under ASGI
+    """
+
+    def setUp(self):
+        super().setUp()
+        token_username_cache.clear()
+        self.user = self.create_basic_test_user()
+        self.token = Token.objects.create(user=self.user)
+
+        async def get_response(request):
+            return JsonResponse({"ok": True})
+
+        self.middleware = RequestLogMiddleware(get_response)
+
+    def test_middleware_is_async_under_async_chain(self):
+        self.assertTrue(iscoroutinefunction(self.middleware))
+
+    async def test_async_call_logs_user(self):
+        request = AsyncRequestFactory().get(
+            "/", headers={"Authorization": f"Token {self.token.key}"}
+        )
+        with self.assertLogs("api", level="INFO") as logs:
+            response = await self.middleware(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(logs.records[-1].msg["user"], TEST_USER_USERNAME)
+        self.assertEqual(logs.records[-1].msg["response_body"], '{"ok": true}')
+
+
+class TestRequestLogMiddlewareResponseBody(BaseTestCase):
+    """
+    Test capture of response bodies for the request log
+    """
+
+    def log_response(self, response, **config):
+        request_logging = {**settings.REQUEST_LOGGING, **config}
+        middleware = RequestLogMiddleware(lambda request: response)
+        with override_settings(REQUEST_LOGGING=request_logging):
+            with self.assertLogs("api", level="INFO") as logs:
+                middleware(RequestFactory().get("/"))
+        return logs.records[-1].msg
+
+    def drf_response(self, data):
+        response = Response(data)
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = "application/json"
+        response.renderer_context = {}
+        return response.render()
+
+    def test_drf_response_logged_from_data(self):
+        data = {"message": "hello"}
+        log_data = self.log_response(self.drf_response(data))
+        self.assertIs(log_data["response_body"], data)
+
+    def test_large_response_logged_as_prefix(self):
+        log_data = self.log_response(
+            self.drf_response({"message": "x" * 100}), MAX_RESPONSE_BODY_SIZE=10
+        )
+        self.assertTrue(log_data["response_body"]["truncated"])
+        self.assertEqual(log_data["response_body"]["prefix"], '{"message"')
+
+    def test_binary_and_streaming_responses_not_logged(self):
+        binary = HttpResponse(b"\x89PNG", content_type="image/png")
+        self.assertNotIn("response_body", self.log_response(binary))
+        streaming = StreamingHttpResponse(iter([b"{}"]), content_type="application/json")
+        self.assertNotIn("response_body", self.log_response(streaming))
+
+
+class TestRequestLogMiddlewareRequestBody(BaseTestCase):
+    """
+    Test the request body is decoded once and shared with DRF's parser
+    """
+
+    def test_json_post_body_parsed_once_and_logged(self):
+        data = {"username": "nobody@example.com", "password": "wrongpassword"}
+        with mock.patch.object(body_parser.json, "loads", wraps=body_parser.json.loads) as loads:
+            with self.assertLogs("api", level="INFO") as logs:
+                self.client.post(reverse("api:login"), data, format="json")
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(
+            logs.records[-1].msg["request_body"],
+            {"username": "nobody@example.com", "password": REDACTED},
+        )
+
+    def test_form_body_redacted(self):
+        request = RequestFactory().post(
+            "/login/", {"username": "nobody@example.com", "Confirm_New_Password": "x"}
+        )
+        self.assertEqual(
+            RequestLogMiddleware(lambda request: None).get_request_body(request),
+            {"username": "nobody@example.com", "Confirm_New_Password": REDACTED},
+        )
+
+    def test_redact_nested(self):
+        data = {"user": {"id": 1, "auth_token": "abc"}, "items": [{"client_secret": "x"}]}
+        self.assertEqual(
+            redact(data),
+            {"user": {"id": 1, "auth_token": REDACTED}, "items": [{"client_secret": REDACTED}]},
+        )
+        # the original, possibly shared with DRF's request.data, is untouched
+        self.assertEqual(data["user"]["auth_token"], "abc")
+
+    def test_json_patch_body_parsed_once_and_logged(self):
+        self.client.force_authenticate(user=self.create_basic_test_user())
+        data = {"bio": "New Bio"}
+        with mock.patch.object(body_parser.json, "loads", wraps=body_parser.json.loads) as loads:
+            with self.assertLogs("api", level="INFO") as logs:
+                self.client.patch(reverse("api:edit-profile"), data, format="json")
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(logs.records[-1].msg["request_body"], data)
+
+    def test_invalid_json_body_not_logged(self):
+        with self.assertLogs("api", level="INFO") as logs:
+            response = self.client.post(
+                reverse("api:login"), "{not json", content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("request_body", logs.records[-1].msg)
+
+
+class TestRequestLogMiddlewareSampling(BaseTestCase):
+    """
+    Test the request-log sampling policy
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.request_logging = {**settings.REQUEST_LOGGING, "SAMPLE_RATE": 0.0}
+        request_log_sampler.reload()
+        self.addCleanup(cache.delete, SAMPLE_RATES_CACHE_KEY)
+        self.addCleanup(request_log_sampler.reload)
+
+    def call_middleware(self, status=200):
+        middleware = RequestLogMiddleware(lambda request: JsonResponse({}, status=status))
+        with override_settings(REQUEST_LOGGING=self.request_logging):
+            middleware(RequestFactory().get("/", {"q": "query"}))
+
+    def test_unsampled_request_not_logged(self):
+        with self.assertNoLogs("api", level="INFO"):
+            self.call_middleware()
+
+    def test_errors_always_logged_without_bodies(self):
+        with self.assertLogs("api", level="INFO") as logs:
+            self.call_middleware(status=503)
+        self.assertEqual(logs.records[-1].msg["status_code"], 503)
+        self.assertNotIn("request_body", logs.records[-1].msg)
+        self.assertNotIn("response_body", logs.records[-1].msg)
+
+    def test_slow_requests_always_logged(self):
+        self.request_logging["SLOW_REQUEST_THRESHOLD"] = 0
+        with self.assertLogs("api", level="INFO"):
+            self.call_middleware()
+
+    def test_runtime_override(self):
+        request_log_sampler.set_rate("*", 1.0)
+        with self.assertLogs("api", level="INFO") as logs:
+            self.call_middleware()
+        self.assertEqual(logs.records[-1].msg["request_body"], {"q": "query"})
+        self.assertEqual(logs.records[-1].msg["sample_rate"], 1.0)
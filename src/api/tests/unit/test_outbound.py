@@ -0,0 +1,147 @@
+# Path: project/api/tests/unit/test_outbound.py
+
+from unittest import mock
+
+import requests
+from asgiref.sync import iscoroutinefunction
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from api.middleware.deadline import OutboundDeadlineMiddleware
+from api.outbound import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    get_breaker,
+    get_remaining_time,
+    request_deadline,
+    reset_breakers,
+)
+from api.tests.base import BaseTestCase
+
+
+class TestCircuitBreaker(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("api.outbound.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", timeout=5.0, failure_threshold=2, reset_timeout=30)
+
+    def fail(self):
+        with self.assertRaises(requests.ConnectionError):
+            with self.breaker.guard():
+                raise requests.ConnectionError()
+
+    def succeed(self):
+        with self.breaker.guard() as timeout:
+            return timeout
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail()
+        self.succeed()
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.succeed()
+        stats = self.breaker.get_stats()
+        self.assertEqual((stats["failures"], stats["rejected"], stats["opened"]), (3, 1, 1))
+
+    def test_half_open_trial(self):
+        self.fail()
+        self.fail()
+        self.now += 30
+        # one trial call at a time
+        with self.breaker.guard():
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            with self.assertRaises(CircuitOpenError):
+                self.succeed()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        self.fail()
+        self.fail()
+        self.now += 30
+        self.fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.succeed()
+
+    def test_ignored_errors_are_not_failures(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                with self.breaker.guard(ignore=ValueError):
+                    raise ValueError()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_deadline_shrinks_timeout(self):
+        self.assertEqual(self.succeed(), 5.0)
+        with request_deadline(2):
+            self.assertEqual(self.succeed(), 2.0)
+            with request_deadline(10):
+                self.now += 1.5
+                self.assertEqual(self.succeed(), 0.5)
+            self.now += 1
+            with self.assertRaises(DeadlineExceeded):
+                self.succeed()
+        self.assertEqual(self.succeed(), 5.0)
+        self.assertEqual(self.breaker.get_stats()["deadline_exceeded"], 1)
+
+
+class TestOutboundDeadlineMiddleware(SimpleTestCase):
+    @override_settings(OUTBOUND_REQUEST_DEADLINE=7)
+    def test_deadline_set_for_request(self):
+        remaining = []
+        middleware = OutboundDeadlineMiddleware(
+            lambda request: remaining.append(get_remaining_time())
+        )
+        middleware(RequestFactory().get("/"))
+        self.assertAlmostEqual(remaining[0], 7, places=1)
+        self.assertIsNone(get_remaining_time())
+
+    @override_settings(OUTBOUND_REQUEST_DEADLINE=7)
+    async def test_deadline_set_for_async_request(self):
+        remaining = []
+
+        async def get_response(request):
+            remaining.append(get_remaining_time())
+
+        middleware = OutboundDeadlineMiddleware(get_response)
+        # called directly by Django's async handler, without a thread hop
+        self.assertTrue(iscoroutinefunction(middleware))
+        await middleware(AsyncRequestFactory().get("/"))
+        self.assertAlmostEqual(remaining[0], 7, places=1)
+        self.assertIsNone(get_remaining_time())
+
+
+@override_settings(OUTBOUND_INTEGRATIONS={"recaptcha": {"TIMEOUT": 2.0, "FAILURE_THRESHOLD": 1}})
+class TestOutboundIntegrations(BaseTestCase):
+    def setUp(self):
+        reset_breakers()
+        self.addCleanup(reset_breakers)
+
+    @mock.patch("api.views.recaptcha.requests.post")
+    def test_recaptcha_fails_fast_when_open(self, post):
+        post.side_effect = requests.Timeout()
+        for _ in range(2):
+            response = self.client.post(reverse("api:verify-recaptcha"), {"token": "t"})
+            self.assertEqual(response.data, {"success": False})
+        post.assert_called_once()
+        self.assertLessEqual(post.call_args.kwargs["timeout"], 2.0)
+        self.assertEqual(get_breaker("recaptcha").state, CircuitBreaker.OPEN)
+
+    def test_metrics_admin_only(self):
+        user = self.create_basic_test_user()
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("api:outbound-metrics"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        get_breaker("recaptcha")
+        response = self.client.get(reverse("api:outbound-metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["breakers"]["recaptcha"]["state"], "closed")
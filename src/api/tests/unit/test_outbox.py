@@ -0,0 +1,98 @@
+# Path: project/api/tests/unit/test_outbox.py
+
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from api.models import OutboundEmail
+from api.outbox import EMAIL_SENDERS, queue_email
+from api.tests.base import BaseTestCase, TEST_USER_PASSWORD
+
+RECIPIENT = "jane@domain.com"
+
+
+class TestQueueEmail(BaseTestCase):
+    def test_queued_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.assertTrue(
+                queue_email(OutboundEmail.Kind.PASSWORD_RESET, RECIPIENT, first_name="Jane")
+            )
+            self.assertFalse(OutboundEmail.objects.exists())
+        callbacks[0]()
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.recipient, RECIPIENT)
+        self.assertEqual(email.kwargs, {"first_name": "Jane"})
+        self.assertEqual(email.status, OutboundEmail.Status.PENDING)
+
+    def test_test_recipient_not_queued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(queue_email(OutboundEmail.Kind.PASSWORD_RESET, "user@example.com"))
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_signup_queues_activation_email(self):
+        sender = mock.Mock()
+        with mock.patch.dict(EMAIL_SENDERS, {OutboundEmail.Kind.ACTIVATE_ACCOUNT: sender}):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("api:signup"),
+                    {
+                        "email": RECIPIENT,
+                        "password": TEST_USER_PASSWORD,
+                        "first_name": "Jane",
+                        "last_name": "Doe",
+                    },
+                )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        sender.assert_not_called()
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.kind, OutboundEmail.Kind.ACTIVATE_ACCOUNT)
+        self.assertIn(response.data["token"], email.kwargs["activate_link"])
+
+
+class TestSendQueuedEmails(BaseTestCase):
+    def setUp(self):
+        self.email = OutboundEmail.objects.create(
+            kind=OutboundEmail.Kind.PASSWORD_RESET,
+            recipient=RECIPIENT,
+            kwargs={"first_name": "Jane", "subject": "Reset", "reset_link": "https://x/reset"},
+        )
+
+    def send_queued_emails(self, result, **options):
+        sender = mock.Mock(return_value=result)
+        with mock.patch.dict(EMAIL_SENDERS, {OutboundEmail.Kind.PASSWORD_RESET: sender}):
+            call_command("send_queued_emails", once=True, stdout=mock.Mock(), **options)
+        self.email.refresh_from_db()
+        return sender
+
+    def test_sent(self):
+        sender = self.send_queued_emails({"id": "gmail-id"})
+        sender.assert_called_once_with(
+            recipient=RECIPIENT, first_name="Jane", subject="Reset", reset_link="https://x/reset"
+        )
+        self.assertEqual(self.email.status, OutboundEmail.Status.SENT)
+        self.assertEqual(self.email.provider_message_id, "gmail-id")
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIsNotNone(self.email.sent_at)
+
+    def test_failure_retried_later(self):
+        sender = self.send_queued_emails(None)
+        sender.assert_called_once()
+        self.assertEqual(self.email.status, OutboundEmail.Status.PENDING)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertGreater(self.email.next_attempt_at, timezone.now())
+        self.assertTrue(self.email.last_error)
+
+    def test_failed_after_max_attempts(self):
+        self.send_queued_emails(None, max_attempts=1)
+        self.assertEqual(self.email.status, OutboundEmail.Status.FAILED)
+
+    def test_sending_email_reclaimed_after_lease(self):
+        OutboundEmail.objects.filter(id=self.email.id).update(
+            status=OutboundEmail.Status.SENDING, attempts=1
+        )
+        self.send_queued_emails({"id": "gmail-id"})
+        self.assertEqual(self.email.status, OutboundEmail.Status.SENT)
+        self.assertEqual(self.email.attempts, 2)
@@ -0,0 +1,170 @@
+# Path: project/api/tests/unit/test_provisioning.py
+
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import Profile
+from api.provisioning import UserImporter, read_rows
+from api.tests.base import BaseTestCase
+
+CSV = """email,first_name,last_name,password,is_active,plan_type,bio
+Alice@Example.com,Alice,Smith,alicepassword,true,premium,Hi
+bob@example.com,Bob,,,no,,
+not an email,Nobody,,,,,
+carol@example.com,Carol,,,,gold,
+ALICE@example.com,Alice,Again,,,,
+"""
+
+# hash quickly; the bounded hashers are covered by test_hashers
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class TestUserImporter(BaseTestCase):
+    def import_csv(self, text, **kwargs):
+        errors = []
+        importer = UserImporter(
+            on_error=lambda line, email, error: errors.append((line, email, error)), **kwargs
+        )
+        return importer.run(read_rows(io.StringIO(text), "csv")), errors
+
+    def test_import(self):
+        result, errors = self.import_csv(CSV, chunk_size=2)
+        self.assertEqual(tuple(result), (5, 2, 3))
+        self.assertEqual(
+            [(line, error) for line, _, error in errors],
+            [
+                (4, "Invalid email"),
+                (5, "Invalid plan_type 'gold'"),
+                (6, "A user with this email already exists"),
+            ],
+        )
+
+        alice = User.objects.get(username="Alice@example.com")
+        self.assertTrue(alice.is_active)
+        self.assertTrue(alice.check_password("alicepassword"))
+        self.assertEqual(alice.profile.plan_type, Profile.PlanType.PREMIUM)
+        self.assertEqual(alice.profile.bio, "Hi")
+        bob = User.objects.get(username="bob@example.com")
+        self.assertFalse(bob.is_active)
+        self.assertFalse(bob.has_usable_password())
+        self.assertEqual(bob.profile.plan_type, Profile.PlanType.FREE)
+
+    def test_duplicates_in_chunk(self):
+        text = "email\ndave@example.com\nDave@Example.com\n"
+        result, errors = self.import_csv(text)
+        self.assertEqual(tuple(result), (2, 1, 1))
+        self.assertEqual(errors[0][2], "Duplicate email in this file")
+
+    def test_queries_per_chunk(self):
+        text = "email\n" + "".join(f"user{i}@example.com\n" for i in range(50))
+        # existing emails, user INSERT, profile INSERT, plus the savepoint
+        with self.assertNumQueries(5):
+            result, errors = self.import_csv(text, chunk_size=50)
+        self.assertEqual(result.created, 50)
+        self.assertEqual(Profile.objects.filter(user__email__endswith="@example.com").count(), 50)
+
+    def test_conflict_falls_back_to_rows(self):
+        text = "email\nerin@example.com\nfrank@example.com\n"
+        importer = UserImporter()
+        rows = list(read_rows(io.StringIO(text), "csv"))
+        # a user signs up between the email check and the insert
+        original = importer.insert
+
+        def insert(entries, users, profiles):
+            User.objects.create(username="other", email="frank@example.com")
+            original(entries, users, profiles)
+
+        importer.insert = insert
+        result = importer.run(rows)
+        self.assertEqual(tuple(result), (2, 1, 1))
+        self.assertTrue(User.objects.filter(username="erin@example.com").exists())
+
+    def test_ndjson(self):
+        text = '{"email": "gina@example.com", "is_active": true}\n\n[1]\n{bad\n'
+        errors = []
+        importer = UserImporter(on_error=lambda *args: errors.append(args))
+        result = importer.run(read_rows(io.StringIO(text), "ndjson"))
+        self.assertEqual(tuple(result), (3, 1, 2))
+        self.assertEqual([line for line, _, _ in errors], [3, 4])
+        self.assertTrue(User.objects.get(username="gina@example.com").is_active)
+
+    def test_invalid_utf8_stops_with_error(self):
+        data = b"email\nira@example.com\nj\xffy@example.com\nkim@example.com\n"
+        errors = []
+        importer = UserImporter(on_error=lambda *args: errors.append(args))
+        stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+        # read up to the end of the first row first, then the bad byte
+        stream._CHUNK_SIZE = len(b"email\nira@example.com\n")
+        importer.run(read_rows(stream, "csv"))
+        self.assertEqual(len(errors), 1)
+        self.assertIn("not valid UTF-8", errors[0][2])
+        self.assertTrue(User.objects.filter(username="ira@example.com").exists())
+
+    def test_process_pool(self):
+        text = "email,password\nhank@example.com,hankpassword\n"
+        result, _ = self.import_csv(text, processes=1)
+        self.assertEqual(result.created, 1)
+        self.assertTrue(
+            User.objects.get(username="hank@example.com").check_password("hankpassword")
+        )
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(CSV)
+        self.addCleanup(os.remove, f.name)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("import_users", f.name, processes=0, stdout=stdout, stderr=stderr)
+        self.assertIn("Imported 2 of 5 users", stdout.getvalue())
+        self.assertIn("line 4: not an email: Invalid email", stderr.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class TestImportUsersView(BaseTestCase):
+    def post(self, content, name="users.csv", **data):
+        upload = SimpleUploadedFile(name, content.encode("utf-8"))
+        return self.client.post(
+            reverse("api:import-users"), {"file": upload, **data}, format="multipart"
+        )
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.create_basic_test_user())
+        response = self.post(CSV)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "adminpassword")
+        self.client.force_authenticate(admin)
+        response = self.post(CSV, chunk_size=3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(lines[0], {"line": 4, "email": "not an email", "error": "Invalid email"})
+        self.assertEqual(lines[1], {"processed": 3, "created": 2, "failed": 1})
+        self.assertEqual(lines[-1], {"done": True, "processed": 5, "created": 2, "failed": 3})
+        self.assertTrue(User.objects.filter(username="bob@example.com").exists())
+
+    def test_invalid_utf8(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "adminpassword")
+        self.client.force_authenticate(admin)
+        upload = SimpleUploadedFile("users.csv", b"email\nj\xffy@example.com\n")
+        response = self.client.post(
+            reverse("api:import-users"), {"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "The file must be UTF-8 encoded.")
+        self.assertFalse(User.objects.exclude(username="admin").exists())
+
+    def test_unknown_format(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "adminpassword")
+        self.client.force_authenticate(admin)
+        response = self.post(CSV, name="users.txt")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,59 @@
+# Path: project/api/tests/unit/test_queue_handler.py
+
+import logging
+import threading
+
+from django.test import SimpleTestCase
+
+from api.queue_handler import QueueListenerHandler
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self, name, gate=None):
+        super().__init__()
+        self.set_name(name)
+        self.records = []
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.records.append(record)
+
+
+class TestQueueListenerHandler(SimpleTestCase):
+    def make_record(self, msg, level=logging.INFO):
+        return logging.LogRecord("api", level, __file__, 1, msg, None, None)
+
+    def test_structured_messages_delivered_on_close(self):
+        target = CollectingHandler("test-queue-target")
+        handler = QueueListenerHandler(["test-queue-target"])
+        message = {"action": "Test.run", "error": "boom"}
+        handler.handle(self.make_record(message))
+        handler.close()
+        self.assertEqual(len(target.records), 1)
+        self.assertEqual(target.records[0].msg, message)
+
+    def test_target_levels_respected(self):
+        target = CollectingHandler("test-queue-errors")
+        target.setLevel(logging.ERROR)
+        handler = QueueListenerHandler(["test-queue-errors"])
+        handler.handle(self.make_record("info"))
+        handler.handle(self.make_record("error", level=logging.ERROR))
+        handler.close()
+        self.assertEqual([record.msg for record in target.records], ["error"])
+
+    def test_overflow_drops_and_counts(self):
+        gate = threading.Event()
+        target = CollectingHandler("test-queue-slow", gate=gate)
+        handler = QueueListenerHandler(["test-queue-slow"], queue_size=1, overflow="drop")
+        for i in range(5):
+            handler.handle(self.make_record(f"record {i}"))
+        self.assertGreaterEqual(handler.dropped, 3)
+        gate.set()
+        handler.close()
+        self.assertEqual(len(target.records) + handler.dropped, 5)
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            QueueListenerHandler(["test-queue-target"], overflow="spill")
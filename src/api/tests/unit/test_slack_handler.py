@@ -0,0 +1,133 @@
+# Path: project/api/tests/unit/test_slack_handler.py
+
+import logging
+import os
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.outbound import get_breaker, reset_breakers
+from api.slack_handler import AlertSuppressor, SlackErrorHandler, fingerprint_record
+
+
+class TestSlackErrorHandler(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(os.environ, {"DJANGO_ENV": "production"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_patcher = mock.patch("api.slack_handler.requests.Session")
+        self.session = session_patcher.start().return_value
+        self.addCleanup(session_patcher.stop)
+        self.session.post.return_value = mock.Mock(status_code=200, headers={})
+        reset_breakers()
+        self.addCleanup(reset_breakers)
+
+    def make_record(self, msg):
+        return logging.LogRecord("api", logging.ERROR, __file__, 1, msg, None, None)
+
+    def test_records_batched_into_one_post(self):
+        handler = SlackErrorHandler("https://hooks.slack.test/x", batch_window=5)
+        for i in range(3):
+            handler.handle(self.make_record({"action": "Test.run", "error": f"boom {i}"}))
+        handler.close()
+        self.assertEqual(self.session.post.call_count, 1)
+        text = self.session.post.call_args.kwargs["json"]["text"]
+        self.assertIn('"error": "boom 0"', text)
+        self.assertIn('"error": "boom 2"', text)
+        self.assertEqual(self.session.post.call_args.kwargs["timeout"], handler.timeout)
+
+    def test_rate_limited_post_is_retried(self):
+        self.session.post.side_effect = [
+            mock.Mock(status_code=429, headers={"Retry-After": "0"}),
+            mock.Mock(status_code=200, headers={}),
+        ]
+        handler = SlackErrorHandler("https://hooks.slack.test/x", batch_window=0)
+        handler.handle(self.make_record("boom"))
+        handler.close()
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_server_errors_open_breaker(self):
+        self.session.post.return_value = mock.Mock(status_code=503, headers={})
+        handler = SlackErrorHandler("https://hooks.slack.test/x", max_retries=5)
+        with mock.patch("api.slack_handler.time.sleep"):
+            handler.send(self.session, ["boom"])
+            self.assertEqual(self.session.post.call_count, 3)  # FAILURE_THRESHOLD for slack
+            handler.send(self.session, ["boom"])
+        self.assertEqual(self.session.post.call_count, 3)
+        self.assertEqual(get_breaker("slack").state, "open")
+
+    def test_close_does_not_block_on_full_queue(self):
+        posting, release = threading.Event(), threading.Event()
+        self.addCleanup(release.set)
+
+        def post(*args, **kwargs):
+            posting.set()
+            release.wait(5)
+            return mock.Mock(status_code=200, headers={})
+
+        self.session.post.side_effect = post
+        handler = SlackErrorHandler(
+            "https://hooks.slack.test/x", batch_window=0, timeout=0.1, max_retries=0, queue_size=2
+        )
+        handler.handle(self.make_record("first"))
+        self.assertTrue(posting.wait(5))
+        # the worker is stuck posting; fill the queue behind it
+        for i in range(3):
+            handler.handle(self.make_record(f"boom {i}"))
+        closer = threading.Thread(target=handler.close)
+        closer.start()
+        closer.join(2)
+        self.assertFalse(closer.is_alive())
+        self.assertEqual(handler.dropped, 2)
+
+    def test_not_sent_outside_production(self):
+        handler = SlackErrorHandler("https://hooks.slack.test/x", batch_window=0)
+        with mock.patch.dict(os.environ, {"DJANGO_ENV": "development"}):
+            handler.handle(self.make_record("boom"))
+        handler.close()
+        self.session.post.assert_not_called()
+
+
+class TestAlertSuppression(SimpleTestCase):
+    def make_record(self, msg):
+        return logging.LogRecord("api", logging.ERROR, __file__, 1, msg, None, None)
+
+    def test_fingerprint_ignores_volatile_details(self):
+        first = self.make_record({"action": "send_email", "error": "timeout after 30s (id 1234)"})
+        second = self.make_record({"action": "send_email", "error": "timeout after 10s (id 98)"})
+        other = self.make_record({"action": "VerifyRecaptcha.post", "error": "timeout after 10s"})
+        self.assertEqual(fingerprint_record(first), fingerprint_record(second))
+        self.assertNotEqual(fingerprint_record(first), fingerprint_record(other))
+
+    def test_repeats_coalesced_within_window(self):
+        suppressor = AlertSuppressor(window=60)
+        self.assertEqual(suppressor.add("fp", "first", now=0), ["first"])
+        for i in range(4):
+            self.assertEqual(suppressor.add("fp", f"repeat {i}", now=1 + i), [])
+        self.assertEqual(suppressor.flush(now=30), [])
+        summary = suppressor.flush(now=61)
+        self.assertEqual(len(summary), 1)
+        self.assertIn("Repeated 4 more time(s)", summary[0])
+        self.assertIn("repeat 3", summary[0])
+
+    def test_digest_mode(self):
+        suppressor = AlertSuppressor(digest_interval=300)
+        self.assertEqual(suppressor.add("a", "error a", now=0), [])
+        self.assertEqual(suppressor.add("a", "error a", now=1), [])
+        self.assertEqual(suppressor.add("b", "error b", now=2), [])
+        self.assertEqual(suppressor.flush(now=100), [])
+        digest = suppressor.flush(now=300)
+        self.assertEqual(len(digest), 1)
+        self.assertIn("3 record(s), 2 distinct error(s)", digest[0])
+
+    def test_state_is_bounded(self):
+        suppressor = AlertSuppressor(window=60, max_fingerprints=2)
+        suppressor.add("a", "error a", now=0)
+        suppressor.add("a", "error a", now=1)
+        suppressor.add("b", "error b", now=2)
+        evicted = suppressor.add("c", "error c", now=3)
+        self.assertEqual(len(suppressor.entries), 2)
+        self.assertEqual(evicted[0], "error c")
+        self.assertIn("Repeated 1 more time(s)", evicted[1])
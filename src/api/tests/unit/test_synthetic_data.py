@@ -0,0 +1,66 @@
+# Path: project/api/tests/unit/test_synthetic_data.py
+
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.models import Profile, TokenExpiry
+from api.tests.base import BaseTestCase
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TestGenerateSyntheticData(BaseTestCase):
+    def generate(self, count, **options):
+        call_command(
+            "generate_synthetic_data", count, "--end=2026-01-01", stdout=io.StringIO(), **options
+        )
+
+    def snapshot(self):
+        return (
+            list(
+                User.objects.order_by("username").values_list(
+                    "username", "password", "is_active", "date_joined", "last_login"
+                )
+            ),
+            list(
+                Profile.objects.order_by("user__username").values_list(
+                    "bio", "plan_type", "card_type", "card_last4"
+                )
+            ),
+            list(Token.objects.order_by("key").values_list("key", "user__username")),
+        )
+
+    def test_generate(self):
+        self.generate(500, seed=1, chunk_size=120)
+        self.assertEqual(User.objects.count(), 500)
+        self.assertEqual(Profile.objects.count(), 500)
+        self.assertTrue(User.objects.first().check_password("synthetic password"))
+        # premium users are a minority, and tokens all have an expiry
+        premium = Profile.objects.filter(plan_type=Profile.PlanType.PREMIUM).count()
+        self.assertTrue(0 < premium < 150)
+        self.assertTrue(Token.objects.exists())
+        self.assertEqual(TokenExpiry.objects.count(), Token.objects.count())
+        self.assertFalse(
+            Token.objects.exclude(user__is_active=True).exclude(user__last_login__isnull=False)
+        )
+
+    def test_deterministic(self):
+        self.generate(200, seed=3, chunk_size=50)
+        first = self.snapshot()
+        User.objects.all().delete()
+        self.generate(200, seed=3, chunk_size=70)
+        self.assertEqual(self.snapshot(), first)
+
+        User.objects.all().delete()
+        self.generate(200, seed=4)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_offset(self):
+        self.generate(20)
+        with self.assertRaises(CommandError):
+            self.generate(20)
+        self.generate(20, offset=20)
+        self.assertEqual(User.objects.count(), 40)
@@ -0,0 +1,111 @@
+# Path: project/api/tests/unit/test_throttling.py
+
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from api.tests.base import BaseTestCase, TEST_USER_PASSWORD, TEST_USER_USERNAME
+from api.throttling import SlidingWindowCounter, get_login_throttle_stats
+
+LOGIN_THROTTLE = {"IP_LIMIT": 3, "IP_WINDOW": 60, "USERNAME_LIMIT": 2, "USERNAME_WINDOW": 60}
+
+
+@override_settings(LOGIN_THROTTLE=LOGIN_THROTTLE)
+class TestSlidingWindowCounter(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.counter = SlidingWindowCounter("ip")
+
+    def test_limit_within_window(self):
+        for _ in range(3):
+            self.assertIsNone(self.counter.hit("1.2.3.4", now=1000))
+        # until this window ends at 1020
+        self.assertEqual(self.counter.hit("1.2.3.4", now=1000), 20)
+        self.assertIsNone(self.counter.hit("5.6.7.8", now=1000))
+
+    def test_previous_window_slides_out(self):
+        for _ in range(3):
+            self.counter.hit("1.2.3.4", now=1000)
+        # 3 * 55/60 of the previous window still counts
+        self.assertIsNone(self.counter.hit("1.2.3.4", now=1025))
+        # 3 * 55/60 + 1 >= 3 until only 2/3 of the previous window is left
+        self.assertAlmostEqual(self.counter.hit("1.2.3.4", now=1025), 15)
+        self.assertIsNone(self.counter.hit("1.2.3.4", now=1041))
+
+    def test_in_process_fallback(self):
+        with (
+            mock.patch("api.throttling.cache.get_many", side_effect=ConnectionError),
+            mock.patch("api.throttling.cache.incr", side_effect=ConnectionError),
+        ):
+            for _ in range(3):
+                self.assertIsNone(self.counter.hit("1.2.3.4", now=1000))
+            self.assertIsNotNone(self.counter.hit("1.2.3.4", now=1000))
+
+
+@override_settings(LOGIN_THROTTLE=LOGIN_THROTTLE)
+class TestLoginThrottle(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # a fixed clock: attempts straddling a window boundary would only
+        # partly count towards the limit
+        hit = SlidingWindowCounter.hit
+        patcher = mock.patch.object(
+            SlidingWindowCounter, "hit", lambda counter, ident: hit(counter, ident, now=1000.0)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, username=TEST_USER_USERNAME, **extra):
+        return self.client.post(
+            reverse("api:login"), {"username": username, "password": TEST_USER_PASSWORD}, **extra
+        )
+
+    def test_username_blocked_before_queries(self):
+        self.login()
+        self.login()
+        blocked = get_login_throttle_stats()["username"]
+        with self.assertNumQueries(0):
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(get_login_throttle_stats()["username"], blocked + 1)
+
+    def test_ip_blocked(self):
+        for i in range(3):
+            self.login(f"user{i}@example.com")
+        response = self.login("other@example.com")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_spoofed_forwarded_for_still_blocked(self):
+        for i in range(3):
+            self.login(f"user{i}@example.com", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}")
+        response = self.login("other@example.com", HTTP_X_FORWARDED_FOR="10.0.0.99")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1})
+    def test_behind_proxy_keyed_on_last_hop(self):
+        # the proxy appends the address it saw; anything before it is the client's
+        for i in range(3):
+            self.login(f"user{i}@example.com", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}, 203.0.113.7")
+        response = self.login("other@example.com", HTTP_X_FORWARDED_FOR="10.0.0.99, 203.0.113.7")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.login("other@example.com", HTTP_X_FORWARDED_FOR="203.0.113.8")
+        self.assertNotEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_non_object_body_rejected_by_serializer(self):
+        for body in ("[1, 2]", "1", '"username"'):
+            response = self.client.post(reverse("api:login"), body, content_type="application/json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auth_metrics(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "adminpassword")
+        self.client.force_authenticate(admin)
+        response = self.client.get(reverse("api:auth-metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("username", response.data["login_throttle"]["blocked"])
+        self.assertIn("rejected", response.data["password_hashing"])
@@ -1,5 +1,8 @@
 # Path: project/api/tests/unit/test_util.py
 
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+
 from api.tests.base import (
     BaseTestCase,
     TEST_USER_USERNAME,
@@ -8,6 +11,7 @@ from api.tests.base import (
     TEST_USER_FIRST_NAME,
     TEST_USER_LAST_NAME,
 )
+from api.util import create_user, get_users_by_email
 
 
 class TestCreateUser(BaseTestCase):
@@ -21,3 +25,30 @@ class TestCreateUser(BaseTestCase):
         self.assertFalse(user.is_active)
         self.assertTrue(user.check_password(TEST_USER_PASSWORD))
         self.assertIsNotNone(user.profile)
+
+
+class TestGetUsersByEmail(BaseTestCase):
+    def test_case_insensitive(self):
+        user = self.create_basic_test_user()
+        self.assertEqual(list(get_users_by_email(TEST_USER_EMAIL.upper())), [user])
+        self.assertFalse(get_users_by_email("nobody@example.com").exists())
+
+    def test_uses_index(self):
+        plan = get_users_by_email(TEST_USER_EMAIL).explain()
+        self.assertIn("auth_user_email_lower_uniq", plan)
+
+    def test_unique_ignoring_case(self):
+        self.create_basic_test_user()
+        with self.assertRaises(IntegrityError):
+            create_user(
+                username="other",
+                email=TEST_USER_EMAIL.upper(),
+                first_name=TEST_USER_FIRST_NAME,
+                last_name=TEST_USER_LAST_NAME,
+                password=TEST_USER_PASSWORD,
+            )
+
+    def test_blank_emails_allowed(self):
+        User.objects.create_user("first")
+        User.objects.create_user("second")
+        self.assertEqual(User.objects.filter(email="").count(), 2)
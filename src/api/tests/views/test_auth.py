@@ -3,6 +3,9 @@
 from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth.models import User
+from api.authentication import token_username_cache
+from api.tokens import account_activation_token
+from api.util import create_user
 from api.tests.base import (
     BaseTestCase,
     TEST_USER_USERNAME,
@@ -62,6 +65,34 @@ class TestLogin(BaseTestCase):
         self.assertIsNotNone(response.data.get("token"))
 
 
+    def test_login_queries(self):
+        """
+        Test login is a single query when the user's token is still valid:
+        the user, token and expiry are loaded together
+        """
+        self.user.is_active = True
+        self.user.save()
+        credentials = {"username": TEST_USER_USERNAME, "password": TEST_USER_PASSWORD}
+        # SELECT user, then the token and its expiry are inserted in a savepoint
+        with self.assertNumQueries(5):
+            token = self.client.post(reverse("api:login"), credentials).data.get("token")
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse("api:login"), credentials)
+        self.assertEqual(response.data.get("token"), token)
+
+    def test_login_fail_unknown_username(self):
+        """
+        Test login fails without revealing whether the username exists
+        """
+        response = self.client.post(
+            reverse("api:login"), {"username": "nobody@example.com", "password": "password"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            response.data.get("message"), "Invalid credentials or account not activated yet"
+        )
+
+
 class TestLogout(BaseTestCase):
     """
     Test for the Logout view
@@ -96,6 +127,25 @@ class TestLogout(BaseTestCase):
         response = self.client.get(reverse("api:auth-check"))
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_logout_invalidates_token_cache(self):
+        """
+        Test logout evicts the token from the shared token -> username cache
+        """
+        user = self.create_basic_test_user()
+        user.is_active = True
+        user.save()
+        response = self.client.post(
+            reverse("api:login"), {"username": TEST_USER_USERNAME, "password": TEST_USER_PASSWORD}
+        )
+        token = response.data.get("token")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        response = self.client.get(reverse("api:auth-check"))
+        self.assertEqual(token_username_cache.get(token), TEST_USER_USERNAME)
+
+        response = self.client.post(reverse("api:logout"))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(token_username_cache.get(token), "anonymous")
+
     def test_logout_fail_no_token(self):
         """
         Test logout fails when no token is provided
@@ -131,6 +181,27 @@ class TestSignUp(BaseTestCase):
             f"Your account was created. Please check your email ({TEST_USER_EMAIL}) for a link to activate your account.",
         )
 
+    def test_signup_queries(self):
+        """
+        Test signup inserts the user and profile, with no other queries
+        """
+        # INSERT user and profile, in a savepoint
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                reverse("api:signup"),
+                {
+                    "email": TEST_USER_EMAIL,
+                    "password": TEST_USER_PASSWORD,
+                    "first_name": TEST_USER_FIRST_NAME,
+                    "last_name": TEST_USER_LAST_NAME,
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(id=response.data.get("user_id"))
+        self.assertFalse(user.is_active)
+        self.assertTrue(user.check_password(TEST_USER_PASSWORD))
+        self.assertEqual(user.profile.plan_type, "FRE")
+
     def test_signup_fail_duplicate_username(self):
         """
         Test signup fails when duplicate username is provided
@@ -184,14 +255,37 @@ class TestActivateAccount(BaseTestCase):
         Test activation succeeds when user is already active
         """
         self.user = self.create_basic_test_user()
+        token = account_activation_token.make_token(self.user)
         self.user.is_active = True
         self.user.save()
         response = self.client.get(
-            reverse("api:activate-account", kwargs={"uidb64": self.user.pk, "token": "validtoken"})
+            reverse("api:activate-account", kwargs={"uidb64": self.user.pk, "token": token})
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data.get("message"), "Account already activated!")
 
+    def test_activate_account_fail_forged_token_without_queries(self):
+        """
+        Test tokens that are forged or issued for another user are rejected
+        before the user is loaded
+        """
+        self.user = self.create_basic_test_user()
+        other = create_user(
+            username="other@example.com",
+            email="other@example.com",
+            first_name=TEST_USER_FIRST_NAME,
+            last_name=TEST_USER_LAST_NAME,
+            password=TEST_USER_PASSWORD,
+        )
+        token = account_activation_token.make_token(self.user)
+        for uid, forged in [(self.user.pk, token[:-1] + "x"), (other.pk, token)]:
+            with self.assertNumQueries(0):
+                response = self.client.get(
+                    reverse("api:activate-account", kwargs={"uidb64": uid, "token": forged})
+                )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data.get("message"), "Activation link is invalid!")
+
     def test_activate_account_success(self):
         """
         Test activation success
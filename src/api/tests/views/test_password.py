@@ -27,6 +27,21 @@ class TestSendPasswordResetEmail(BaseTestCase):
         self.assertIsNotNone(response.data.get("token"))
         self.assertEqual(response.data.get("message"), "Could not send password reset email")
 
+    def test_send_password_reset_email_case_insensitive(self):
+        """
+        Test the email is matched ignoring case, with a single user query
+        """
+        user = self.create_basic_test_user()
+        user.is_active = True
+        user.save()
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse("api:send-password-reset-email"),
+                {"email": TEST_USER_EMAIL.upper(), "host": settings.FRONTEND_URL},
+            )
+        self.assertIsNotNone(response.data.get("token"))
+        self.assertEqual(response.data.get("message"), "Could not send password reset email")
+
     def test_send_password_reset_email_fail_dne_user(self):
         """
         Test sending a password reset email fails
@@ -114,10 +129,12 @@ class TestPasswordReset(BaseTestCase):
         """
         Test password reset fails with invalid user
         """
+        user_id = self.user.id
+        self.user.delete()
         response = self.client.patch(
             reverse("api:set-new-password-anonymous"),
             {
-                "user_id": -20,
+                "user_id": user_id,
                 "token": self.password_reset_token,
                 "password": "newpassword",
                 "confirm_password": "newpassword",
@@ -127,6 +144,42 @@ class TestPasswordReset(BaseTestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data.get("message"), "User with this id does not exist.")
 
+    def test_set_new_password_anonymous_fail_other_user_without_queries(self):
+        """
+        Test a reset token presented for another user id is rejected before
+        any query
+        """
+        with self.assertNumQueries(0):
+            response = self.client.patch(
+                reverse("api:set-new-password-anonymous"),
+                {
+                    "user_id": self.user.id + 1,
+                    "token": self.password_reset_token,
+                    "password": "newpassword",
+                    "confirm_password": "newpassword",
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data.get("message"), "Invalid token")
+
+    def test_verify_password_reset_token_queries(self):
+        """
+        Test a malformed token costs no query and a valid one a single fetch
+        """
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                reverse("api:verify-password-reset-token"),
+                {"token": "invalidtoken", "user_id": self.user.id},
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse("api:verify-password-reset-token"),
+                {"token": self.password_reset_token, "user_id": self.user.id},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_set_new_password_anonymous_fail_invalid_passwords(self):
         """
         Test password reset fails with invalid passwords
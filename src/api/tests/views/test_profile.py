@@ -6,8 +6,17 @@ from api.tests.base import (
     TEST_USER_PREFERRED_NAME,
 )
 
+from datetime import timedelta
+from unittest import mock
+
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from api.models import Profile
 
 
 class TestGetProfile(BaseTestCase):
@@ -35,6 +44,65 @@ class TestGetProfile(BaseTestCase):
         self.assertEqual(response.data.get("card_type"), self.user.profile.card_type)
         self.assertEqual(response.data.get("plan_type"), self.user.profile.plan_type)
 
+    def test_get_profile_not_modified(self):
+        Profile.objects.filter(user=self.user).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.user.profile.refresh_from_db()
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("api:get-profile"))
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertIn("Authorization", response["Vary"])
+
+        response = self.client.get(reverse("api:get-profile"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(
+            reverse("api:get-profile"), HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_get_profile_modified_after_edit(self):
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(reverse("api:get-profile"))["ETag"]
+        self.client.patch(reverse("api:edit-profile"), {"bio": "New Bio"}, format="json")
+        response = self.client.get(reverse("api:get-profile"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("bio"), "New Bio")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_get_profile_modified_after_user_change(self):
+        # e.g. in the admin, or by the import command
+        self.user.is_active = True
+        self.user.save()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        etag = self.client.get(reverse("api:get-profile"))["ETag"]
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Renamed"
+        user.save()
+        response = self.client.get(reverse("api:get-profile"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("first_name"), "Renamed")
+        self.assertGreater(
+            Profile.objects.get(user=self.user).updated_at, self.user.profile.updated_at
+        )
+
+    def test_get_profile_no_last_modified_within_second_of_change(self):
+        self.client.force_authenticate(user=self.user)
+        changed_at = self.user.profile.updated_at.timestamp()
+        with mock.patch("api.views.profile.time.time", return_value=changed_at):
+            # another change in this second would not move Last-Modified, so
+            # If-Modified-Since alone can't be answered with a 304
+            response = self.client.get(
+                reverse("api:get-profile"), HTTP_IF_MODIFIED_SINCE=http_date(changed_at + 1)
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Last-Modified"))
+
 
 class TestEditProfile(BaseTestCase):
     def setUp(self):
@@ -0,0 +1,165 @@
+"""
+Login throttling, so a credential stuffing burst is turned away before it
+costs a User query and a password hash per attempt.
+
+Attempts are counted per client IP and per username with sliding window
+counters: the count in the current fixed window plus the previous window's
+count, weighted by how much of it still overlaps the sliding window. That
+needs two cache keys per identity instead of a timestamp per attempt.
+
+Counters live in the Django cache (CACHES["default"]), shared by all workers
+when it is a shared backend. If the cache is unreachable, each worker counts
+in process instead, so the limits still hold per worker.
+
+The throttles are DRF throttle classes, which run before the view handler;
+DRF turns a rejection into a 429 with a Retry-After header.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
+
+
+class SlidingWindowCounter:
+    def __init__(self, scope, local_size=10000):
+        self.scope = scope
+        self._local = TTLCache(maxsize=local_size, ttl=2 * self.get_window())
+        self._lock = threading.Lock()
+
+    def get_limit(self):
+        return settings.LOGIN_THROTTLE[f"{self.scope.upper()}_LIMIT"]
+
+    def get_window(self):
+        return settings.LOGIN_THROTTLE[f"{self.scope.upper()}_WINDOW"]
+
+    def get_cache_key(self, ident, window_index):
+        # don't put usernames or addresses in the shared cache's key space
+        digest = hashlib.sha256(ident.encode("utf-8")).hexdigest()
+        return f"login-throttle:{self.scope}:{digest}:{window_index}"
+
+    def get_counts(self, keys):
+        try:
+            counts = cache.get_many(keys)
+        except Exception as e:
+            logger.warning({"action": "SlidingWindowCounter.get_counts", "error": str(e)})
+            with self._lock:
+                counts = {key: self._local[key] for key in keys if key in self._local}
+        return [counts.get(key, 0) for key in keys]
+
+    def increment(self, key, timeout):
+        try:
+            cache.add(key, 0, timeout)
+            cache.incr(key)
+        except Exception as e:
+            logger.warning({"action": "SlidingWindowCounter.increment", "error": str(e)})
+            with self._lock:
+                self._local[key] = self._local.get(key, 0) + 1
+
+    def hit(self, ident, now=None):
+        """
+        Count an attempt by `ident`, unless it is over the limit.
+
+        Returns:
+            float: None if the attempt is allowed, else the seconds until the
+            next one would be.
+        """
+        limit, window = self.get_limit(), self.get_window()
+        now = time.time() if now is None else now
+        index, offset = divmod(now, window)
+        index = int(index)
+        keys = [self.get_cache_key(ident, index - 1), self.get_cache_key(ident, index)]
+        previous, current = self.get_counts(keys)
+
+        overlap = 1 - offset / window
+        if previous * overlap + current < limit:
+            self.increment(keys[1], 2 * window)
+            return None
+
+        if current < limit:
+            # wait for enough of the previous window to slide out
+            overlap_needed = (limit - current) / previous
+            return max(overlap - overlap_needed, 0) * window
+        # over the limit within this window alone: wait for it to end, then
+        # for enough of it to slide out in turn
+        return (window - offset) + (1 - limit / current) * window
+
+
+class LoginThrottle(BaseThrottle):
+    """
+    Base class of the login throttles; subclasses set `counter` and
+    implement get_throttle_ident().
+    """
+
+    counter = None
+
+    def get_throttle_ident(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        ident = self.get_throttle_ident(request)
+        if not ident:
+            return True
+        self.wait_time = self.counter.hit(ident)
+        if self.wait_time is None:
+            return True
+        record_blocked(self.counter.scope)
+        logger.warning(
+            {
+                "action": "LoginThrottle.allow_request",
+                "scope": self.counter.scope,
+                "ip": self.get_ident(request),
+                "wait": math.ceil(self.wait_time),
+            }
+        )
+        return False
+
+    def wait(self):
+        return self.wait_time
+
+
+class LoginIPThrottle(LoginThrottle):
+    counter = SlidingWindowCounter("ip")
+
+    def get_throttle_ident(self, request):
+        # REMOTE_ADDR, or with REST_FRAMEWORK["NUM_PROXIES"] set, the client
+        # address added to X-Forwarded-For by the outermost trusted proxy
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(LoginThrottle):
+    counter = SlidingWindowCounter("username")
+
+    def get_throttle_ident(self, request):
+        # a body that isn't an object is left for the view's serializer to reject
+        if not isinstance(request.data, Mapping):
+            return None
+        username = request.data.get("username")
+        return username.strip().lower() if isinstance(username, str) else None
+
+
+_blocked = Counter()
+_blocked_lock = threading.Lock()
+
+
+def record_blocked(scope):
+    with _blocked_lock:
+        _blocked[scope] += 1
+
+
+def get_login_throttle_stats():
+    """
+    Login attempts blocked in this worker process, per scope.
+    """
+    with _blocked_lock:
+        return {scope: _blocked[scope] for scope in ("ip", "username")}
@@ -1,6 +1,64 @@
+"""
+Account activation and password reset tokens.
+
+Django's token generators can only check a token against the user's current
+state, so every check loads the user first. The tokens handed out here wrap
+the generator's token in a signed envelope (django.core.signing) that binds
+it to the user's id and its creation time:
+
+    <user id>:<generator token>:<timestamp>:<signature>
+
+verify() checks the envelope without touching the database, so malformed,
+expired and forged tokens, and tokens presented for another user, cost no
+query. Only tokens that pass it are checked against the user, which also
+makes them single-use (the generator's hash covers the password, last login
+and, for activation, is_active).
+"""
+
+from django.conf import settings
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core import signing
 from six import text_type
 
+
 class AccountActivationTokenGenerator(PasswordResetTokenGenerator):
     def _make_hash_value(self, user, timestamp):
         return text_type(user.pk) + text_type(timestamp) + text_type(user.is_active)
+
+
+class SignedTokenGenerator:
+    def __init__(self, generator, salt):
+        self.generator = generator
+        self.signer = signing.TimestampSigner(salt=salt)
+
+    def make_token(self, user):
+        return self.signer.sign(f"{user.pk}:{self.generator.make_token(user)}")
+
+    def unsign(self, token, user_id):
+        """
+        Return the generator token inside `token` if the envelope is intact,
+        unexpired and issued for `user_id`, else None. No queries.
+        """
+        try:
+            value = self.signer.unsign(str(token), max_age=settings.PASSWORD_RESET_TIMEOUT)
+        except signing.BadSignature:  # includes SignatureExpired
+            return None
+        token_user_id, _, inner_token = value.partition(":")
+        if token_user_id != str(user_id):
+            return None
+        return inner_token
+
+    def verify(self, token, user_id):
+        return self.unsign(token, user_id) is not None
+
+    def check_token(self, user, token):
+        inner_token = self.unsign(token, user.pk)
+        return inner_token is not None and self.generator.check_token(user, inner_token)
+
+
+account_activation_token = SignedTokenGenerator(
+    AccountActivationTokenGenerator(), salt="api.tokens.account_activation"
+)
+password_reset_token = SignedTokenGenerator(
+    PasswordResetTokenGenerator(), salt="api.tokens.password_reset"
+)
@@ -64,6 +64,7 @@ urlpatterns = [
         profile.GetProfile.as_view(),
         name="get-profile",
     ),
+    path("import_users/", provisioning.ImportUsers.as_view(), name="import-users"),
 
     ##############################
     ##### SWAGGER ##############
@@ -90,4 +91,10 @@ urlpatterns = [
     ##### RECAPTCHA ##############
     path("verify_recaptcha/", recaptcha.VerifyRecaptcha.as_view(), name="verify-recaptcha"),
 
+    ##############################
+    ##### METRICS ################
+    ##############################
+    path("outbound_metrics/", metrics.OutboundMetrics.as_view(), name="outbound-metrics"),
+    path("auth_metrics/", metrics.AuthMetrics.as_view(), name="auth-metrics"),
+
 ]
@@ -1,40 +1,35 @@
-import base64
 import logging
-import os
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from django.conf import settings
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from jinja2 import Environment, FileSystemLoader, select_autoescape
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Lower
+from api.email_templates import build_raw_message, html_to_text, render_email, render_master_template
+from api.gmail import gmail_client
 from api.models import Profile
 
 logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
 
-##############################
-## SETUP JINJA ENVIRONMENT ###
-##############################
-email_template_dir = os.path.join(os.path.dirname(__file__), "templates", "email")
-jinja_env = Environment(
-    loader=FileSystemLoader(email_template_dir),
-    autoescape=select_autoescape(["html", "xml"]),
-)
+def is_test_recipient(recipient):
+    """Test and example.com recipients are logged but never emailed."""
+    return "test" in recipient or "example.com" in recipient
 
 
-def send_email(recipient, subject, body):
+def send_email(recipient, subject, body, html_body=None):
     """
     Sends an email using the Gmail API.
 
     Args:
         recipient (str): The email address of the recipient.
         subject (str): The subject of the email.
-        body (str): The body of the email.
+        body (str): The body of the email. Without html_body, it may be HTML and
+            is placed inside master.html.
+        html_body (str): The complete HTML version of the email, e.g. from
+            api.email_templates.render_email; body is then its plain text version.
     Returns:
         None
     """
     # do not send email if recipient domain is @example.com
-    if "test" in recipient or "example.com" in recipient:
+    if is_test_recipient(recipient):
         logger.info(
             {
                 "action": "send_email",
@@ -48,56 +43,12 @@ def send_email(recipient, subject, body):
 
     logger.info({"action": "send_email", "recipient": recipient, "subject": subject, "body": body})
     try:
-        SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
-        credentials = service_account.Credentials.from_service_account_info(
-            {
-                "type": "service_account",
-                "project_id": settings.GMAIL_API_PROJECT_ID,
-                "private_key_id": settings.GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY_ID,
-                "private_key": settings.GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY,
-                "client_email": settings.GMAIL_API_SERVICE_ACCOUNT_CLIENT_EMAIL,
-                "client_id": settings.GMAIL_API_SERVICE_ACCOUNT_CLIENT_ID,
-                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
-                "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                "client_x509_cert_url": settings.GMAIL_API_SERVICE_ACCOUNT_CLIENT_X509_CERT_URL,
-                "universe_domain": "googleapis.com",
-            },
-            scopes=SCOPES,
-        )
-        delegated_credentials = credentials.with_subject(settings.SEND_FROM_EMAIL)
-        service = build("gmail", "v1", credentials=delegated_credentials)
-        message = MIMEMultipart("alternative")
-        message["to"] = recipient
-        message["subject"] = subject
-        message["from"] = f"{settings.APP_NAME} <{settings.SEND_FROM_EMAIL}>"
-
-        # Load the Jinja template
-        template = jinja_env.get_template("master.html")
-
-        # Render the template
-        # Render the template with variables
-        ## allow body to be HTML
-        html_body = template.render(
-            title=subject,
-            header=subject,
-            content=body,
-            frontend_url=settings.FRONTEND_URL,
-            frontend_brand_logo_image_url=settings.FRONTEND_BRAND_LOGO_IMAGE_URL,
-            app_name=settings.APP_NAME,
-        )
-        # Attach both plain text and HTML versions of the message.
-        part1 = MIMEText(body, "plain")
-        part2 = MIMEText(html_body, "html")
-
-        # part1 will display if HTML disabled on recipient client
-        message.attach(part1)
-        # part2 will display if HTML enabled on recipient client
-        message.attach(part2)
-        raw = base64.urlsafe_b64encode(message.as_bytes())
-        raw = raw.decode()
+        if html_body is None:
+            html_body = render_master_template(subject, body)
+            body = html_to_text(html_body)
+        raw = build_raw_message(recipient, subject, text_body=body, html_body=html_body)
         body = {"raw": raw}
-        message = service.users().messages().send(userId="me", body=body).execute()
+        message = gmail_client.send(raw)
         logger.info(
             {
                 "action": "send_email",
@@ -139,16 +90,14 @@ def send_password_reset_email(recipient, first_name, subject, reset_link):
         }
     )
     try:
-        # Load the Jinja template
-        template = jinja_env.get_template("password_reset.html")
-        # Render the template with variables
-        html_body = template.render(
-            reset_link=reset_link, first_name=first_name, app_name=settings.APP_NAME
+        html_body, text_body = render_email(
+            "password_reset.html", subject, reset_link=reset_link, first_name=first_name
         )
         return send_email(
             recipient=recipient,
             subject=subject,
-            body=html_body,
+            body=text_body,
+            html_body=html_body,
         )
     except Exception as e:
         logger.error({"action": "send_password_reset_email", "error": str(e)})
@@ -177,16 +126,14 @@ def send_activate_account_email(recipient, first_name, subject, activate_link):
         }
     )
     try:
-        # Load the Jinja template
-        template = jinja_env.get_template("activate_account.html")
-        # Render the template with variables
-        html_body = template.render(
-            activate_link=activate_link, first_name=first_name, app_name=settings.APP_NAME
+        html_body, text_body = render_email(
+            "activate_account.html", subject, activate_link=activate_link, first_name=first_name
         )
         return send_email(
             recipient=recipient,
             subject=subject,
-            body=html_body,
+            body=text_body,
+            html_body=html_body,
         )
     except Exception as e:
         logger.error({"action": "send_activate_account_email", "error": str(e)})
@@ -207,18 +154,19 @@ def send_contact_us_received_acknowledgement_email(recipient, first_name, messag
         }
     )
     try:
-        template = jinja_env.get_template("contact_us_received_acknowledgement.html")
-        html_body = template.render(
+        subject = f"Thank You For Contacting {settings.APP_NAME}!"
+        html_body, text_body = render_email(
+            "contact_us_received_acknowledgement.html",
+            subject,
             first_name=first_name,
             message=message,
             submitted_at=submitted_at,
-            app_name=settings.APP_NAME,
-            contact_email=settings.CONTACT_EMAIL,
         )
         return send_email(
             recipient=recipient,
-            subject=f"Thank You For Contacting {settings.APP_NAME}!",
-            body=html_body,
+            subject=subject,
+            body=text_body,
+            html_body=html_body,
         )
     except Exception as e:
         logger.error({"action": "send_contact_us_received_acknowledgement_email", "error": str(e)})
@@ -241,18 +189,17 @@ def send_payment_complete_confirmation_email(
         }
     )
     try:
-        template = jinja_env.get_template("payment_complete_confirmation.html")
-        html_body = template.render(
+        html_body, text_body = render_email(
+            "payment_complete_confirmation.html",
+            subject,
             first_name=first_name,
             payment_amount=payment_amount,
-            app_name=settings.APP_NAME,
-            contact_email=settings.CONTACT_EMAIL,
-            frontend_url=settings.FRONTEND_URL,
         )
         return send_email(
             recipient=recipient,
             subject=subject,
-            body=html_body,
+            body=text_body,
+            html_body=html_body,
         )
     except Exception as e:
         logger.error({"action": "send_payment_complete_confirmation_email", "error": str(e)})
@@ -265,22 +212,33 @@ def send_payment_complete_confirmation_email(
 
 
 def create_user(username, email, first_name, last_name, password, is_active=False, bio="", preferred_name=""):
-    # create user and profile
-    user = User.objects.create_user(
-        username=username,
-        email=email,
+    # create user and profile with one INSERT each, in one transaction
+    user = User(
+        username=User.normalize_username(username),
+        email=User.objects.normalize_email(email),
         first_name=first_name,
         last_name=last_name,
-        password=password,
+        is_active=is_active,
     )
-    user.is_active = is_active
-    user.save()
-    profile = Profile.objects.create(user=user, bio=bio, preferred_name=preferred_name)
-    profile.save()
+    user.set_password(password)
+    with transaction.atomic():
+        user.save(force_insert=True)
+        Profile.objects.create(user=user, bio=bio, preferred_name=preferred_name)
 
     return user
 
 
+def get_users_by_email(email):
+    """
+    Users whose email is `email`, ignoring case. This is a lookup on the
+    unique index on LOWER(email) (see migration 0006), which only covers
+    non-blank emails, hence the matching exclude().
+    """
+    return User.objects.exclude(email="").alias(email_lower=Lower("email")).filter(
+        email_lower=email.lower()
+    )
+
+
 #####################################
 ###### SERIALIZER UTILITIES #########
 #####################################
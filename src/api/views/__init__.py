@@ -1,6 +1,8 @@
 from .auth import *
+from .metrics import *
 from .password import *
 from .payment import *
 from .profile import *
+from .provisioning import *
 from .recaptcha import *
 from .swagger import *
\ No newline at end of file
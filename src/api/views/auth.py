@@ -3,7 +3,6 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import permission_classes
 from rest_framework import status
-from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 
 from drf_spectacular.utils import extend_schema
@@ -15,6 +14,7 @@ from django.contrib.auth import authenticate
 from django.db import IntegrityError
 
 
+from api.authentication import get_or_create_token, token_auth_cache, token_username_cache
 from api.serializers import (
     MessageResponseSerializer,
     SignUpRequestSerializer,
@@ -22,17 +22,39 @@ from api.serializers import (
     SignUpResponseSerializer,
     LoginResponseSerializer,
 )
-from api.tokens import AccountActivationTokenGenerator
-from api.util import send_activate_account_email
+from api.hashers import HashingBusy
+from api.throttling import LoginIPThrottle, LoginUsernameThrottle
+from api.tokens import account_activation_token
+from api.models import OutboundEmail
+from api.outbox import queue_email
 
 import logging
 
 logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
 
 
+def hashing_busy_response(e):
+    """
+    503 for a request turned away because too many password hashes are
+    already in progress (see api.hashers).
+    """
+    return Response(
+        {"message": "The server is busy. Please try again in a moment."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
 @permission_classes([AllowAny])
 class ActivateAccount(views.APIView):
     def get(self, request, uidb64, token):
+        # forged, expired or mismatched links are rejected without a query
+        if not account_activation_token.verify(token, uidb64):
+            logger.error({"action": "ActivateAccount.get", "error": "Invalid activation token"})
+            return Response(
+                {"message": "Activation link is invalid!"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         try:
             user = User.objects.get(pk=uidb64)
         except (TypeError, ValueError, OverflowError, User.DoesNotExist) as e:
@@ -48,9 +70,9 @@ class ActivateAccount(views.APIView):
                 status=status.HTTP_200_OK,
             )
 
-        if user is not None and AccountActivationTokenGenerator().check_token(user, token):
+        if user is not None and account_activation_token.check_token(user, token):
             user.is_active = True
-            user.save()
+            user.save(update_fields=["is_active"])
             logger.info(
                 {
                     "action": "ActivateAccount.get",
@@ -72,7 +94,10 @@ class ActivateAccount(views.APIView):
 
 class Logout(APIView):
     def post(self, request, format=None):
+        token_key = request.user.auth_token.key
         request.user.auth_token.delete()
+        token_username_cache.invalidate(token_key)
+        token_auth_cache.invalidate(token_key)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -88,6 +113,10 @@ class AuthCheck(APIView):
 
 class Login(APIView):
     permission_classes = [AllowAny]
+    # don't reject a login because the client still sends its expired token
+    authentication_classes = []
+    # rejects credential stuffing before the User query and password hash
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     @extend_schema(
         request=LoginRequestSerializer,
@@ -106,10 +135,13 @@ class Login(APIView):
 
         username = serializer.validated_data.get("username")
         password = serializer.validated_data.get("password")
-        user = authenticate(username=username, password=password)
+        try:
+            user = authenticate(username=username, password=password)
+        except HashingBusy as e:
+            return hashing_busy_response(e)
 
         if user is not None and user.is_active:
-            token, _ = Token.objects.get_or_create(user=user)
+            token = get_or_create_token(user)
             result = {
                 "token": token.key,
             }
@@ -137,14 +169,15 @@ class SignUp(APIView):
         if serializer.is_valid():
             try:
                 user = serializer.save()
-                token = AccountActivationTokenGenerator().make_token(user)
+                token = account_activation_token.make_token(user)
                 logger.info(
                     {
                         "action": "SignUp.post",
                         "message": "Account created successfully, must activate account with email link",
                     }
                 )
-                send_activate_account_email(
+                queue_email(
+                    OutboundEmail.Kind.ACTIVATE_ACCOUNT,
                     recipient=user.email,
                     first_name=user.first_name,
                     subject=f"Activate {settings.APP_NAME} Account",
@@ -159,6 +192,19 @@ class SignUp(APIView):
                     },
                     status=status.HTTP_201_CREATED,
                 )
+            except HashingBusy as e:
+                return hashing_busy_response(e)
+            except IntegrityError:
+                logger.error(
+                    {
+                        "action": "SignUp.post",
+                        "error": "A user with this username already exists.",
+                    }
+                )
+                return Response(
+                    {"message": "A user with this username already exists."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             except Exception as e:
                 logger.error(
                     {
@@ -0,0 +1,36 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.hashers import hashing_executor
+from api.outbound import get_breaker_stats
+from api.throttling import get_login_throttle_stats
+
+
+class OutboundMetrics(APIView):
+    """
+    Circuit breaker state and call counters for each outbound integration
+    in this worker process.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"breakers": get_breaker_stats()})
+
+
+class AuthMetrics(APIView):
+    """
+    Blocked login attempts and password hashing counters in this worker
+    process.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "login_throttle": {"blocked": get_login_throttle_stats()},
+                "password_hashing": hashing_executor.get_stats(),
+            }
+        )
@@ -9,11 +9,13 @@ from rest_framework.permissions import IsAuthenticated
 
 from drf_spectacular.utils import extend_schema
 
-from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.contrib.auth.models import User
 from django.conf import settings
 
-from api.util import send_password_reset_email
+from api.authentication import token_auth_cache
+from api.hashers import HashingBusy
+from api.models import OutboundEmail
+from api.outbox import queue_email
 from api.permissions import IsAnonymous
 from api.serializers import (
     MessageResponseSerializer,
@@ -23,6 +25,8 @@ from api.serializers import (
     SetNewPasswordAnonymousRequestSerializer,
     SetNewPasswordAuthenticatedRequestSerializer,
 )
+from api.tokens import password_reset_token
+from api.views.auth import hashing_busy_response
 
 import logging
 
@@ -41,14 +45,14 @@ class SendPasswordResetEmail(views.APIView):
     def post(self, request):
         serializer = SendPasswordResetEmailRequestSerializer(data=request.data)
         if serializer.is_valid():
-            email = serializer.validated_data.get("email")
             host = serializer.validated_data.get("host")
-            user = User.objects.get(email=email)
+            user = serializer.user
             first_name = user.first_name
-            token = PasswordResetTokenGenerator().make_token(user)
+            token = password_reset_token.make_token(user)
             try:
-                if send_password_reset_email(
-                    recipient=email,
+                if queue_email(
+                    OutboundEmail.Kind.PASSWORD_RESET,
+                    recipient=user.email,
                     first_name=first_name,
                     subject=f"{settings.APP_NAME} Password Reset",
                     reset_link=f"{host}/reset-password/{user.id}/{token}",
@@ -87,10 +91,15 @@ class VerifyPasswordResetToken(views.APIView):
         serializer = VerifyPasswordResetTokenRequestSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                user_id = request.data.get("user_id")
-                token = request.data.get("token")
-                user = User.objects.get(id=user_id)
-                if not PasswordResetTokenGenerator().check_token(user, token):
+                user_id = serializer.validated_data.get("user_id")
+                token = serializer.validated_data.get("token")
+                # forged, expired or mismatched tokens are rejected without a query
+                user = (
+                    User.objects.filter(id=user_id).first()
+                    if password_reset_token.verify(token, user_id)
+                    else None
+                )
+                if user is None or not password_reset_token.check_token(user, token):
                     return Response(
                         {"message": f"Invalid token"},
                         status=status.HTTP_400_BAD_REQUEST,
@@ -143,15 +152,30 @@ class SetNewPasswordAnonymous(views.APIView):
             token = serializer.validated_data.get("token")
             password = serializer.validated_data.get("password")
             confirm_password = serializer.validated_data.get("confirm_password")
-            user = User.objects.get(id=user_id)
-            if not PasswordResetTokenGenerator().check_token(user, token):
+            # forged, expired or mismatched tokens are rejected without a query
+            if not password_reset_token.verify(token, user_id):
+                return Response(
+                    {"message": f"Invalid token"},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+            try:
+                user = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                return Response(
+                    {"message": "User with this id does not exist."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if not password_reset_token.check_token(user, token):
                 return Response(
                     {"message": f"Invalid token"},
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
             user.set_password(password)
-            user.save()
+            user.save(update_fields=["password"])
+            token_auth_cache.invalidate_user(user)
             return Response({"message": "Password reset successfully"}, status=status.HTTP_200_OK)
+        except HashingBusy as e:
+            return hashing_busy_response(e)
         except Exception as e:
             logger.error(
                 {
@@ -201,8 +225,11 @@ class SetNewPasswordAuthenticated(views.APIView):
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
             user.set_password(new_password)
-            user.save()
+            user.save(update_fields=["password"])
+            token_auth_cache.invalidate_user(user)
             return Response({"message": "Password reset successfully"}, status=status.HTTP_200_OK)
+        except HashingBusy as e:
+            return hashing_busy_response(e)
         except Exception as e:
             logger.error(
                 {
@@ -1,4 +1,7 @@
 # views.py
+import functools
+import math
+
 import stripe
 from django.conf import settings
 from drf_spectacular.utils import extend_schema
@@ -6,22 +9,47 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from api.util import send_payment_complete_confirmation_email
+from api.models import OutboundEmail
+from api.outbound import CircuitOpenError, DeadlineExceeded, get_breaker
+from api.outbox import queue_email
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
+@functools.lru_cache(maxsize=None)
+def _get_stripe_client(timeout):
+    return stripe.StripeClient(
+        settings.STRIPE_SECRET_KEY,
+        http_client=stripe.RequestsClient(timeout=timeout),
+        max_network_retries=0,
+    )
+
+
+def get_stripe_client(timeout):
+    """
+    A Stripe client whose requests time out after `timeout` seconds, rounded
+    up to a whole second so clients (and their connection pools) are reused.
+    """
+    return _get_stripe_client(max(math.ceil(timeout), 1))
+
+
 class CreatePaymentIntent(APIView):
     def post(self, request, *args, **kwargs):
         try:
-            payment_intent = stripe.PaymentIntent.create(
-                amount=settings.PREMIUM_CHARGE_AMOUNT,
-                currency="usd",
-                payment_method_types=["card"],
-            )
+            breaker = get_breaker("stripe")
+            with breaker.guard(ignore=(stripe.CardError, stripe.InvalidRequestError)) as timeout:
+                payment_intent = get_stripe_client(timeout).payment_intents.create(
+                    params={
+                        "amount": settings.PREMIUM_CHARGE_AMOUNT,
+                        "currency": "usd",
+                        "payment_method_types": ["card"],
+                    }
+                )
             return Response(
                 {"clientSecret": payment_intent["client_secret"]}, status=status.HTTP_201_CREATED
             )
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
 
@@ -30,15 +58,14 @@ class SendPaymentCompleteConfirmation(APIView):
     def get(self, request, section_id):
         payment_amount = settings.PREMIUM_CHARGE_AMOUNT
         try:
-            email_sent = send_payment_complete_confirmation_email(
+            email_queued = queue_email(
+                OutboundEmail.Kind.PAYMENT_COMPLETE,
                 recipient=request.user.email,
                 first_name=request.user.first_name,
                 subject=f"{settings.APP_NAME} Payment Confirmation",
-                course_title=course_title,
-                section_number=section_number,
                 payment_amount=payment_amount,
             )
-            if email_sent:
+            if email_queued:
                 return Response({"message": "Email sent successfully"}, status=status.HTTP_200_OK)
             else:
                 return Response(
@@ -9,14 +9,20 @@ from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema
 
 from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 
+from api.authentication import token_auth_cache
 from api.serializers import (
     EditProfileRequestSerializer,
     MessageResponseSerializer,
     ProfileSerializer,
 )
 
+import hashlib
+import json
 import logging
+import time
 
 logger = logging.getLogger(settings.PRIMARY_LOGGER_NAME)
 
@@ -58,8 +64,10 @@ class EditProfile(views.APIView):
                 user.profile.bio = data.get("bio")
             if data.get("preferred_name"):
                 user.profile.preferred_name = data.get("preferred_name")
-            user.profile.save()
-            user.save()
+            # bumps updated_at, GetProfile's Last-Modified
+            user.profile.save(update_fields=["bio", "preferred_name", "updated_at"])
+            user.save(update_fields=["first_name", "last_name"])
+            token_auth_cache.invalidate_user(user)
             return Response(
                 user.profile.format_json(),
                 status=status.HTTP_200_OK,
@@ -75,16 +83,45 @@ class EditProfile(views.APIView):
             )
 
 class GetProfile(views.APIView):
+    """
+    Get the user's profile. Responses carry an ETag, a hash of the profile
+    data, so polling clients can revalidate with If-None-Match and get a 304
+    without the response being rendered.
+
+    Last-Modified comes from Profile.updated_at, which HTTP dates round to
+    whole seconds. A second change within the same second would then go
+    unnoticed by a client revalidating with If-Modified-Since only, so while
+    the current second is the one the profile last changed in, Last-Modified
+    is left out and If-Modified-Since is ignored.
+    """
+
     permission_classes = [IsAuthenticated]
     @extend_schema(
-        responses={200: ProfileSerializer, 400: MessageResponseSerializer},
+        responses={200: ProfileSerializer, 304: None, 400: MessageResponseSerializer},
     )
     def get(self, request):
         try:
-            return Response(
-                request.user.profile.format_json(),
-                status=status.HTTP_200_OK
+            # request.user.profile comes from the token auth snapshot, so
+            # revalidating costs no query on a warm cache
+            profile = request.user.profile
+            data = profile.format_json()
+            digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+            etag = f'"{digest}"'
+            last_modified = int(profile.updated_at.timestamp())
+            if last_modified >= int(time.time()):
+                last_modified = None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
             )
+            if response is None:
+                response = Response(data, status=status.HTTP_200_OK)
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            # only the user's own client may reuse it, after revalidating
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ["Authorization"])
+            return response
         except Exception as e:
             logger.error({
                 "message": f"Could not get profile",
@@ -0,0 +1,69 @@
+import io
+import json
+
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import OpenApiTypes, extend_schema
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.provisioning import UserImporter, get_format, is_utf8, read_rows
+
+
+class ImportUsers(APIView):
+    """
+    Create users from an uploaded CSV or NDJSON file (see api.provisioning).
+    The response streams NDJSON as the import runs: a line per rejected row,
+    with its line number, email and error, and a progress line per chunk.
+    """
+
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(request={"multipart/form-data": OpenApiTypes.OBJECT}, responses=OpenApiTypes.STR)
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"message": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+        format = request.data.get("format") or get_format(upload.name)
+        if format not in ("csv", "ndjson"):
+            return Response(
+                {"message": "The file must be CSV or NDJSON."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # checked up front: once the response streams, the status is sent
+        if not is_utf8(upload):
+            return Response(
+                {"message": "The file must be UTF-8 encoded."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            chunk_size = int(request.data.get("chunk_size", 1000))
+        except ValueError:
+            chunk_size = 0
+        if chunk_size < 1:
+            return Response(
+                {"message": "chunk_size must be a positive integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        errors = []
+        importer = UserImporter(
+            chunk_size=chunk_size,
+            on_error=lambda line, email, error: errors.append(
+                {"line": line, "email": email, "error": error}
+            ),
+        )
+        stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+
+        def progress():
+            for result in importer.iter_run(read_rows(stream, format)):
+                for error in errors:
+                    yield json.dumps(error) + "\n"
+                errors.clear()
+                yield json.dumps(result._asdict()) + "\n"
+            yield json.dumps({"done": True, **importer.get_result()._asdict()}) + "\n"
+
+        return StreamingHttpResponse(progress(), content_type="application/x-ndjson")
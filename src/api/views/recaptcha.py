@@ -7,6 +7,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.outbound import get_breaker
 from api.serializers.recaptcha import (
     VerifyRecaptchaRequestSerializer,
     VerifyRecaptchaResponseSerializer,
@@ -25,7 +26,9 @@ class VerifyRecaptcha(APIView):
         try:
             token = request.data.get("token")
             url = f"https://www.google.com/recaptcha/api/siteverify?secret={settings.RECAPTCHA_SECRET_KEY}&response={token}"
-            response = requests.post(url)
+            with get_breaker("recaptcha").guard() as timeout:
+                response = requests.post(url, timeout=timeout)
+                response.raise_for_status()
             result = response.json()
             logger.info(
                 {
@@ -0,0 +1,116 @@
+"""
+Benchmark RequestLogMiddleware under uvicorn, comparing the sync-only
+middleware (which Django wraps in a sync_to_async thread hop on every ASGI
+request) against the native async (__acall__) path.
+
+Usage, from the src/ directory:
+
+    pip install uvicorn  # not a project dependency
+    python -m benchmarks.asgi_request_log --requests 5000 --concurrency 50
+
+The default target is the (sync) DRF AuthCheck view, which Django still runs
+through its own thread hop; pass --path to measure a native async view.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import uvicorn  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+
+from api.middleware.logging import RequestLogMiddleware  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def build_application(async_capable):
+    """
+    Build a fresh ASGI handler; Django decides sync vs async middleware mode
+    when the handler loads its middleware chain.
+    """
+    original = RequestLogMiddleware.async_capable
+    RequestLogMiddleware.async_capable = async_capable
+    try:
+        application = get_asgi_application()
+    finally:
+        RequestLogMiddleware.async_capable = original
+    # get_asgi_application() re-applies LOGGING; measure the middleware, not stdout
+    logging.getLogger("api").handlers = [logging.NullHandler()]
+    return application
+
+
+def start_server(application, port):
+    server = uvicorn.Server(
+        uvicorn.Config(application, host=HOST, port=port, log_level="error", lifespan="off")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def worker(port, path, count):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    request = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+    for _ in range(count):
+        writer.write(request)
+        await writer.drain()
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in headers.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        await reader.readexactly(length)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load(port, path, requests, concurrency):
+    per_worker = requests // concurrency
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(port, path, per_worker) for _ in range(concurrency)))
+    return (per_worker * concurrency) / (time.perf_counter() - start)
+
+
+def run(label, async_capable, port, path, requests, concurrency):
+    server, thread = start_server(build_application(async_capable), port)
+    try:
+        asyncio.run(load(port, path, concurrency * 5, concurrency))  # warm up
+        rps = asyncio.run(load(port, path, requests, concurrency))
+    finally:
+        server.should_exit = True
+        thread.join()
+    print(f"{label:<32} {rps:>10.1f} req/s")
+    return rps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/auth_check/")
+    args = parser.parse_args()
+
+    before = run(
+        "sync-only middleware", False, args.port, args.path, args.requests, args.concurrency
+    )
+    after = run(
+        "async-capable middleware", True, args.port + 1, args.path, args.requests, args.concurrency
+    )
+    print(f"{'speedup':<32} {after / before:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark of a login burst: --logins threads each verify a PBKDF2 password
+(what authenticate() costs), while one more thread stands in for the rest of
+the API and does a small unit of work every few milliseconds.
+
+Hashing inline in every request thread (Django's default) is compared with
+api.hashers.BoundedPBKDF2PasswordHasher, which hashes on a pool of
+--max-workers threads and turns logins away (503) once --max-queue more are
+waiting. Reported: completed and rejected logins, login throughput and
+latency, and the latency of the other work.
+
+Usage, from the src/ directory:
+
+    python -m benchmarks.concurrent_logins --logins 32 --rounds 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher  # noqa: E402
+
+import api.hashers  # noqa: E402
+from api.hashers import BoundedPBKDF2PasswordHasher, HashingBusy, HashingExecutor  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+PAYLOAD = {"first_name": "Test", "last_name": "User", "plan_type": "FRE", "bio": "x" * 200}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def run(hasher, encoded, logins, rounds):
+    login_times, other_times, rejected = [], [], []
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def login():
+        for _ in range(rounds):
+            start = time.perf_counter()
+            try:
+                hasher.verify(PASSWORD, encoded)
+            except HashingBusy:
+                with lock:
+                    rejected.append(1)
+                # a client honouring Retry-After, compressed for the benchmark
+                time.sleep(0.05)
+                continue
+            with lock:
+                login_times.append(time.perf_counter() - start)
+
+    def other():
+        while not stop.is_set():
+            start = time.perf_counter()
+            for _ in range(20):
+                json.loads(json.dumps(PAYLOAD))
+            other_times.append(time.perf_counter() - start)
+            time.sleep(0.005)
+
+    other_thread = threading.Thread(target=other)
+    other_thread.start()
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    other_thread.join()
+    return elapsed, login_times, len(rejected), other_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-queue", type=int, default=2 * (os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    encoded = PBKDF2PasswordHasher().encode(PASSWORD, PBKDF2PasswordHasher().salt())
+    api.hashers.hashing_executor = HashingExecutor(args.max_workers, args.max_queue, 1)
+
+    print(
+        f"{'':<10} {'logins':>7} {'rejected':>9} {'logins/s':>9} "
+        f"{'login p50':>10} {'other p50':>10} {'other p99':>10}"
+    )
+    for name, hasher in [
+        ("inline", PBKDF2PasswordHasher()),
+        ("bounded", BoundedPBKDF2PasswordHasher()),
+    ]:
+        elapsed, login_times, rejected, other_times = run(hasher, encoded, args.logins, args.rounds)
+        print(
+            f"{name:<10} {len(login_times):>7} {rejected:>9} {len(login_times) / elapsed:>9.1f} "
+            f"{statistics.median(login_times) * 1000:>8.0f}ms "
+            f"{statistics.median(other_times) * 1000:>8.2f}ms "
+            f"{percentile(other_times, 0.99) * 1000:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark of building a password reset email with the previous pipeline
+(render the email template, render master.html around it, reuse the HTML as
+the text/plain part and flatten an email.mime message) vs
+api.email_templates (one render of a template extending master.html, a real
+text part, and prebuilt MIME headers).
+
+Also measures the cold start of a worker rendering its first email, with and
+without the on-disk bytecode cache.
+
+Usage, from the src/ directory:
+
+    python -m benchmarks.email_render --emails 2000
+"""
+
+import argparse
+import base64
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from email.mime.multipart import MIMEMultipart  # noqa: E402
+from email.mime.text import MIMEText  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+from jinja2 import (  # noqa: E402
+    DictLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    select_autoescape,
+)
+
+from api.email_templates import (  # noqa: E402
+    build_raw_message,
+    email_template_dir,
+    get_layout_context,
+    render_email,
+)
+
+SUBJECT = "project Password Reset"
+CONTEXT = {"first_name": "Jane", "reset_link": "https://example.com/reset-password/1/abc-123"}
+
+
+def legacy_env():
+    """The previous setup: master.html plus the email body as a standalone template."""
+    loader = FileSystemLoader(email_template_dir)
+    source = loader.get_source(None, "password_reset.html")[0]
+    body = source.split("{% block content %}\n", 1)[1].rsplit("{% endblock %}", 1)[0]
+    master = loader.get_source(None, "master.html")[0]
+    return Environment(
+        loader=DictLoader({"master.html": master, "password_reset.html": body}),
+        autoescape=select_autoescape(["html", "xml"]),
+    )
+
+
+def legacy_build(env):
+    body = env.get_template("password_reset.html").render(app_name=settings.APP_NAME, **CONTEXT)
+    html = env.get_template("master.html").render(
+        title=SUBJECT, header=SUBJECT, content=body, **get_layout_context()
+    )
+    message = MIMEMultipart("alternative")
+    message["to"] = "jane@domain.com"
+    message["subject"] = SUBJECT
+    message["from"] = f"{settings.APP_NAME} <{settings.SEND_FROM_EMAIL}>"
+    message.attach(MIMEText(body, "plain"))
+    message.attach(MIMEText(html, "html"))
+    return base64.urlsafe_b64encode(message.as_bytes()).decode()
+
+
+def pipeline_build():
+    html, text = render_email("password_reset.html", SUBJECT, **CONTEXT)
+    return build_raw_message("jane@domain.com", SUBJECT, text_body=text, html_body=html)
+
+
+def per_email(build, emails):
+    build()  # warm up
+    start = time.perf_counter()
+    for _ in range(emails):
+        build()
+    return (time.perf_counter() - start) / emails
+
+
+def first_render(bytecode_cache):
+    env = Environment(
+        loader=FileSystemLoader(email_template_dir),
+        autoescape=select_autoescape(["html", "xml"]),
+        bytecode_cache=bytecode_cache,
+    )
+    start = time.perf_counter()
+    env.get_template("password_reset.html").render(
+        title=SUBJECT, header=SUBJECT, **get_layout_context(), **CONTEXT
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--emails", type=int, default=2000)
+    args = parser.parse_args()
+
+    env = legacy_env()
+    legacy = per_email(lambda: legacy_build(env), args.emails)
+    pipeline = per_email(pipeline_build, args.emails)
+    print(f"{'previous pipeline':<28} {legacy * 1000:>8.3f} ms/email")
+    print(f"{'render_email pipeline':<28} {pipeline * 1000:>8.3f} ms/email")
+
+    with tempfile.TemporaryDirectory() as directory:
+        first_render(FileSystemBytecodeCache(directory))  # populate the cache
+        cold = first_render(None)
+        warm = first_render(FileSystemBytecodeCache(directory))
+    print(f"{'first render, compiling':<28} {cold * 1000:>8.3f} ms")
+    print(f"{'first render, bytecode cache':<28} {warm * 1000:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
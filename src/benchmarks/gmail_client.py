@@ -0,0 +1,82 @@
+"""
+Microbenchmark of the per-email overhead of obtaining a Gmail service in
+api.util.send_email: rebuilding credentials and the service object for every
+email (the previous behaviour) vs the process-wide api.gmail.GmailClient.
+
+Only local work is measured (credentials, discovery document, building the
+send request); nothing is sent. On top of this, the rebuild path also pays an
+OAuth token round trip per email, because fresh credentials have no access
+token, while GmailClient refreshes only when its token expires.
+
+Usage, from the src/ directory:
+
+    python -m benchmarks.gmail_client --emails 200
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import rsa  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from google.oauth2 import service_account  # noqa: E402
+from googleapiclient.discovery import build  # noqa: E402
+
+from api.gmail import GMAIL_SCOPES, GmailClient  # noqa: E402
+
+RAW_MESSAGE = "RnJvbTogYmVuY2hAZXhhbXBsZS5jb20KClRlc3Q="
+
+
+def rebuild_per_email(settings):
+    credentials = service_account.Credentials.from_service_account_info(
+        {
+            "type": "service_account",
+            "private_key_id": settings["GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY_ID"],
+            "private_key": settings["GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY"],
+            "client_email": settings["GMAIL_API_SERVICE_ACCOUNT_CLIENT_EMAIL"],
+            "token_uri": "https://oauth2.googleapis.com/token",
+        },
+        scopes=GMAIL_SCOPES,
+    ).with_subject(settings["SEND_FROM_EMAIL"])
+    service = build("gmail", "v1", credentials=credentials)
+    return service.users().messages().send(userId="me", body={"raw": RAW_MESSAGE})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--emails", type=int, default=200)
+    args = parser.parse_args()
+
+    _, private_key = rsa.newkeys(2048)
+    settings = {
+        "GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY_ID": "benchmark",
+        "GMAIL_API_SERVICE_ACCOUNT_PRIVATE_KEY": private_key.save_pkcs1().decode(),
+        "GMAIL_API_SERVICE_ACCOUNT_CLIENT_EMAIL": "bench@project.iam.gserviceaccount.com",
+        "SEND_FROM_EMAIL": "bench@example.com",
+    }
+
+    start = time.perf_counter()
+    for _ in range(args.emails):
+        rebuild_per_email(settings)
+    rebuild = (time.perf_counter() - start) / args.emails
+
+    with override_settings(**settings):
+        client = GmailClient()
+        start = time.perf_counter()
+        for _ in range(args.emails):
+            client.get_service().users().messages().send(userId="me", body={"raw": RAW_MESSAGE})
+        cached = (time.perf_counter() - start) / args.emails
+
+    print(f"{'rebuild per email':<24} {rebuild * 1000:>8.3f} ms/email")
+    print(f"{'cached GmailClient':<24} {cached * 1000:>8.3f} ms/email")
+    print(f"{'speedup':<24} {rebuild / cached:>8.1f}x (excluding per-email token minting)")
+
+
+if __name__ == "__main__":
+    main()
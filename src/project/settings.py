@@ -17,6 +17,7 @@ import sys
 import boto3
 import sentry_sdk
 import base64
+import json
 
 
 load_dotenv()
@@ -133,6 +134,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.deadline.OutboundDeadlineMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -193,6 +195,9 @@ else:
     }
 
 
+# Logins load the user's API token with the user (see api.authentication.backends)
+AUTHENTICATION_BACKENDS = ["api.authentication.TokenModelBackend"]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -211,6 +216,52 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Login attempts allowed per client IP and per username within a sliding
+# window of *_WINDOW seconds (see api.throttling)
+LOGIN_THROTTLE = {
+    "IP_LIMIT": int(os.getenv("LOGIN_THROTTLE_IP_LIMIT", 30)),
+    "IP_WINDOW": int(os.getenv("LOGIN_THROTTLE_IP_WINDOW", 60)),
+    "USERNAME_LIMIT": int(os.getenv("LOGIN_THROTTLE_USERNAME_LIMIT", 10)),
+    "USERNAME_WINDOW": int(os.getenv("LOGIN_THROTTLE_USERNAME_WINDOW", 5 * 60)),
+}
+
+# Hasher choice and cost parameters calibrated for this host by
+# `python manage.py calibrate_password_hashers`; Django's defaults without it
+PASSWORD_HASHER_CONFIG_FILE = Path(
+    os.getenv("PASSWORD_HASHER_CONFIG_FILE", BASE_DIR / "password_hashers.json")
+)
+PASSWORD_HASHER_CONFIG = (
+    json.loads(PASSWORD_HASHER_CONFIG_FILE.read_text())
+    if PASSWORD_HASHER_CONFIG_FILE.exists()
+    else {}
+)
+
+# Same algorithms as Django's default, but PBKDF2, Argon2 and scrypt hash on a
+# bounded per-process pool with calibrated parameters (see api.hashers). The
+# first hasher is used for new hashes; the others still verify old ones.
+BOUNDED_PASSWORD_HASHERS = {
+    "pbkdf2_sha256": "api.hashers.BoundedPBKDF2PasswordHasher",
+    "argon2": "api.hashers.BoundedArgon2PasswordHasher",
+    "scrypt": "api.hashers.BoundedScryptPasswordHasher",
+}
+PREFERRED_PASSWORD_HASHER = BOUNDED_PASSWORD_HASHERS[
+    PASSWORD_HASHER_CONFIG.get("algorithm", "pbkdf2_sha256")
+]
+PASSWORD_HASHERS = [
+    PREFERRED_PASSWORD_HASHER,
+    *(hasher for hasher in BOUNDED_PASSWORD_HASHERS.values() if hasher != PREFERRED_PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
+# At most MAX_WORKERS password hashes run at once per process and MAX_QUEUE
+# more may wait; further logins and sign ups get a 503 with Retry-After
+PASSWORD_HASHING = {
+    "MAX_WORKERS": int(os.getenv("PASSWORD_HASHING_MAX_WORKERS", os.cpu_count() or 1)),
+    "MAX_QUEUE": int(os.getenv("PASSWORD_HASHING_MAX_QUEUE", 2 * (os.cpu_count() or 1))),
+    "RETRY_AFTER": int(os.getenv("PASSWORD_HASHING_RETRY_AFTER", 1)),
+}
+
 
 ########################################
 ####### INTERNATIONALIZATION ##########
@@ -246,11 +297,52 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "PAGE_SIZE": 10,
+    # CachedJSONParser shares its parse of the request body with RequestLogMiddleware
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.CachedJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachingTokenAuthentication",
         # allow browsing of API from browser
         # 'rest_framework.authentication.SessionAuthentication',
     ),
+    # Reverse proxies (load balancers) in front of the app. Throttles key clients
+    # on the address the last of them put in X-Forwarded-For; with 0 the header,
+    # which clients can forge, is ignored and REMOTE_ADDR is used.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
+}
+
+# CachingTokenAuthentication caches token -> user/profile snapshots in process
+# for LOCAL_TTL seconds (how long other workers may miss an invalidation) and in
+# CACHES["default"] for SHARED_TTL seconds
+TOKEN_AUTH_CACHE = {
+    "LOCAL_SIZE": 10000,
+    "LOCAL_TTL": int(os.getenv("TOKEN_AUTH_CACHE_LOCAL_TTL", 5)),
+    "SHARED_TTL": int(os.getenv("TOKEN_AUTH_CACHE_SHARED_TTL", 300)),
+}
+
+# API tokens expire TTL seconds after they were last used. Use extends the
+# expiry at most once per REFRESH_INTERVAL seconds, to avoid a write per request.
+TOKEN_EXPIRY = {
+    "TTL": int(os.getenv("TOKEN_EXPIRY_TTL", 14 * 24 * 60 * 60)),
+    "REFRESH_INTERVAL": int(os.getenv("TOKEN_EXPIRY_REFRESH_INTERVAL", 60 * 60)),
+}
+
+# In-process Bloom filter over valid token keys, so bogus tokens are rejected
+# without a cache or database lookup (see api.authentication.filter). Each
+# worker rebuilds its filter every REBUILD_INTERVAL seconds. It relies on a
+# cache shared by all workers, so by default (ENABLED unset) it is only on when
+# CACHES["default"] is not a per-process backend.
+TOKEN_FILTER = {
+    "ENABLED": (
+        os.getenv("TOKEN_FILTER_ENABLED").lower() == "true"
+        if os.getenv("TOKEN_FILTER_ENABLED")
+        else None
+    ),
+    "FALSE_POSITIVE_RATE": float(os.getenv("TOKEN_FILTER_FALSE_POSITIVE_RATE", 0.01)),
+    "REBUILD_INTERVAL": int(os.getenv("TOKEN_FILTER_REBUILD_INTERVAL", 10 * 60)),
 }
 
 ########################################
@@ -301,6 +393,27 @@ LOGGING = {
             "level": "ERROR",
             "class": "api.slack_handler.SlackErrorHandler",
             "webhook_url": os.environ.get("SLACK_ERROR_BACKEND_WEBHOOK", ""),
+            # Identical errors within this many seconds are coalesced into one alert
+            "suppress_window": 60,
+            # Set to send one digest every N seconds instead of individual alerts
+            "digest_interval": int(os.environ.get("SLACK_ERROR_DIGEST_INTERVAL", 0)) or None,
+        },
+        # Queue handlers ship records to the handlers above from a background
+        # thread, so a slow CloudWatch or Slack endpoint never blocks a request.
+        # overflow: "drop" when the queue is full, or "block" for up to block_timeout seconds
+        "api-queue": {
+            "class": "api.queue_handler.QueueListenerHandler",
+            "targets": ["info-handler", "slack"],
+            "queue_size": int(os.getenv("LOG_QUEUE_SIZE", 10000)),
+            "overflow": os.getenv("LOG_QUEUE_OVERFLOW", "drop"),
+            "block_timeout": 0.05,
+        },
+        "slack-queue": {
+            "class": "api.queue_handler.QueueListenerHandler",
+            "targets": ["slack"],
+            "queue_size": int(os.getenv("LOG_QUEUE_SIZE", 10000)),
+            "overflow": os.getenv("LOG_QUEUE_OVERFLOW", "drop"),
+            "block_timeout": 0.05,
         },
     },
     # Root handler only sends WARNING logs to console.
@@ -310,18 +423,78 @@ LOGGING = {
     },
     "loggers": {
         PRIMARY_LOGGER_NAME: {
-            "handlers": ["info-handler", "slack"],
+            "handlers": ["api-queue"],
             "level": os.getenv("DJANGO_LOG_LEVEL", "INFO"),
             "propagate": False,
         },
         "django.request": {
-            "handlers": ["slack"],
+            "handlers": ["slack-queue"],
             "level": "ERROR",
             "propagate": True,
         },
     },
 }
 
+########################################
+####### CACHE SETTINGS ################
+########################################
+# Defaults to a per-process in-memory cache. Point DJANGO_CACHE_BACKEND and
+# DJANGO_CACHE_LOCATION at a shared cache (e.g. Redis or Memcached) so runtime
+# settings such as request-log sample rates reach every worker.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
+########################################
+####### REQUEST LOGGING SETTINGS #######
+########################################
+REQUEST_LOGGING = {
+    # Log a fingerprint of the Authorization token instead of the username;
+    # the logging middleware then makes no database queries at all.
+    "TOKEN_FINGERPRINT": os.getenv("REQUEST_LOG_TOKEN_FINGERPRINT", "false").lower() == "true",
+    # Bounded TTL/LRU cache of token -> username, shared with token authentication
+    "TOKEN_CACHE_SIZE": int(os.getenv("REQUEST_LOG_TOKEN_CACHE_SIZE", 10000)),
+    "TOKEN_CACHE_TTL": int(os.getenv("REQUEST_LOG_TOKEN_CACHE_TTL", 300)),
+    # Run RequestLogMiddleware natively async (__acall__) under ASGI
+    "ASYNC": os.getenv("REQUEST_LOG_ASYNC_MIDDLEWARE", "false").lower() == "true",
+    # Response bodies larger than this many bytes are logged as a truncated prefix
+    "MAX_RESPONSE_BODY_SIZE": int(os.getenv("REQUEST_LOG_MAX_RESPONSE_BODY_SIZE", 10 * 1024)),
+    # Per view_name overrides of MAX_RESPONSE_BODY_SIZE, e.g. {"api:get-profile": 2048}
+    "VIEW_MAX_RESPONSE_BODY_SIZE": {},
+    # Views whose response bodies are never logged
+    "SKIP_RESPONSE_BODY_VIEWS": ["api:schema", "api:swagger"],
+    # Values of body and query keys containing any of these (case-insensitively)
+    # are masked in the log, e.g. password, new_password and token
+    "REDACTED_FIELDS": ["password", "token", "secret"],
+    # Fraction of requests logged (with bodies); per view_name overrides in VIEW_SAMPLE_RATES,
+    # e.g. {"api:get-profile": 0.01}. Adjust at runtime with `manage.py set_log_sample_rate`.
+    "SAMPLE_RATE": float(os.getenv("REQUEST_LOG_SAMPLE_RATE", 1.0)),
+    "VIEW_SAMPLE_RATES": {},
+    "SAMPLE_RATE_REFRESH_INTERVAL": 30,
+    # Requests with a status at or above this, or slower than this many seconds,
+    # are always logged (without bodies unless sampled)
+    "ALWAYS_LOG_STATUS": 500,
+    "SLOW_REQUEST_THRESHOLD": float(os.getenv("REQUEST_LOG_SLOW_REQUEST_THRESHOLD", 1.0)),
+}
+
+########################################
+####### OUTBOUND INTEGRATIONS ##########
+########################################
+# Timeouts (seconds) and circuit breakers for third-party calls, see api.outbound.
+# A breaker opens after FAILURE_THRESHOLD consecutive failures and lets one
+# trial call through after RESET_TIMEOUT seconds.
+OUTBOUND_INTEGRATIONS = {
+    "recaptcha": {"TIMEOUT": 3.0, "FAILURE_THRESHOLD": 5, "RESET_TIMEOUT": 30.0},
+    "stripe": {"TIMEOUT": 10.0, "FAILURE_THRESHOLD": 5, "RESET_TIMEOUT": 30.0},
+    "gmail": {"TIMEOUT": 10.0, "FAILURE_THRESHOLD": 5, "RESET_TIMEOUT": 60.0},
+    "slack": {"TIMEOUT": 5.0, "FAILURE_THRESHOLD": 3, "RESET_TIMEOUT": 60.0},
+}
+# Total time a request may spend on outbound calls; shrinks the timeouts above
+OUTBOUND_REQUEST_DEADLINE = float(os.getenv("OUTBOUND_REQUEST_DEADLINE", 15.0))
+
 ########################################
 ####### GMAIL - EMAIL SETTINGS #########
 ########################################
@@ -362,6 +535,9 @@ SEND_FROM_EMAIL = os.environ.get("GMAIL_SEND_FROM_EMAIL", "")
 ####### EMAIL SETTINGS ################
 ########################################
 CONTACT_EMAIL = os.environ.get("CONTACT_EMAIL", "")
+# Compiled email templates are cached here so new workers skip compiling them;
+# defaults to a per-user directory under the system temp dir
+EMAIL_TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get("EMAIL_TEMPLATE_BYTECODE_CACHE_DIR") or None
 
 ########################################
 ####### DRF SPECTACULAR SETTINGS #######